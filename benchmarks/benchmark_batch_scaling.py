@@ -0,0 +1,62 @@
+"""
+Batch scaling benchmark: runs the BatchConverter on the bundled scenarios with an increasing number of workers and
+reports the speedup relative to a single worker. Each scenario is repeated to give every worker enough work.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/..")
+
+from osc_cr_converter.batch.converter import BatchConverter
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.converter.serializable import Serializable
+from osc_cr_converter.utility.configuration import ConverterParams
+from benchmarks.common import scenario_dir
+
+repetitions = 4
+worker_counts = [w for w in (1, 2, 4, 8, 16) if w <= (os.cpu_count() or 1)]
+
+# copy the bundled scenarios next to the originals, so relative map and catalog paths stay valid
+xosc_dir = os.path.join(scenario_dir, "xosc")
+scenarios = sorted(
+    os.path.join(xosc_dir, f)
+    for f in os.listdir(xosc_dir)
+    if f.endswith(".xosc") and "udp" not in f
+)
+copies_dir = tempfile.mkdtemp(prefix="benchmark_", dir=xosc_dir)
+file_list = []
+for i in range(repetitions):
+    for scenario in scenarios:
+        copy = os.path.join(copies_dir, f"{i}_{os.path.basename(scenario)}")
+        shutil.copy(scenario, copy)
+        file_list.append(copy)
+for file in file_list:
+    with open(file) as f:
+        content = f.read().replace('"../', '"../../')
+    with open(file, "w") as f:
+        f.write(content)
+
+config = ConverterParams()
+config.esmini.log_to_file = False
+batch_converter = BatchConverter(Osc2CrConverter(config))
+batch_converter.file_list = file_list
+
+try:
+    baseline = None
+    print(f"{len(file_list)} scenarios")
+    for num_worker in worker_counts:
+        Serializable.storage_dir = tempfile.mkdtemp(prefix="osc_cr_benchmark_")
+        start = time.perf_counter()
+        batch_converter.run_batch_conversion(num_worker=num_worker)
+        duration = time.perf_counter() - start
+        baseline = baseline or duration
+        print(
+            f"{num_worker:3d} worker: {duration:7.2f} s | speedup {baseline / duration:5.2f}x "
+            f"| efficiency {baseline / duration / num_worker * 100:5.1f} %"
+        )
+        shutil.rmtree(Serializable.storage_dir)
+finally:
+    shutil.rmtree(copies_dir)
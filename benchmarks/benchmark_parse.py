@@ -0,0 +1,70 @@
+"""
+Compares parsing an OpenSCENARIO file once into a ParsedScenario with the previous approach, which built a complete
+ElementTree for the pre-parse checks and another complete object model with scenariogeneration to find the extra
+information of the obstacles, on files with many vehicles following large inline trajectories.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import xml.etree.ElementTree as ElementTree
+
+from scenariogeneration.xosc import ParseOpenScenario
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/..")
+
+from osc_cr_converter.utility.obstacle_info import ObstacleExtraInfoFinder
+from osc_cr_converter.utility.parsed_scenario import ParsedScenario
+from benchmarks.common import create_trajectory_scenario
+
+warnings.simplefilter("ignore")
+
+
+def parse_legacy(file: str):
+    root = ElementTree.parse(file).getroot()
+    names = {o.attrib["name"] for o in root.iterfind("Entities/ScenarioObject")}
+    # ParseOpenScenario prints the detected version
+    with contextlib.redirect_stdout(io.StringIO()):
+        scenario = ParseOpenScenario(file)
+    return names, scenario.entities.scenario_objects
+
+
+def parse_single_pass(file: str):
+    parsed_scenario = ParsedScenario.parse(file)
+    names = set(parsed_scenario.scenario_objects.keys())
+    return names, ObstacleExtraInfoFinder(file, names, parsed_scenario).run()
+
+
+def measure(function, file: str):
+    """
+    The runtime and, in a second run as tracing slows it down, the peak of the allocated memory
+    """
+    start = time.perf_counter()
+    function(file)
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    function(file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak
+
+
+directory = tempfile.mkdtemp(prefix="osc_cr_benchmark_")
+print(
+    f"{'vehicles':>8s} {'vertices':>8s} {'size':>9s} | {'legacy':>16s} | {'single pass':>16s} | speedup"
+)
+for num_vehicles, num_vertices in ((5, 200), (10, 500), (20, 1000)):
+    file = create_trajectory_scenario(num_vehicles, num_vertices, directory)
+    size = os.path.getsize(file) / 2**20
+    legacy_time, legacy_peak = measure(parse_legacy, file)
+    single_time, single_peak = measure(parse_single_pass, file)
+    print(
+        f"{num_vehicles:8d} {num_vertices:8d} {size:7.1f}MB | "
+        f"{legacy_time:6.2f} s {legacy_peak / 2**20:6.1f}MB | "
+        f"{single_time:6.2f} s {single_peak / 2**20:6.1f}MB | {legacy_time / single_time:6.1f}x",
+        flush=True,
+    )
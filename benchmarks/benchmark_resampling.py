@@ -0,0 +1,52 @@
+"""
+Compares the per time step interpolation (ScenarioObjectState.build_interpolated) with the vectorized resampling
+(ScenarioObjectState.build_cr_states) on synthetic recordings of long scenarios with many entities.
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/..")
+
+from osc_cr_converter.wrapper.base.scenario_object import ScenarioObjectState
+from tests.test_scenario_object import create_recorded_states
+
+dt_sim = 0.01
+dt_cr = 0.1
+
+for max_time, num_entities in ((10.0, 5), (30.0, 10), (60.0, 10)):
+    recordings = [
+        create_recorded_states(int(max_time / dt_sim) + 1, dt_sim, seed)
+        for seed in range(num_entities)
+    ]
+    timestamps = [step * dt_cr for step in range(math.floor(max_time / dt_cr) + 1)]
+
+    start = time.perf_counter()
+    for states in recordings:
+        legacy = [
+            ScenarioObjectState.build_interpolated(states, t, None).to_cr_state(i)
+            for i, t in enumerate(timestamps)
+        ]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for states in recordings:
+        vectorized = (
+            states[0]
+            .get_scenario_object_state_type()
+            .build_cr_states(states, timestamps, 0, None)
+        )
+    vectorized_time = time.perf_counter() - start
+
+    assert all(
+        np.allclose(a.position, b.position) and math.isclose(a.velocity, b.velocity)
+        for a, b in zip(legacy, vectorized)
+    )
+    print(
+        f"{max_time:5.0f} s, {num_entities:3d} entities: "
+        f"per time step {legacy_time:8.3f} s | vectorized {vectorized_time:6.3f} s | "
+        f"speedup {legacy_time / vectorized_time:6.1f}x"
+    )
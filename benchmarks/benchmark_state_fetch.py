@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the simulation steps per second of the EsminiWrapper versus the number of objects for the
+different ways of fetching the object states from esmini:
+ - per object: a new SEStruct per object and step (as done before the bulk fetch was introduced)
+ - cached ids: per object calls into a reused buffer with cached ids
+ - bulk: SE_GetObjectStates into a reused buffer (only if supported by the esmini version)
+"""
+import ctypes as ct
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/..")
+
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import SEStruct
+from osc_cr_converter.wrapper.esmini.esmini_wrapper_provider import (
+    EsminiWrapperProvider,
+)
+from osc_cr_converter.wrapper.esmini.state_recorder import EsminiStateRecorder
+from benchmarks.common import create_scenario
+
+num_steps = 2000
+dt_sim = 0.01
+
+config = ConverterParams()
+config.esmini.log_to_file = False
+wrapper = EsminiWrapperProvider(config).provide_esmini_wrapper()
+bulk_supported = wrapper._bulk_state_fetch
+
+
+def fetch_per_object():
+    lib = wrapper.esmini_lib
+    objects = {}
+    for j in range(lib.SE_GetNumberOfObjects()):
+        object_id = lib.SE_GetId(j)
+        objects[object_id] = SEStruct()
+        lib.SE_GetObjectState(object_id, ct.byref(objects[object_id]))
+    return objects
+
+
+def steps_per_second(scenario_file: str, mode: str) -> float:
+    wrapper._bulk_state_fetch = mode == "bulk"
+    assert wrapper._initialize_scenario_engine(
+        scenario_file, viewer_mode=0, use_threading=False
+    )
+    recorder = EsminiStateRecorder()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        wrapper._sim_step(dt_sim)
+        if mode == "per object":
+            fetch_per_object()
+        else:
+            wrapper._record_scenario_object_states(recorder)
+    duration = time.perf_counter() - start
+    wrapper._close_scenario_engine()
+    return num_steps / duration
+
+
+modes = ["per object", "cached ids"] + (["bulk"] if bulk_supported else [])
+print(f"{'objects':>8s}" + "".join(f"{mode:>14s}" for mode in modes) + "  [steps/s]")
+for num_objects in (1, 10, 50, 100, 200):
+    scenario_file = create_scenario(num_objects, num_steps * dt_sim)
+    results = [steps_per_second(scenario_file, mode) for mode in modes]
+    print(f"{num_objects:8d}" + "".join(f"{r:14.0f}" for r in results))
+wrapper._bulk_state_fetch = bulk_supported
@@ -0,0 +1,191 @@
+"""
+Utilities shared by the benchmarks
+"""
+import os
+import tempfile
+
+scenario_dir = os.path.normpath(
+    os.path.dirname(os.path.realpath(__file__)) + "/../scenarios/from_esmini/"
+)
+
+_vehicle_template = """
+      <ScenarioObject name="{name}">
+         <CatalogReference catalogName="VehicleCatalog" entryName="car_white"/>
+      </ScenarioObject>"""
+
+_init_template = """
+            <Private entityRef="{name}">
+               <PrivateAction>
+                  <LongitudinalAction>
+                     <SpeedAction>
+                        <SpeedActionDynamics dynamicsShape="step" dynamicsDimension="time" value="0.0"/>
+                        <SpeedActionTarget>
+                           <AbsoluteTargetSpeed value="{speed}"/>
+                        </SpeedActionTarget>
+                     </SpeedAction>
+                  </LongitudinalAction>
+               </PrivateAction>
+               <PrivateAction>
+                  <TeleportAction>
+                     <Position>
+                        <LanePosition roadId="1" laneId="{lane}" offset="0" s="{s}"/>
+                     </Position>
+                  </TeleportAction>
+               </PrivateAction>
+            </Private>"""
+
+_scenario_template = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+   <FileHeader revMajor="1" revMinor="0" date="2023-01-01T00:00:00" description="Benchmark" author="Benchmark"/>
+   <ParameterDeclarations/>
+   <CatalogLocations>
+      <VehicleCatalog>
+         <Directory path="{catalog_dir}"/>
+      </VehicleCatalog>
+   </CatalogLocations>
+   <RoadNetwork>
+      <LogicFile filepath="{xodr_file}"/>
+   </RoadNetwork>
+   <Entities>{entities}
+   </Entities>
+   <Storyboard>
+      <Init>
+         <Actions>{init}
+         </Actions>
+      </Init>
+      <StopTrigger>
+         <ConditionGroup>
+            <Condition name="StopCondition" delay="0" conditionEdge="rising">
+               <ByValueCondition>
+                  <SimulationTimeCondition value="{duration}" rule="greaterThan"/>
+               </ByValueCondition>
+            </Condition>
+         </ConditionGroup>
+      </StopTrigger>
+   </Storyboard>
+</OpenSCENARIO>
+"""
+
+
+def create_scenario(num_vehicles: int, duration: float, directory: str = None) -> str:
+    """
+    Write an OpenSCENARIO file with num_vehicles vehicles driving on the straight_500m road for duration seconds
+
+    :return: Path to the created file
+    """
+    names = ["Ego"] + [f"Vehicle{i}" for i in range(1, num_vehicles)]
+    entities = "".join(_vehicle_template.format(name=name) for name in names)
+    init = "".join(
+        _init_template.format(
+            name=name,
+            speed=5 + i % 10,
+            lane=-1 if i % 2 == 0 else 1,
+            s=10 + (i // 2) * 8 % 400,
+        )
+        for i, name in enumerate(names)
+    )
+    content = _scenario_template.format(
+        catalog_dir=os.path.join(scenario_dir, "xosc/Catalogs/Vehicles"),
+        xodr_file=os.path.join(scenario_dir, "xodr/straight_500m.xodr"),
+        entities=entities,
+        init=init,
+        duration=duration,
+    )
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="osc_cr_benchmark_")
+    file = os.path.join(directory, f"benchmark_{num_vehicles}_vehicles.xosc")
+    with open(file, "w") as f:
+        f.write(content)
+    return file
+
+
+_trajectory_story_template = """
+      <Story name="{name}Story">
+         <Act name="{name}Act">
+            <ManeuverGroup maximumExecutionCount="1" name="{name}ManeuverGroup">
+               <Actors selectTriggeringEntities="false">
+                  <EntityRef entityRef="{name}"/>
+               </Actors>
+               <Maneuver name="{name}Maneuver">
+                  <Event maximumExecutionCount="1" name="{name}Event" priority="overwrite">
+                     <Action name="{name}FollowTrajectory">
+                        <PrivateAction>
+                           <RoutingAction>
+                              <FollowTrajectoryAction>
+                                 <Trajectory closed="false" name="{name}Trajectory">
+                                    <ParameterDeclarations/>
+                                    <Shape>
+                                       <Polyline>{vertices}
+                                       </Polyline>
+                                    </Shape>
+                                 </Trajectory>
+                                 <TimeReference>
+                                    <Timing domainAbsoluteRelative="absolute" scale="1.0" offset="0.0"/>
+                                 </TimeReference>
+                                 <TrajectoryFollowingMode followingMode="position"/>
+                              </FollowTrajectoryAction>
+                           </RoutingAction>
+                        </PrivateAction>
+                     </Action>
+                     <StartTrigger>
+                        <ConditionGroup>
+                           <Condition name="{name}Start" delay="0" conditionEdge="rising">
+                              <ByValueCondition>
+                                 <SimulationTimeCondition value="0" rule="greaterThan"/>
+                              </ByValueCondition>
+                           </Condition>
+                        </ConditionGroup>
+                     </StartTrigger>
+                  </Event>
+               </Maneuver>
+            </ManeuverGroup>
+            <StartTrigger>
+               <ConditionGroup>
+                  <Condition name="{name}ActStart" delay="0" conditionEdge="rising">
+                     <ByValueCondition>
+                        <SimulationTimeCondition value="0" rule="greaterThan"/>
+                     </ByValueCondition>
+                  </Condition>
+               </ConditionGroup>
+            </StartTrigger>
+         </Act>
+      </Story>"""
+
+_vertex_template = """
+                                          <Vertex time="{time}">
+                                             <Position>
+                                                <WorldPosition x="{x}" y="{y}" z="0.0" h="0.0" p="0.0" r="0.0"/>
+                                             </Position>
+                                          </Vertex>"""
+
+
+def create_trajectory_scenario(
+    num_vehicles: int, num_vertices: int, directory: str = None
+) -> str:
+    """
+    Write an OpenSCENARIO file like create_scenario, in which every vehicle follows an inline polyline trajectory with
+    num_vertices vertices
+
+    :return: Path to the created file
+    """
+    file = create_scenario(num_vehicles, num_vertices * 0.1, directory)
+    with open(file) as f:
+        content = f.read()
+    names = ["Ego"] + [f"Vehicle{i}" for i in range(1, num_vehicles)]
+    stories = "".join(
+        _trajectory_story_template.format(
+            name=name,
+            vertices="".join(
+                _vertex_template.format(
+                    time=f"{0.1 * k:.1f}", x=f"{10 + 0.5 * k:.2f}", y=f"{-1.5 + i:.2f}"
+                )
+                for k in range(num_vertices)
+            ),
+        )
+        for i, name in enumerate(names)
+    )
+    content = content.replace("      </Init>", "      </Init>" + stories, 1)
+    file = file.replace(".xosc", f"_{num_vertices}_vertices.xosc")
+    with open(file, "w") as f:
+        f.write(content)
+    return file
@@ -21,7 +21,11 @@ output_dir = os.path.dirname(os.path.realpath(__file__)) + "/../output/batch/"
 config = ConverterParams()
 util_logger.initialize_logger(config)
 converter = Osc2CrConverter(config)
-batch_converter = BatchConverter(converter)
+# the corpus index classifies the files once, so e.g. catalogs are not dispatched to the workers,
+# prewarming converts each distinct map once before the scenarios are converted
+batch_converter = BatchConverter(
+    converter, corpus_index_file=output_dir + "corpus_index.sqlite", prewarm_maps=True
+)
 
 # discover the files
 batch_converter.discover_files(
@@ -7,7 +7,7 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 from enum import Enum
-from typing import Union, Dict, List, Optional, Type
+from typing import Union, Dict, List, Optional, Tuple, Type
 
 import numpy as np
 from commonroad.visualization.mp_renderer import MPRenderer
@@ -19,6 +19,7 @@ from osc_cr_converter.analyzer.base import Analyzer
 from osc_cr_converter.analyzer.error import AnalyzerErrorResult
 from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
 from osc_cr_converter.converter.osc2cr import EFailureReason, Osc2CrConverterResult
+from osc_cr_converter.converter.result import Osc2CrDistributionResult
 
 
 dark_blue = "#005293"
@@ -54,10 +55,26 @@ class EGranularity(Enum):
     VEHICLE = 2
 
 
+def _unpack_variants(
+    scenario_path: str, result: Serializable
+) -> List[Tuple[str, Serializable]]:
+    """
+    Unpack the result of a ParameterValueDistribution into the results of its variants, named by the path of the
+    distribution and the index of the variant. Any other result is returned as it is.
+    """
+    if isinstance(result, Osc2CrDistributionResult):
+        return [
+            (f"{scenario_path}[{i}]", variant)
+            for i, variant in enumerate(result.variants)
+        ]
+    return [(scenario_path, result)]
+
+
 def analyze_results(results: Dict[str, BatchConversionResult]):
     """
     Analyze a dictionary of BatchConversionResults. This will print many general statistics how many scenarios were
-    converted successfully, and about the run Analyzers
+    converted successfully, and about the run Analyzers. Each variant of a ParameterValueDistribution is counted as a
+    scenario.
     """
     counts = {}
 
@@ -90,24 +107,30 @@ def analyze_results(results: Dict[str, BatchConversionResult]):
         print(f"{description:<50s} {res} ({part}/{total})")
 
     sim_times = []
+    sim_times_saved = []
     runtimes = []
     analyzer_times = {}
     failed_scenarios = {}
 
     for scenario_path, result in results.items():
-        count("total")
         if not result.without_exception:
+            count("total")
             count("exception")
-        else:
-            result = result.get_result()
+            continue
+        result = result.get_result()
+        if isinstance(result, Osc2CrDistributionResult):
+            count("parameter value distributions")
+        for variant_path, result in _unpack_variants(scenario_path, result):
+            count("total")
             if isinstance(result, EFailureReason):
                 count("failed")
                 count(f"failed {result.name}")
-                failed_scenarios[scenario_path] = result.name
+                failed_scenarios[variant_path] = result.name
             elif isinstance(result, Osc2CrConverterResult):
                 count("success")
                 stats = result.statistics
                 sim_times.append(stats.sim_time)
+                sim_times_saved.append(stats.sim_time_saved)
                 runtimes.append(stats.runtime)
                 count("vehicle total", stats.num_obstacle_conversions)
                 count("vehicle failed", len(stats.failed_obstacle_conversions))
@@ -116,6 +139,10 @@ def analyze_results(results: Dict[str, BatchConversionResult]):
                     count("odr conversions run")
                     if result.xodr_conversion_error is None:
                         count("odr conversions success")
+                count("map cache hits", stats.map_cache_hits)
+                count(
+                    "map cache lookups", stats.map_cache_hits + stats.map_cache_misses
+                )
 
                 for t_analyzer, analysis in result.analysis.items():
                     exec_time, analysis = analysis
@@ -152,12 +179,19 @@ def analyze_results(results: Dict[str, BatchConversionResult]):
                 continue  # raise ValueError
 
     print(f"{'Total num scenarios':<50s} {counts['total']:5d}")
+    print(
+        f"{' | of ParameterValueDistributions':<50s} {counts.get('parameter value distributions', 0):5d}"
+    )
     print(f"{'Average scenario duration':<50s} {np.mean(sim_times):}")
     print(f"{'Average runtime':<50s} {np.mean(runtimes):}")
+    print(
+        f"{'Total simulation time saved by early ending':<50s} {np.sum(sim_times_saved):}"
+    )
     print("-" * 80)
     perc("OpenDRIVE Conversion run rate", "odr conversions run", "success")
     perc("OpenDRIVE Conversion success rate", "odr conversions success", "success")
     perc("", "odr conversions success", "odr conversions run")
+    perc("OpenDRIVE map cache hit rate", "map cache hits", "map cache lookups")
     print("-" * 80)
     print("Sim Ending causes:")
     for e_ending_cause in ESimEndingCause:
@@ -271,8 +305,11 @@ def print_exception_tracebacks_for_analyzer(
     for scenario_path, result in results.items():
         if not result.without_exception:
             continue
-        result = result.get_result()
-        if isinstance(result, Osc2CrConverterResult):
+        for variant_path, result in _unpack_variants(
+            scenario_path, result.get_result()
+        ):
+            if not isinstance(result, Osc2CrConverterResult):
+                continue
             analysis = result.analysis
             if analyzer in analysis:
                 error = None
@@ -280,10 +317,10 @@ def print_exception_tracebacks_for_analyzer(
                     if isinstance(analyzer_result, AnalyzerErrorResult):
                         error = analyzer_result
                         if granularity == EGranularity.VEHICLE:
-                            handle_error(result.xosc_file, error)
+                            handle_error(variant_path, error)
 
                 if granularity == EGranularity.SCENARIO and error is not None:
-                    handle_error(result.xosc_file, error)
+                    handle_error(variant_path, error)
 
     for error, count in errors.items():
         print(f"{count}\n{error.exception_text}\n{error.traceback_text}")
@@ -360,17 +397,17 @@ def plot_sim_times(
             for scenario_path, result in res.items():
                 if not result.without_exception:
                     continue
-                result = result.get_result()
-                if isinstance(result, Osc2CrConverterResult):
-                    times_for_result.append(result.statistics.sim_time)
+                for _, result in _unpack_variants(scenario_path, result.get_result()):
+                    if isinstance(result, Osc2CrConverterResult):
+                        times_for_result.append(result.statistics.sim_time)
             times.append(times_for_result)
     else:
         for scenario_path, result in results.items():
             if not result.without_exception:
                 continue
-            result = result.get_result()
-            if isinstance(result, Osc2CrConverterResult):
-                times.append(result.statistics.sim_time)
+            for _, result in _unpack_variants(scenario_path, result.get_result()):
+                if isinstance(result, Osc2CrConverterResult):
+                    times.append(result.statistics.sim_time)
 
     _plot_times(times, n_bins, low_pass_filter, path, label)
 
@@ -401,17 +438,17 @@ def plot_runtimes(
             for scenario_path, result in res.items():
                 if not result.without_exception:
                     continue
-                result = result.get_result()
-                if isinstance(result, Osc2CrConverterResult):
-                    times_for_result.append(result.statistics.runtime)
+                for _, result in _unpack_variants(scenario_path, result.get_result()):
+                    if isinstance(result, Osc2CrConverterResult):
+                        times_for_result.append(result.statistics.runtime)
             times.append(times_for_result)
     else:
         for scenario_path, result in results.items():
             if not result.without_exception:
                 continue
-            result = result.get_result()
-            if isinstance(result, Osc2CrConverterResult):
-                times.append(result.statistics.runtime)
+            for _, result in _unpack_variants(scenario_path, result.get_result()):
+                if isinstance(result, Osc2CrConverterResult):
+                    times.append(result.statistics.runtime)
 
     _plot_times(times, n_bins, low_pass_filter, path, label)
 
@@ -432,9 +469,9 @@ def plot_num_obstacles(
     for scenario_path, result in results.items():
         if not result.without_exception:
             continue
-        result = result.get_result()
-        if isinstance(result, Osc2CrConverterResult):
-            values.append(result.statistics.num_obstacle_conversions)
+        for _, result in _unpack_variants(scenario_path, result.get_result()):
+            if isinstance(result, Osc2CrConverterResult):
+                values.append(result.statistics.num_obstacle_conversions)
 
     if low_pass_filter is not None:
         fig, axs = plt.subplots(2, 1, sharey="all", tight_layout=True, figsize=(5, 5))
@@ -478,8 +515,11 @@ def plot_scenarios(results):
     for scenario_path, result in results.items():
         if not result.without_exception:
             continue
-        result_without_files = result.get_result()
-        if isinstance(result_without_files, Osc2CrConverterResult):
+        for i, (_, result_without_files) in enumerate(
+            _unpack_variants(scenario_path, result.get_result())
+        ):
+            if not isinstance(result_without_files, Osc2CrConverterResult):
+                continue
             any_error = False
             for res in result_without_files.analysis.values():
                 for r in res[1].values():
@@ -490,7 +530,9 @@ def plot_scenarios(results):
             if result_without_files.xodr_conversion_error is not None:
                 continue
             Serializable.import_extra_files = True
-            result_with_files = result.get_result()
+            result_with_files = _unpack_variants(scenario_path, result.get_result())[i][
+                1
+            ]
             if result_with_files.scenario is not None:
                 rnd = MPRenderer()
                 result_with_files.scenario.draw(rnd)
@@ -15,7 +15,9 @@ from typing import Optional, Dict, List
 
 from tqdm import tqdm
 
-from osc_cr_converter.converter.base import Converter
+from osc_cr_converter.batch.corpus_index import CorpusIndex
+from osc_cr_converter.batch.map_prewarming import MapPrewarmingReport, prewarm_maps
+from osc_cr_converter.converter.base import Converter, EFailureReason
 from osc_cr_converter.converter.serializable import Serializable
 from osc_cr_converter.analyzer.error import AnalyzerErrorResult
 
@@ -75,11 +77,32 @@ class BatchConversionResult(Serializable):
 class BatchConverter:
     """
     A utility class enabling to run a Converter object on a batch of data on multiple processors in parallel
+
+    If a corpus index file is given, the files are classified before the conversion and only the files that might be
+    convertible are dispatched to the workers, e.g. catalogs are not. The failure reasons of the remaining files are
+    stored without running the converter. The classification is reused by later runs.
+
+    If the maps are prewarmed, each distinct map used by the files is converted once across the workers before the
+    scenarios are converted, which then only load the converted maps.
     """
 
-    def __init__(self, converter: Converter):
+    def __init__(
+        self,
+        converter: Converter,
+        corpus_index_file: Optional[str] = None,
+        prewarm_maps: bool = False,
+    ):
+        """
+        :param converter: The converter used on the batch
+        :param corpus_index_file: SQLite database of the corpus index, None dispatches all files to the workers
+        :param prewarm_maps: Whether the distinct maps are converted once before the scenarios
+        """
         self.file_list = []
         self.converter = converter
+        self.corpus_index_file = corpus_index_file
+        self.prewarm_maps = prewarm_maps
+        # report of prewarming the maps in the last run, if prewarmed
+        self.map_prewarming_report: Optional[MapPrewarmingReport] = None
 
     @property
     def file_list(self) -> List[str]:
@@ -143,24 +166,55 @@ class BatchConverter:
         assert os.path.exists(Serializable.storage_dir)
         storage_dir = Serializable.storage_dir
 
-        if num_worker <= 0:
+        if num_worker is not None and num_worker <= 0:
             num_worker = None
+        files = sorted(set(self.file_list))
+        results = {}
+        entries = None
+        if self.corpus_index_file is not None:
+            entries = CorpusIndex(self.corpus_index_file).classify(files, num_worker)
+            convertible_files = []
+            for file in files:
+                failure_reason = entries[os.path.abspath(file)].failure_reason
+                if failure_reason is None or (
+                    failure_reason
+                    is EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION
+                    and self.converter.expands_parameter_distributions
+                ):
+                    convertible_files.append(file)
+                else:
+                    results[file] = BatchConversionResult.from_result_file(
+                        Converter.store_batch_result(file, failure_reason)
+                    )
+            files = convertible_files
+
+        self.map_prewarming_report = None
+        if self.prewarm_maps:
+            self.map_prewarming_report = prewarm_maps(
+                self.converter, files, entries, num_worker
+            )
+            if self.map_prewarming_report is not None:
+                self.map_prewarming_report.print()
+
         with ProcessPoolExecutor(max_workers=num_worker) as pool:
             results_async: Dict[str, Future] = {
                 file: pool.submit(BatchConverter._convert_single, file, self.converter)
-                for file in sorted(set(self.file_list))
+                for file in files
             }
-            results = {}
             for file, result in tqdm(results_async.items()):
                 try:
                     results[file] = result.result(timeout=timeout)
                 except Exception as e:
                     results[file] = BatchConversionResult.from_exception(e)
+        results = {file: results[file] for file in sorted(results.keys())}
 
         os.makedirs(storage_dir, exist_ok=True)
         with open(os.path.join(storage_dir, "statistics.pickle"), "wb") as file:
             Serializable.storage_dir = storage_dir
             pickle.dump(results, file)
+        if self.map_prewarming_report is not None:
+            with open(os.path.join(storage_dir, "map_prewarming.pickle"), "wb") as file:
+                pickle.dump(self.map_prewarming_report, file)
 
     @staticmethod
     def _convert_single(file: str, converter: Converter) -> BatchConversionResult:
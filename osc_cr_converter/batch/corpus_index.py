@@ -0,0 +1,320 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import hashlib
+import json
+import os
+import sqlite3
+import xml.etree.ElementTree as Et
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from os import path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from osc_cr_converter.converter.base import EFailureReason
+from osc_cr_converter.utility.sim_time_budget import SimTimeBudget
+
+# version of the database schema, increased whenever the tables or the classification change
+_SCHEMA_VERSION = 1
+# elements of the storyboard not needed for the classification, cleared once parsed
+_DISCARDED_STORYBOARD_ELEMENTS = {"Init", "Story"}
+
+
+class EScenarioKind(Enum):
+    """
+    The kinds of OpenSCENARIO files
+    """
+
+    SCENARIO = "scenario"
+    CATALOG = "catalog"
+    PARAMETER_VALUE_DISTRIBUTION = "parameter_value_distribution"
+    NO_STORYBOARD = "no_storyboard"
+    INVALID = "invalid"
+
+
+@dataclass(frozen=True)
+class CorpusEntry:
+    """
+    The classification of an OpenSCENARIO file
+
+    Attributes
+        content_hash sha256 hash of the content of the file
+        kind kind of the file
+        logic_file OpenDRIVE file of the RoadNetwork as referenced in the file, i.e. relative to it, if any
+        catalog_locations directory per catalog type, e.g. VehicleCatalog, relative to the file
+        entity_count number of ScenarioObjects
+        stop_time expected simulation time at which the StopTrigger of the storyboard fires, if it depends on it
+    """
+
+    content_hash: str
+    kind: EScenarioKind
+    logic_file: Optional[str]
+    catalog_locations: Dict[str, str]
+    entity_count: int
+    stop_time: Optional[float]
+
+    @property
+    def failure_reason(self) -> Optional[EFailureReason]:
+        """
+        The reason why converting the file fails, None if it might be convertible
+        """
+        return {
+            EScenarioKind.CATALOG: EFailureReason.SCENARIO_FILE_IS_CATALOG,
+            EScenarioKind.PARAMETER_VALUE_DISTRIBUTION: EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION,
+            EScenarioKind.NO_STORYBOARD: EFailureReason.SCENARIO_FILE_CONTAINS_NO_STORYBOARD,
+        }.get(self.kind)
+
+    def logic_file_path(self, source_file: str) -> Optional[str]:
+        """
+        The absolute path of the OpenDRIVE file referenced by the source file, if any
+
+        :param source_file: Path of the classified file
+        """
+        if self.logic_file is None:
+            return None
+        return path.join(path.dirname(path.abspath(source_file)), self.logic_file)
+
+    @staticmethod
+    def scan(source_file: str, content_hash: str) -> "CorpusEntry":
+        """
+        Classify the OpenSCENARIO file in a single streaming pass. Catalogs and ParameterValueDistributions are
+        recognized by their first element, the Init and Stories of the storyboard are discarded while parsing.
+
+        :param source_file: The OpenSCENARIO file
+        :param content_hash: The hash of its content
+        :return: The classification
+        """
+        kind = EScenarioKind.NO_STORYBOARD
+        root = None
+        logic_file = None
+        catalog_locations = {}
+        entity_count = 0
+        # tags of the ancestors of the current element below the root
+        ancestors: List[str] = []
+        try:
+            with open(source_file, "rb") as file:
+                for event, element in Et.iterparse(file, events=("start", "end")):
+                    if event == "start":
+                        if root is None:
+                            root = element
+                            continue
+                        if len(ancestors) == 0 and element.tag == "Catalog":
+                            kind = EScenarioKind.CATALOG
+                            break
+                        if (
+                            len(ancestors) == 0
+                            and element.tag == "ParameterValueDistribution"
+                        ):
+                            kind = EScenarioKind.PARAMETER_VALUE_DISTRIBUTION
+                            break
+                        ancestors.append(element.tag)
+                        continue
+                    if element is root:
+                        break
+                    ancestors.pop()
+                    parents = tuple(ancestors)
+                    if parents == ("RoadNetwork",) and element.tag == "LogicFile":
+                        logic_file = element.attrib.get("filepath")
+                    elif (
+                        len(parents) == 2
+                        and parents[0] == "CatalogLocations"
+                        and element.tag == "Directory"
+                        and "path" in element.attrib
+                    ):
+                        catalog_locations[parents[1]] = element.attrib["path"]
+                    elif parents == ("Entities",) and element.tag == "ScenarioObject":
+                        entity_count += 1
+                        element.clear()
+                    elif (
+                        parents == ("Storyboard",)
+                        and element.tag in _DISCARDED_STORYBOARD_ELEMENTS
+                    ):
+                        element.clear()
+                    elif parents == () and element.tag == "Storyboard":
+                        kind = EScenarioKind.SCENARIO
+                        # the storyboard is the last element of a scenario
+                        break
+        except (Et.ParseError, OSError):
+            kind = EScenarioKind.INVALID
+
+        return CorpusEntry(
+            content_hash=content_hash,
+            kind=kind,
+            logic_file=logic_file,
+            catalog_locations=catalog_locations,
+            entity_count=entity_count,
+            stop_time=SimTimeBudget.from_xosc_root(root).estimated_stop_time
+            if kind == EScenarioKind.SCENARIO
+            else None,
+        )
+
+
+class CorpusIndex:
+    """
+    Index of the classifications of OpenSCENARIO files in an SQLite database, keyed by the hash of the file content, so
+    files are classified only once across runs, even if they are moved or copied. Additionally, the hash of each path
+    is stored with the modification time and size of the file, so unchanged files are not even read again.
+    """
+
+    def __init__(self, index_file: str):
+        """
+        :param index_file: The SQLite database, created if it does not exist
+        """
+        self.index_file = path.abspath(index_file)
+        os.makedirs(path.dirname(self.index_file), exist_ok=True)
+        with self._connect() as connection:
+            if connection.execute("PRAGMA user_version").fetchone()[0] != (
+                _SCHEMA_VERSION
+            ):
+                connection.execute("DROP TABLE IF EXISTS files")
+                connection.execute("DROP TABLE IF EXISTS entries")
+                connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, content_hash TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (content_hash TEXT PRIMARY KEY, kind TEXT, logic_file TEXT, "
+                "catalog_locations TEXT, entity_count INTEGER, stop_time REAL)"
+            )
+
+    def classify(
+        self, files: List[str], num_worker: Optional[int] = None
+    ) -> Dict[str, CorpusEntry]:
+        """
+        Classify the files, hashing and scanning only the files unknown to the index, in parallel
+
+        :param files: The OpenSCENARIO files
+        :param num_worker: Number of processes, if None or leq than 0, it will default to all available processors
+        :return: The classification per file
+        """
+        files = sorted({path.abspath(file) for file in files})
+        stats = {file: os.stat(file) for file in files}
+        with self._connect() as connection:
+            known_files = {
+                file: (mtime_ns, size, content_hash)
+                for file, mtime_ns, size, content_hash in connection.execute(
+                    "SELECT path, mtime_ns, size, content_hash FROM files"
+                )
+            }
+        content_hashes: Dict[str, str] = {}
+        for file in files:
+            known = known_files.get(file)
+            if known is not None and known[:2] == (
+                stats[file].st_mtime_ns,
+                stats[file].st_size,
+            ):
+                content_hashes[file] = known[2]
+        unhashed_files = [file for file in files if file not in content_hashes]
+
+        with self._connect() as connection:
+            entries = {
+                row[0]: _entry_from_row(row)
+                for row in connection.execute("SELECT * FROM entries")
+            }
+
+        if num_worker is not None and num_worker <= 0:
+            num_worker = None
+        content_hashes.update(
+            zip(unhashed_files, _parallel_map(_hash_file, unhashed_files, num_worker))
+        )
+        unscanned_files = {}
+        for file in files:
+            if content_hashes[file] not in entries:
+                unscanned_files.setdefault(content_hashes[file], file)
+        new_entries = _parallel_map(
+            CorpusEntry.scan,
+            list(unscanned_files.values()),
+            num_worker,
+            list(unscanned_files.keys()),
+        )
+        entries.update({entry.content_hash: entry for entry in new_entries})
+
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        file,
+                        stats[file].st_mtime_ns,
+                        stats[file].st_size,
+                        content_hashes[file],
+                    )
+                    for file in unhashed_files
+                ],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                [_entry_to_row(entry) for entry in new_entries],
+            )
+        return {file: entries[content_hashes[file]] for file in files}
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        A connection committing its transaction on success, concurrent runs wait for each other's transactions
+        """
+        connection = sqlite3.connect(self.index_file, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def _hash_file(file: str) -> str:
+    content_hash = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def _parallel_map(
+    function: Callable, tasks: List, num_worker: Optional[int], *further_args: List
+) -> List:
+    if len(tasks) == 0:
+        return []
+    if num_worker == 1:
+        return list(map(function, tasks, *further_args))
+    num_worker = num_worker or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=num_worker) as pool:
+        # few large chunks keep the overhead of many tiny tasks low
+        return list(
+            pool.map(
+                function,
+                tasks,
+                *further_args,
+                chunksize=max(1, len(tasks) // (4 * num_worker)),
+            )
+        )
+
+
+def _entry_to_row(entry: CorpusEntry) -> Tuple:
+    return (
+        entry.content_hash,
+        entry.kind.value,
+        entry.logic_file,
+        json.dumps(entry.catalog_locations),
+        entry.entity_count,
+        entry.stop_time,
+    )
+
+
+def _entry_from_row(row: Tuple) -> CorpusEntry:
+    content_hash, kind, logic_file, catalog_locations, entity_count, stop_time = row
+    return CorpusEntry(
+        content_hash=content_hash,
+        kind=EScenarioKind(kind),
+        logic_file=logic_file,
+        catalog_locations=json.loads(catalog_locations),
+        entity_count=entity_count,
+        stop_time=stop_time,
+    )
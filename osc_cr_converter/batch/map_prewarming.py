@@ -0,0 +1,125 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import os
+import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from osc_cr_converter.batch.corpus_index import CorpusEntry
+from osc_cr_converter.converter.base import Converter
+
+
+@dataclass(frozen=True)
+class MapPrewarmingReport:
+    """
+    Summary of converting the distinct maps of a corpus once before converting its scenarios
+
+    Attributes
+        num_scenarios number of scenarios using one of the maps
+        num_maps number of distinct maps
+        num_cached_maps number of maps, which were already cached before
+        conversion_time CPU time in seconds of converting each map once, also if it was converted by an earlier run
+        saved_time CPU time in seconds saved compared to converting the map for every scenario using it
+        failed_maps maps, which could not be converted ahead
+    """
+
+    num_scenarios: int
+    num_maps: int
+    num_cached_maps: int
+    conversion_time: float
+    saved_time: float
+    failed_maps: List[str]
+
+    def print(self):
+        print(f"{'Scenarios using a prewarmed map':<50s} {self.num_scenarios:5d}")
+        print(f"{'Distinct maps':<50s} {self.num_maps:5d}")
+        print(f"{' | already cached':<50s} {self.num_cached_maps:5d}")
+        print(f"{' | failed':<50s} {len(self.failed_maps):5d}")
+        print(f"{'Map conversion CPU time':<50s} {self.conversion_time:.2f} s")
+        print(f"{'Map conversion CPU time saved':<50s} {self.saved_time:.2f} s")
+
+
+def prewarm_maps(
+    converter: Converter,
+    files: List[str],
+    entries: Optional[Dict[str, CorpusEntry]] = None,
+    num_worker: Optional[int] = None,
+) -> Optional[MapPrewarmingReport]:
+    """
+    Convert each distinct map used by the scenario files exactly once across the worker processes, so the following
+    conversions of the scenarios only load the converted maps.
+
+    :param converter: The converter used on the files, providing the map of each scenario and converting it ahead
+    :param files: The OpenSCENARIO files to be converted
+    :param entries: The classification of each file by its absolute path, the files are scanned if not given
+    :param num_worker: Number of processes, if None it will default to all available processors
+    :return: The report of the prewarming, None if the converter cannot reuse converted maps
+    """
+    abs_files = [os.path.abspath(file) for file in files]
+    with ProcessPoolExecutor(max_workers=num_worker) as pool:
+        if entries is None:
+            unscanned_files = sorted(set(abs_files))
+            entries = dict(
+                zip(
+                    unscanned_files,
+                    pool.map(
+                        CorpusEntry.scan,
+                        unscanned_files,
+                        [""] * len(unscanned_files),
+                        chunksize=max(1, len(unscanned_files) // 64),
+                    ),
+                )
+            )
+
+        # ParameterValueDistributions are skipped, since their variants share a single conversion of the map anyway
+        num_scenarios_per_map = Counter(
+            converter.map_file(entries[file].logic_file_path(file))
+            for file in abs_files
+            if entries[file].failure_reason is None
+        )
+        num_scenarios_per_map.pop(None, None)
+        maps = sorted(num_scenarios_per_map.keys())
+        conversions = {
+            map_file: pool.submit(converter.prewarm_map, map_file) for map_file in maps
+        }
+        prewarmed_maps: Dict[str, Tuple[float, bool]] = {}
+        failed_maps = []
+        for map_file, conversion in conversions.items():
+            try:
+                prewarmed_map = conversion.result()
+            except Exception as e:
+                warnings.warn(
+                    f"<MapPrewarming/prewarm_maps> Converting {map_file} failed with {str(e)}"
+                )
+                failed_maps.append(map_file)
+                continue
+            if prewarmed_map is None:
+                warnings.warn(
+                    "<MapPrewarming/prewarm_maps> The converter cannot reuse converted maps, e.g. since its map "
+                    "cache is disabled"
+                )
+                return None
+            prewarmed_maps[map_file] = prewarmed_map
+
+    return MapPrewarmingReport(
+        num_scenarios=sum(num_scenarios_per_map.values()),
+        num_maps=len(maps),
+        num_cached_maps=sum(cached for _, cached in prewarmed_maps.values()),
+        conversion_time=sum(
+            conversion_time for conversion_time, _ in prewarmed_maps.values()
+        ),
+        # each scenario would have converted its map, except the first one if the map was not cached before
+        saved_time=sum(
+            (num_scenarios_per_map[map_file] - (0 if cached else 1)) * conversion_time
+            for map_file, (conversion_time, cached) in prewarmed_maps.items()
+        ),
+        failed_maps=failed_maps,
+    )
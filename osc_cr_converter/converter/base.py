@@ -9,14 +9,14 @@ __status__ = "beta"
 import pickle
 from abc import ABC, abstractmethod
 from enum import Enum, auto
-from multiprocessing import Lock
 from os import path
-from typing import Union, ClassVar
+from typing import List, Optional, Tuple, Union
 
 from commonroad.scenario.scenario import Scenario
 
 from osc_cr_converter.converter.serializable import Serializable
 from osc_cr_converter.converter.result import Osc2CrConverterResult
+from osc_cr_converter.utility.general import reserve_unique_file
 
 
 class EFailureReason(Enum):
@@ -39,26 +39,65 @@ class Converter(ABC):
     It only needs to implement the run_conversion function
     """
 
-    __lock: ClassVar[Lock] = Lock()
     conversion_result: Union[Osc2CrConverterResult, EFailureReason] = None
 
+    @property
+    def expands_parameter_distributions(self) -> bool:
+        """
+        Whether the converter converts the variants of ParameterValueDistributions instead of failing
+        """
+        return False
+
+    def map_file(self, implicit_map_file: Optional[str]) -> Optional[str]:
+        """
+        The map converted for a scenario referencing the implicit map file, None if no map is converted
+
+        :param implicit_map_file: The map file referenced by the scenario, if any
+        """
+        return None
+
+    def prewarm_map(self, map_file: str) -> Optional[Tuple[float, bool]]:
+        """
+        Convert the map ahead of the conversions of the scenarios using it, so they only load the converted map
+
+        :param map_file: The map file, as returned by map_file
+        :return: The CPU time in seconds converting the map takes and whether it was already converted before, None
+            if the converter cannot reuse converted maps
+        """
+        return None
+
     def run_in_batch_conversion(self, source_file: str) -> str:
-        with self.__lock:
-            file_path_base = path.join(
+        self.run_conversion(source_file)
+        return self.store_batch_result(source_file, self.conversion_result)
+
+    @staticmethod
+    def store_batch_result(
+        source_file: str, conversion_result: Union[Osc2CrConverterResult, Enum]
+    ) -> str:
+        """
+        Store the result of converting the source file in the storage dir of the batch conversion
+
+        :param source_file: The converted file
+        :param conversion_result: The result of the conversion
+        :return: The file the result is stored in
+        """
+        result_file = reserve_unique_file(
+            path.join(
                 Serializable.storage_dir,
                 "Res_" + path.splitext(path.basename(source_file))[0],
-            )
-            i = 1
-            while path.exists(result_file := file_path_base + f"{i}.pickle"):
-                i += 1
-        self.run_conversion(source_file)
+            ),
+            ".pickle",
+        )
         with open(result_file, "wb") as file:
-            pickle.dump(self.conversion_result, file)
+            pickle.dump(conversion_result, file)
         return result_file
 
     @abstractmethod
-    def run_conversion(self, source_file: str) -> Union[Scenario, Enum]:
+    def run_conversion(
+        self, source_file: str
+    ) -> Union[Scenario, List[Union[Scenario, Enum]], Enum]:
         """
         The main entry point of a converter. Implement this.
+        A converter may return a result per variant, if the source file describes several scenarios.
         """
         raise NotImplementedError
@@ -12,17 +12,18 @@ import re
 import time
 import warnings
 import logging
-import xml.etree.ElementTree as ElementTree
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from os import path
-from typing import Optional, List, Dict, Tuple, Union, Set
+from typing import Callable, Optional, List, Dict, Tuple, Union, Set
 
 from commonroad.geometry.shape import Rectangle, Circle
 from commonroad.prediction.prediction import TrajectoryPrediction
 from commonroad.scenario.obstacle import DynamicObstacle, ObstacleType
 from commonroad.scenario.scenario import Scenario, Tag
 from commonroad.planning.planning_problem import PlanningProblemSet
-from commonroad.scenario.state import InitialState
+from commonroad.scenario.state import InitialState, State
 from commonroad.scenario.trajectory import Trajectory
 from commonroad.common.file_writer import CommonRoadFileWriter
 from commonroad.common.file_writer import OverwriteExistingFile
@@ -39,26 +40,57 @@ from osc_cr_converter.wrapper.esmini.esmini_wrapper_provider import (
     EsminiWrapperProvider,
 )
 from osc_cr_converter.wrapper.base.scenario_object import (
-    ScenarioObjectState,
     SimScenarioObjectState,
+    SimScenarioObjectTrajectory,
 )
 from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
-from osc_cr_converter.converter.result import Osc2CrConverterResult
+from osc_cr_converter.converter.result import (
+    Osc2CrConverterResult,
+    Osc2CrDistributionResult,
+)
+from osc_cr_converter.converter.streaming_states import StreamingStateBuilder
 from osc_cr_converter.utility.statistics import ConversionStatistics
 from osc_cr_converter.utility.obstacle_info import ObstacleExtraInfoFinder
+from osc_cr_converter.utility.catalog_index import CatalogIndex
+from osc_cr_converter.utility.map_cache import (
+    MapCache,
+    MapMemoryCache,
+    map_key,
+    share_scenario,
+)
 from osc_cr_converter.utility.pps_builder import PPSBuilder
-from osc_cr_converter.utility.general import trim_scenario, dataclass_is_complete
+from osc_cr_converter.utility.parsed_scenario import ParsedScenario
+from osc_cr_converter.utility.stage_graph import StageGraph
+from osc_cr_converter.utility.parameter_distribution import (
+    expand_parameter_value_distribution,
+)
+from osc_cr_converter.utility.general import (
+    trim_scenario,
+    dataclass_is_complete,
+)
+from osc_cr_converter.utility.lanelet_assignment import assign_obstacles_to_lanelets
+from osc_cr_converter.utility.scenario_view import scenario_view, share_obstacle
 from osc_cr_converter.utility.configuration import ConverterParams
 import osc_cr_converter.utility.logger as util_logger
 
 # Configure the logging module
 logger = logging.getLogger(__name__)
 
+# maximum number of simulated frames waiting for the StreamingStateBuilder
+_MAX_QUEUED_FRAMES = 16
+# interval in seconds, in which a simulation waiting for the StreamingStateBuilder checks whether it failed
+_QUEUE_POLL_INTERVAL = 0.1
+
 
 @dataclass
 class Osc2CrConverter(Converter):
     """
     The main class of the OpenSCENARIO to CommonRoad conversion
+
+    A converter converts one scenario at a time: run_conversion stores its result in conversion_result, the name of
+    the scenario in the config and sets the max_time and record_dt of the SimWrapper. Threads converting concurrently
+    therefore each need their own converter with their own ConverterParams and SimWrapper. To simulate on the same
+    esmini engines, their converters use EsminiEnginePools sharing the engines (see EsminiEnginePool.share).
     """
 
     def __init__(self, config: ConverterParams):
@@ -75,10 +107,9 @@ class Osc2CrConverter(Converter):
 
         self.config: ConverterParams = config  # Configurations
 
-        # The used SimWrapper implementation
-        self.sim_wrapper: SimWrapper = EsminiWrapperProvider(
-            config
-        ).provide_esmini_wrapper()
+        # The used SimWrapper implementation, provided on first use
+        self._sim_wrapper: Optional[SimWrapper] = None
+        self._sim_wrapper_provided: bool = False
         # The used PPSBuilder instance
         self.pps_builder: PPSBuilder = config.initialize_planning_problem_set()
 
@@ -105,6 +136,41 @@ class Osc2CrConverter(Converter):
             re.Pattern, str
         ] = config.esmini.ego_filter  # Pattern of recognizing the ego vehicle
 
+    @property
+    def sim_wrapper(self) -> Optional[SimWrapper]:
+        """
+        The used SimWrapper implementation.
+
+        Unless set explicitly, it is provided by the EsminiWrapperProvider on first use, so converters which never
+        simulate do not load esmini. A provided wrapper is not pickled, each process provides its own one instead.
+        """
+        if self._sim_wrapper is None and not self._sim_wrapper_provided:
+            if self.config.esmini.use_engine_pool:
+                self._sim_wrapper = EsminiWrapperProvider(
+                    self.config
+                ).provide_esmini_engine_pool()
+            else:
+                self._sim_wrapper = EsminiWrapperProvider(
+                    self.config
+                ).provide_esmini_wrapper()
+            self._sim_wrapper_provided = True
+        return self._sim_wrapper
+
+    @sim_wrapper.setter
+    def sim_wrapper(self, new_sim_wrapper: Optional[SimWrapper]):
+        self._sim_wrapper = new_sim_wrapper
+        self._sim_wrapper_provided = False
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        if state["_sim_wrapper_provided"]:
+            state["_sim_wrapper"] = None
+            state["_sim_wrapper_provided"] = False
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+
     def get_analyzer_objects(self) -> Dict[EAnalyzer, Analyzer]:
         if self.analyzers is None:
             return {}
@@ -121,11 +187,14 @@ class Osc2CrConverter(Converter):
                     ret[e_analyzer] = e_analyzer.analyzer_type()
             return ret
 
-    def run_conversion(self, source_file: str) -> Union[Scenario, EFailureReason]:
+    def run_conversion(
+        self, source_file: str
+    ) -> Union[Scenario, List[Union[Scenario, EFailureReason]], EFailureReason]:
         """
         The main function, that runs the simulation wrapper (SimWrapper) and converts its results.
         :param source_file: the given openSCENARIO source file
-        :return converted results if converted successfully. Otherwise, the reason for the failure.
+        :return converted results if converted successfully, a result per variant for a ParameterValueDistribution.
+            Otherwise, the reason for the failure.
         """
         self.config.general.name_xosc = os.path.basename(source_file).split(".")[0]
         util_logger.print_and_log_info(
@@ -137,7 +206,18 @@ class Osc2CrConverter(Converter):
 
         xosc_file = path.abspath(source_file)
 
-        implicit_opendrive_path = self._pre_parse_scenario(xosc_file)
+        if not path.exists(xosc_file):
+            parsed_scenario = EFailureReason.SCENARIO_FILE_INVALID_PATH
+        else:
+            parsed_scenario = ParsedScenario.parse(xosc_file)
+        if (
+            self.expands_parameter_distributions
+            and isinstance(parsed_scenario, ParsedScenario)
+            and parsed_scenario.is_parameter_value_distribution
+            and parsed_scenario.referenced_scenario_file is not None
+        ):
+            return self._run_distribution_conversion(parsed_scenario)
+        implicit_opendrive_path = self._pre_parse_scenario(parsed_scenario)
 
         if isinstance(implicit_opendrive_path, EFailureReason):
             self.conversion_result = implicit_opendrive_path
@@ -146,22 +226,6 @@ class Osc2CrConverter(Converter):
             )
             return self.conversion_result
 
-        start_time = time.time()
-        scenario, xodr_file, xodr_conversion_error = self._create_basic_scenario(
-            implicit_opendrive_path
-        )
-        runtime = time.time() - start_time
-        util_logger.print_and_log_info(
-            logger, f"*\t Map conversion takes {runtime:.2f} s"
-        )
-
-        if isinstance(scenario, EFailureReason):
-            self.conversion_result = scenario
-            util_logger.print_and_log_error(
-                logger, f"*\t Failed since : {self.conversion_result.name}"
-            )
-            return self.conversion_result
-
         if self.view_scenario:
             self.sim_wrapper.view_scenario(source_file, self.config.esmini.window_size)
         if self.render_to_gif:
@@ -172,22 +236,307 @@ class Osc2CrConverter(Converter):
                 + ".gif",
             )
 
-        dt_sim = self.dt_sim if self.dt_sim is not None else self.dt_cr / 10
-        res: WrapperSimResult = self.sim_wrapper.simulate_scenario(xosc_file, dt_sim)
-        if res.ending_cause is ESimEndingCause.FAILURE:
-            self.conversion_result = EFailureReason.SIMULATION_FAILED_CREATING_OUTPUT
-            util_logger.print_and_log_error(
-                logger, f"*\t Failed since : {self.conversion_result.name}"
+        if self.config.esmini.max_time_from_triggers:
+            self.sim_wrapper.max_time = parsed_scenario.sim_time_budget.max_time(
+                self.config.esmini.max_time, self.config.esmini.max_time_margin
             )
+            util_logger.print_and_log_info(
+                logger,
+                f"*\t Maximum simulation time: {self.sim_wrapper.max_time:.2f} s",
+            )
+
+        def convert_map() -> (
+            Tuple[
+                Scenario, Optional[str], Optional[AnalyzerErrorResult], Optional[bool]
+            ]
+        ):
+            start_time = time.time()
+            basic_scenario = self._create_basic_scenario(implicit_opendrive_path)
+            util_logger.print_and_log_info(
+                logger, f"*\t Map conversion takes {time.time() - start_time:.2f} s"
+            )
+            return basic_scenario
+
+        self.conversion_result = self._convert_variant(
+            sim_wrapper=self.sim_wrapper,
+            parsed_scenario=parsed_scenario,
+            create_scenario=convert_map,
+            runtime=0.0,
+            name_xosc=self.config.general.name_xosc,
+        )
+        if isinstance(self.conversion_result, EFailureReason):
             return self.conversion_result
-        if len(res.states) == 0:
-            self.conversion_result = EFailureReason.NO_DYNAMIC_BEHAVIOR_FOUND
+        return self.conversion_result.scenario
+
+    @property
+    def expands_parameter_distributions(self) -> bool:
+        return self.config.scenario.expand_parameter_distributions
+
+    def _run_distribution_conversion(
+        self, parsed_distribution: ParsedScenario
+    ) -> Union[List[Union[Scenario, EFailureReason]], EFailureReason]:
+        """
+        Converting every variant of the scenario referenced by a ParameterValueDistribution. The scenario is parsed,
+        its map converted and its catalog entries looked up only once, every variant is only simulated with its
+        parameter values and converted, several variants concurrently.
+        :param parsed_distribution: the parsed ParameterValueDistribution file
+        :return: converted scenario or failure per variant, or the failure of the whole distribution
+        """
+
+        def fail(reason: EFailureReason) -> EFailureReason:
+            self.conversion_result = reason
             util_logger.print_and_log_error(
                 logger, f"*\t Failed since : {self.conversion_result.name}"
             )
             return self.conversion_result
+
+        try:
+            parameter_sets = expand_parameter_value_distribution(
+                parsed_distribution.root, self.config.esmini.random_seed
+            )
+        except ValueError as e:
+            warnings.warn(
+                f"<Osc2CrConverter/_run_distribution_conversion> "
+                f"{path.basename(parsed_distribution.source_file)} failed with {str(e)}"
+            )
+            return fail(EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION)
+        util_logger.print_and_log_info(
+            logger, f"*\t Expanded into {len(parameter_sets)} variants"
+        )
+
+        scenario_file = parsed_distribution.referenced_scenario_file
+        if not path.exists(scenario_file):
+            return fail(EFailureReason.SCENARIO_FILE_INVALID_PATH)
+        parsed_scenario = ParsedScenario.parse(scenario_file)
+        implicit_opendrive_path = self._pre_parse_scenario(parsed_scenario)
+        if isinstance(implicit_opendrive_path, EFailureReason):
+            return fail(implicit_opendrive_path)
+        unresolved_parameters = parsed_scenario.unresolved_parameters(
+            {name for parameter_values in parameter_sets for name in parameter_values}
+        )
+        if len(unresolved_parameters) > 0:
+            warnings.warn(
+                f"<Osc2CrConverter/_run_distribution_conversion> {path.basename(parsed_distribution.source_file)}: "
+                f"the map and the catalog entries are shared by all variants and ignore the values of the "
+                f"parameters {', '.join(sorted(unresolved_parameters))}"
+            )
+
+        # the map is converted and the catalog entries are looked up once for all variants
+        stages = StageGraph()
+        stages.add(
+            "basic_scenario",
+            lambda: self._create_basic_scenario(implicit_opendrive_path),
+        )
+        stages.add(
+            "obstacles_extra_info",
+            lambda: ObstacleExtraInfoFinder(
+                scenario_file,
+                set(parsed_scenario.scenario_objects.keys()),
+                parsed_scenario,
+                self._catalog_index(),
+            ).run(),
+        )
+        shared_results = stages.run(self.config.scenario.concurrent_stages)
+        runtime = sum(stages.runtimes.values()) / max(1, len(parameter_sets))
+        util_logger.print_and_log_info(
+            logger,
+            f"*\t Map conversion takes {stages.runtimes['basic_scenario']:.2f} s",
+        )
+        (
+            scenario,
+            xodr_file,
+            xodr_conversion_error,
+            map_cache_hit,
+        ) = shared_results["basic_scenario"]
+        obstacles_extra_info = shared_results["obstacles_extra_info"]
+
+        num_workers = self.config.scenario.num_variant_workers
+        if num_workers <= 0:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, len(parameter_sets)))
+        engine_pool = None
+        if (
+            num_workers > 1
+            and not self.config.esmini.use_engine_pool
+            and (self._sim_wrapper is None or self._sim_wrapper_provided)
+        ):
+            engine_pool = EsminiWrapperProvider(self.config).provide_esmini_engine_pool(
+                num_workers
+            )
+        sim_wrapper = engine_pool if engine_pool is not None else self.sim_wrapper
+
+        if self.config.esmini.max_time_from_triggers and len(parameter_sets) > 0:
+            # shared by the concurrently simulated variants, the StopTrigger still ends each variant individually
+            sim_wrapper.max_time = max(
+                parsed_scenario.variant_sim_time_budget(parameter_values).max_time(
+                    self.config.esmini.max_time, self.config.esmini.max_time_margin
+                )
+                for parameter_values in parameter_sets
+            )
+
+        def convert_variant(
+            index: int, parameter_values: Dict[str, str]
+        ) -> Union[Osc2CrConverterResult, EFailureReason]:
+            return self._convert_variant(
+                sim_wrapper=sim_wrapper,
+                parsed_scenario=parsed_scenario,
+                create_scenario=lambda: (
+                    share_scenario(scenario),
+                    xodr_file,
+                    xodr_conversion_error,
+                    # the other variants reuse the map of the first one in memory
+                    map_cache_hit if index == 0 or map_cache_hit is None else True,
+                ),
+                runtime=runtime,
+                name_xosc=f"{self.config.general.name_xosc}-{index + 1}",
+                parameter_values=parameter_values,
+                obstacles_extra_info=obstacles_extra_info,
+            )
+
+        try:
+            with ThreadPoolExecutor(num_workers) as executor:
+                variants = list(
+                    executor.map(
+                        convert_variant, range(len(parameter_sets)), parameter_sets
+                    )
+                )
+        finally:
+            if engine_pool is not None:
+                engine_pool.close()
+
+        self.conversion_result = Osc2CrDistributionResult(
+            xosc_file=parsed_distribution.source_file,
+            scenario_file=scenario_file,
+            parameter_sets=parameter_sets,
+            variants=variants,
+        )
+        return [
+            variant.scenario if isinstance(variant, Osc2CrConverterResult) else variant
+            for variant in variants
+        ]
+
+    def _convert_variant(
+        self,
+        sim_wrapper: SimWrapper,
+        parsed_scenario: ParsedScenario,
+        create_scenario: Callable[
+            [],
+            Tuple[
+                Scenario, Optional[str], Optional[AnalyzerErrorResult], Optional[bool]
+            ],
+        ],
+        runtime: float,
+        name_xosc: str,
+        parameter_values: Optional[Dict[str, str]] = None,
+        obstacles_extra_info: Optional[
+            Union[AnalyzerErrorResult, Dict[str, Optional[Vehicle]]]
+        ] = None,
+    ) -> Union[Osc2CrConverterResult, EFailureReason]:
+        """
+        Simulating the scenario and converting its results into the scenario containing the converted map.
+
+        The creation of the scenario, the search for the extra information of the entities and the simulation are
+        independent stages, run concurrently if configured, and joined before the obstacles are built. Only the
+        streaming simulation waits for the extra information, which it needs while building the states.
+        :param sim_wrapper: the SimWrapper to simulate with
+        :param parsed_scenario: the parsed scenario file
+        :param create_scenario: creates the scenario containing the converted map, see _create_basic_scenario
+        :param runtime: runtime spent on the scenario so far
+        :param name_xosc: name of the converted scenario
+        :param parameter_values: values overriding the declared global parameters, e.g. of a variant
+        :param obstacles_extra_info: extra information of all entities if already searched for
+        :return: the conversion result or the reason for the failure
+        """
+        xosc_file = parsed_scenario.source_file
+        dt_sim = self.dt_sim if self.dt_sim is not None else self.dt_cr / 10
+        stream_simulation = self.config.esmini.stream_simulation
+        if self.config.esmini.record_aligned_only:
+            # the recorded states have to be aligned to the time steps of this converter, not of the config the
+            # SimWrapper was built with
+            sim_wrapper.record_dt = self.dt_cr
+
+        def find_obstacles_extra_info() -> (
+            Union[AnalyzerErrorResult, Dict[str, Optional[Vehicle]]]
+        ):
+            if obstacles_extra_info is not None:
+                return obstacles_extra_info
+            # searched for all entities, since the simulated ones are not known before the simulation
+            return ObstacleExtraInfoFinder(
+                xosc_file,
+                set(parsed_scenario.scenario_objects.keys()),
+                parsed_scenario,
+                self._catalog_index(),
+            ).run()
+
+        def simulate(
+            **dependencies,
+        ) -> Tuple[
+            WrapperSimResult,
+            Optional[Dict[str, Tuple[List[State], SimScenarioObjectState]]],
+        ]:
+            if stream_simulation:
+                extra_info = dependencies["obstacles_extra_info"]
+                return self._simulate_streaming(
+                    sim_wrapper,
+                    xosc_file,
+                    dt_sim,
+                    {} if isinstance(extra_info, AnalyzerErrorResult) else extra_info,
+                    parameter_values,
+                )
+            elif parameter_values is None:
+                return sim_wrapper.simulate_scenario(xosc_file, dt_sim), None
+            return (
+                sim_wrapper.simulate_scenario(xosc_file, dt_sim, parameter_values),
+                None,
+            )
+
+        stages = StageGraph()
+        stages.add("basic_scenario", create_scenario)
+        stages.add("obstacles_extra_info", find_obstacles_extra_info)
+        stages.add(
+            "simulation",
+            simulate,
+            depends_on=("obstacles_extra_info",) if stream_simulation else (),
+        )
+        start_time = time.time()
+        results = stages.run(self.config.scenario.concurrent_stages)
+        # the runtime of each stage, even if they overlapped
+        runtime += sum(stages.runtimes.values())
+        util_logger.print_and_log_info(
+            logger,
+            f"*\t Map conversion, extra information and simulation take {time.time() - start_time:.2f} s "
+            f"({sum(stages.runtimes.values()):.2f} s in total)",
+        )
+
+        (
+            scenario,
+            xodr_file,
+            xodr_conversion_error,
+            map_cache_hit,
+        ) = results["basic_scenario"]
+        obstacles_extra_info = results["obstacles_extra_info"]
+        obstacles_extra_info_finder_error = None
+        if isinstance(obstacles_extra_info, AnalyzerErrorResult):
+            obstacles_extra_info_finder_error = obstacles_extra_info
+            obstacles_extra_info = {}
+        res, streamed_states = results["simulation"]
+        if streamed_states is not None:
+            object_names = list(streamed_states.keys())
+        else:
+            object_names = list(res.states.keys())
+        if res.ending_cause is ESimEndingCause.FAILURE:
+            util_logger.print_and_log_error(
+                logger,
+                f"*\t Failed since : {EFailureReason.SIMULATION_FAILED_CREATING_OUTPUT.name}",
+            )
+            return EFailureReason.SIMULATION_FAILED_CREATING_OUTPUT
+        if len(object_names) == 0:
+            util_logger.print_and_log_error(
+                logger,
+                f"*\t Failed since : {EFailureReason.NO_DYNAMIC_BEHAVIOR_FOUND.name}",
+            )
+            return EFailureReason.NO_DYNAMIC_BEHAVIOR_FOUND
         sim_time = res.sim_time
-        runtime += res.runtime
         ending_cause = res.ending_cause
         util_logger.print_and_log_info(
             logger, f"*\t Esmini simulation takes {res.runtime:.2f} s"
@@ -196,21 +545,21 @@ class Osc2CrConverter(Converter):
         start_time = time.time()
 
         ego_vehicle, ego_vehicle_found_with_filter = self._find_ego_vehicle(
-            list(res.states.keys())
+            object_names
         )
         keep_ego_vehicle = self.keep_ego_vehicle
 
-        obstacles_extra_info = ObstacleExtraInfoFinder(
-            xosc_file, set(res.states.keys())
-        ).run()
-        obstacles_extra_info_finder_error = None
-        if isinstance(obstacles_extra_info, AnalyzerErrorResult):
-            obstacles_extra_info_finder_error = obstacles_extra_info
-            obstacles_extra_info = {o_name: None for o_name in res.states.keys()}
-
-        obstacles = self._create_obstacles_from_state_lists(
-            scenario, ego_vehicle, res.states, res.sim_time, obstacles_extra_info
-        )
+        obstacles_extra_info = {
+            o_name: obstacles_extra_info.get(o_name) for o_name in object_names
+        }
+        if streamed_states is not None:
+            obstacles = self._create_obstacles_from_cr_states(
+                scenario, ego_vehicle, streamed_states
+            )
+        else:
+            obstacles = self._create_obstacles_from_state_lists(
+                scenario, ego_vehicle, res.states, res.sim_time, obstacles_extra_info
+            )
 
         scenario.add_objects(
             [
@@ -220,24 +569,24 @@ class Osc2CrConverter(Converter):
                 and (self.keep_ego_vehicle or ego_vehicle != obstacle_name)
             ]
         )
-        if len(scenario.lanelet_network.lanelets) > 0:
-            scenario.assign_obstacles_to_lanelets()
-
         if self.trim_scenario:
+            # removes the lanelets far from every obstacle before assigning the obstacles to the remaining ones
             scenario = trim_scenario(scenario, deep_copy=False)
+        elif len(scenario.lanelet_network.lanelets) > 0:
+            assign_obstacles_to_lanelets(scenario)
         pps = self.pps_builder.build(obstacles[ego_vehicle])
         runtime += time.time() - start_time
         util_logger.print_and_log_info(
             logger, f"*\t Other conversion tasks take {time.time() - start_time:.2f} s"
         )
         util_logger.print_and_log_info(
-            logger, f"* {self.config.general.name_xosc} is successfully converted 🏆!"
+            logger, f"* {name_xosc} is successfully converted 🏆!"
         )
 
         if self.config.debug.write_to_xml:
-            self.write_to_xml(scenario, pps)
+            self.write_to_xml(scenario, pps, name_xosc)
 
-        self.conversion_result = Osc2CrConverterResult(
+        return Osc2CrConverterResult(
             statistics=self.build_statistics(
                 obstacles=obstacles,
                 ego_vehicle=ego_vehicle,
@@ -246,6 +595,10 @@ class Osc2CrConverter(Converter):
                 ending_cause=ending_cause,
                 sim_time=sim_time,
                 runtime=runtime,
+                sim_time_saved=max(0.0, sim_wrapper.max_time - sim_time)
+                if ending_cause.is_early_termination
+                else 0.0,
+                map_cache_hit=map_cache_hit,
             ),
             analysis=self.run_analysis(
                 scenario=scenario,
@@ -260,49 +613,93 @@ class Osc2CrConverter(Converter):
             obstacles_extra_info_finder_error=obstacles_extra_info_finder_error,
             scenario=scenario,
             planning_problem_set=pps,
+            parameter_values=parameter_values,
         )
-        return self.conversion_result.scenario
+
+    def _catalog_index(self) -> CatalogIndex:
+        """
+        The catalog index shared by the process, persisted according to the configuration
+        """
+        if not self.config.scenario.persist_catalog_index:
+            return CatalogIndex.shared()
+        index_file = self.config.scenario.catalog_index_file
+        if index_file is None:
+            index_file = path.join(
+                self.config.general.path_output_abs, "catalog_index.json"
+            )
+        return CatalogIndex.shared(index_file)
+
+    def _convert_map(self, odr_file: str) -> Tuple[Scenario, Optional[bool]]:
+        """
+        Converting the openDRIVE map, reusing the map converted before by this process or loading it from the map
+        cache if possible
+        :param odr_file: the source file of openDRIVE map
+        :return: the scenario containing the converted map, whether it was found in the in-process map cache if
+            looked up
+        """
+        memory_cache = None
+        key = None
+        if self.config.scenario.map_memory_cache_size > 0:
+            memory_cache = MapMemoryCache.shared(
+                self.config.scenario.map_memory_cache_size
+            )
+            key = map_key(odr_file)
+            scenario = memory_cache.get(key)
+            if scenario is not None:
+                util_logger.print_and_log_info(
+                    logger, f"*\t Map {path.basename(odr_file)} reused from memory"
+                )
+                return scenario, True
+
+        if self.config.scenario.use_map_cache:
+            scenario, cached = self._map_cache().load_or_convert(
+                odr_file, opendrive_to_commonroad, key
+            )
+            if cached:
+                util_logger.print_and_log_info(
+                    logger,
+                    f"*\t Map {path.basename(odr_file)} loaded from the map cache",
+                )
+        else:
+            scenario = opendrive_to_commonroad(odr_file)
+
+        if memory_cache is None:
+            return scenario, None
+        # the cached map is never modified, the scenario only gets a copy of it
+        memory_cache.put(key, scenario)
+        return share_scenario(scenario), False
 
     @staticmethod
-    def _pre_parse_scenario(source_file: str) -> Union[EFailureReason, None, str]:
+    def _pre_parse_scenario(
+        parsed_scenario: Union[EFailureReason, ParsedScenario]
+    ) -> Union[EFailureReason, None, str]:
         """
         Pre-parsing the scenario.
-        :param source_file: the given source file
-        :return: None or failure of the parsing.
-        """
-        if not path.exists(source_file):
-            return EFailureReason.SCENARIO_FILE_INVALID_PATH
-        root = ElementTree.parse(source_file).getroot()
-        if root.find("Storyboard") is None:
-            if root.find("Catalog") is not None:
+        :param parsed_scenario: the parsed source file or the failure of parsing it
+        :return: path of the implicit openDRIVE map, None or failure of the parsing.
+        """
+        if isinstance(parsed_scenario, EFailureReason):
+            return parsed_scenario
+        if not parsed_scenario.has_storyboard:
+            if parsed_scenario.is_catalog:
                 return EFailureReason.SCENARIO_FILE_IS_CATALOG
-            elif (pvd := root.find("ParameterValueDistribution")) is not None:
-                if (
-                    alternative_file := pvd.find("ScenarioFile[@filepath]")
-                ) is not None:
+            elif parsed_scenario.is_parameter_value_distribution:
+                if parsed_scenario.referenced_scenario_file is not None:
                     warnings.warn(
-                        f"<Osc2CrConverter/_pre_parse_scenario> {path.basename(source_file)} contains no source file, "
-                        f'but references another OpenSCENARIO file: "'
-                        f'{path.join(path.dirname(source_file), alternative_file.attrib["filepath"])}"'
+                        f"<Osc2CrConverter/_pre_parse_scenario> {path.basename(parsed_scenario.source_file)} contains "
+                        f'no source file, but references another OpenSCENARIO file: "'
+                        f'{parsed_scenario.referenced_scenario_file}"'
                     )
                 return EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION
             return EFailureReason.SCENARIO_FILE_CONTAINS_NO_STORYBOARD
 
-        if (
-            implicit_odr_file := root.find("RoadNetwork/LogicFile[@filepath]")
-        ) is not None:
-            return path.join(
-                path.dirname(source_file), implicit_odr_file.attrib["filepath"]
-            )
-        return None
+        return parsed_scenario.logic_file
 
-    def _create_basic_scenario(
-        self, implicit_odr_file: Optional[str]
-    ) -> Tuple[Scenario, Optional[str], Optional[AnalyzerErrorResult]]:
+    def map_file(self, implicit_map_file: Optional[str]) -> Optional[str]:
         """
-        Creating the scenario with basic information and road networks (map)
-        :param implicit_odr_file: the source file of openDRIVE map
-        :return: the scenario with/without map, path of the openDRIVE, the reason of the failure if applicable
+        Selecting the openDRIVE map of the scenario: the configured override or the map referenced by the scenario
+        :param implicit_map_file: the source file of openDRIVE map referenced by the scenario
+        :return: path of the openDRIVE map, None if no existing map is used
         """
         odr_file: Optional[str] = None
         if self.odr_file_override is not None:
@@ -310,20 +707,56 @@ class Osc2CrConverter(Converter):
                 odr_file = self.odr_file_override
             else:
                 warnings.warn(
-                    f"<OpenSCENARIO2CRConverter/_create_scenario> File {self.odr_file_override} does not exist"
+                    f"<OpenSCENARIO2CRConverter/map_file> File {self.odr_file_override} does not exist"
                 )
-        elif implicit_odr_file is not None and self.use_implicit_odr_file:
-            if path.exists(implicit_odr_file):
-                odr_file = implicit_odr_file
+        elif implicit_map_file is not None and self.use_implicit_odr_file:
+            if path.exists(implicit_map_file):
+                odr_file = implicit_map_file
             else:
                 warnings.warn(
-                    f"<OpenSCENARIO2CRConverter/_create_scenario> File {implicit_odr_file} does not exist"
+                    f"<OpenSCENARIO2CRConverter/map_file> File {implicit_map_file} does not exist"
                 )
+        return odr_file
+
+    def prewarm_map(self, map_file: str) -> Optional[Tuple[float, bool]]:
+        """
+        Converting the openDRIVE map into the map cache ahead of the conversions of the scenarios using it
+        :param map_file: the openDRIVE map, as returned by map_file
+        :return: CPU time of converting the map and whether it was cached before, None if the map cache is disabled
+        """
+        if not self.config.scenario.use_map_cache:
+            return None
+        return self._map_cache().prewarm(map_file, opendrive_to_commonroad)
+
+    def _map_cache(self) -> MapCache:
+        """
+        The on-disk map cache according to the configuration
+        """
+        cache_dir = self.config.scenario.map_cache_dir
+        if cache_dir is None:
+            cache_dir = path.join(self.config.general.path_output_abs, "map_cache")
+        return MapCache(
+            cache_dir,
+            self.config.scenario.map_cache_max_size,
+            self.config.scenario.map_cache_key_file,
+        )
+
+    def _create_basic_scenario(
+        self, implicit_odr_file: Optional[str]
+    ) -> Tuple[Scenario, Optional[str], Optional[AnalyzerErrorResult], Optional[bool]]:
+        """
+        Creating the scenario with basic information and road networks (map)
+        :param implicit_odr_file: the source file of openDRIVE map
+        :return: the scenario with/without map, path of the openDRIVE, the reason of the failure if applicable,
+            whether the map was found in the in-process map cache if looked up
+        """
+        odr_file = self.map_file(implicit_odr_file)
 
         odr_conversion_error = None
+        map_cache_hit = None
         if odr_file is not None:
             try:
-                scenario = opendrive_to_commonroad(odr_file)
+                scenario, map_cache_hit = self._convert_map(odr_file)
                 scenario.dt = self.dt_cr
             except Exception as e:
                 odr_conversion_error = AnalyzerErrorResult.from_exception(e)
@@ -336,7 +769,7 @@ class Osc2CrConverter(Converter):
         scenario.source = self.source
         scenario.tags = self.tags
 
-        return scenario, odr_file, odr_conversion_error
+        return scenario, odr_file, odr_conversion_error, map_cache_hit
 
     def _find_ego_vehicle(self, vehicle_name_list: List[str]) -> Tuple[str, bool]:
         """
@@ -359,7 +792,7 @@ class Osc2CrConverter(Converter):
         self,
         scenario: Scenario,
         ego_vehicle: str,
-        states: Dict[str, List[SimScenarioObjectState]],
+        states: Dict[str, SimScenarioObjectTrajectory],
         sim_time: float,
         obstacles_extra_info: Dict[str, Optional[Vehicle]],
     ) -> Dict[str, Optional[DynamicObstacle]]:
@@ -391,17 +824,112 @@ class Osc2CrConverter(Converter):
                 obstacles[object_name] = create_obstacle(object_name)
         return obstacles
 
+    def _create_obstacles_from_cr_states(
+        self,
+        scenario: Scenario,
+        ego_vehicle: str,
+        cr_states: Dict[str, Tuple[List[State], SimScenarioObjectState]],
+    ) -> Dict[str, Optional[DynamicObstacle]]:
+        """
+        Creating obstacles based on the CommonRoad states built while streaming the simulation.
+        :param scenario: basic scenario
+        :param ego_vehicle: name of the ego vehicle
+        :param cr_states: CommonRoad states and first simulated state per vehicle
+        :return: created CommonRoad obstacles
+        """
+
+        def create_obstacle(obstacle_name: str) -> Optional[DynamicObstacle]:
+            obstacle_cr_states, first_state = cr_states[obstacle_name]
+            if len(obstacle_cr_states) == 0:
+                return None
+            return self._cr_states_to_dynamic_obstacle(
+                obstacle_id=scenario.generate_object_id(),
+                cr_states=obstacle_cr_states,
+                first_state=first_state,
+            )
+
+        # Make sure ego vehicle is always the obstacle with the lowest obstacle_id
+        obstacles = {ego_vehicle: create_obstacle(ego_vehicle)}
+        for object_name in sorted(cr_states.keys()):
+            if object_name != ego_vehicle:
+                obstacles[object_name] = create_obstacle(object_name)
+        return obstacles
+
+    def _simulate_streaming(
+        self,
+        sim_wrapper: SimWrapper,
+        xosc_file: str,
+        dt_sim: float,
+        obstacles_extra_info: Dict[str, Optional[Vehicle]],
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> Tuple[WrapperSimResult, Dict[str, Tuple[List[State], SimScenarioObjectState]]]:
+        """
+        Simulating the scenario with the streaming API of the SimWrapper, while building the CommonRoad states of the
+        completed time steps in a separate thread.
+        :param sim_wrapper: the SimWrapper to simulate with
+        :param xosc_file: the OpenSCENARIO file
+        :param dt_sim: time step size of the simulation
+        :param obstacles_extra_info: extra information about the Vehicles
+        :param parameter_values: values overriding the declared global parameters, e.g. of a variant
+        :return: the simulation result without states, the CommonRoad states and first simulated state per vehicle
+        """
+        builder = StreamingStateBuilder(self.dt_cr, obstacles_extra_info)
+        # bounded, so the simulation waits for the state builder instead of queuing all frames in memory
+        frames: queue.Queue = queue.Queue(maxsize=_MAX_QUEUED_FRAMES)
+
+        def consume():
+            while (frame := frames.get()) is not None:
+                builder.add(sim_wrapper.frame_states(frame))
+                builder.build_completed()
+
+        def put(frame) -> bool:
+            while True:
+                try:
+                    frames.put(frame, timeout=_QUEUE_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    if consumer.done():
+                        # the consumer failed, its exception is raised by consumer.result()
+                        return False
+
+        with ThreadPoolExecutor(1) as executor:
+            consumer = executor.submit(consume)
+            if parameter_values is None:
+                stream = sim_wrapper.simulate_scenario_stream(xosc_file, dt_sim)
+            else:
+                stream = sim_wrapper.simulate_scenario_stream(
+                    xosc_file, dt_sim, parameter_values
+                )
+            try:
+                while True:
+                    try:
+                        frame = next(stream)
+                    except StopIteration as stop:
+                        res: WrapperSimResult = stop.value
+                        break
+                    if not put(frame):
+                        break
+            finally:
+                stream.close()
+                put(None)
+            consumer.result()
+
+        if res.ending_cause is ESimEndingCause.FAILURE:
+            return res, {}
+        return res, builder.finish(res.sim_time)
+
     def _osc_states_to_dynamic_obstacle(
         self,
         obstacle_id: int,
-        states: List[SimScenarioObjectState],
+        states: SimScenarioObjectTrajectory,
         timestamps: List[float],
         obstacle_extra_info: Optional[Vehicle],
     ) -> Optional[DynamicObstacle]:
         if len(states) == 0:
             return None
-        first_occurred_timestamp = min([state.get_timestamp() for state in states])
-        last_occurred_timestamp = max([state.get_timestamp() for state in states])
+        recorded_timestamps = states.get_timestamps()
+        first_occurred_timestamp = float(recorded_timestamps.min())
+        last_occurred_timestamp = float(recorded_timestamps.max())
         first_used_timestamp = min(
             [t for t in timestamps],
             key=lambda t: math.fabs(first_occurred_timestamp - t),
@@ -415,32 +943,44 @@ class Osc2CrConverter(Converter):
         used_timestamps = sorted(
             [t for t in timestamps if first_used_timestamp <= t <= last_used_timestamp]
         )
-        used_states = [
-            ScenarioObjectState.build_interpolated(states, t, obstacle_extra_info)
-            for t in used_timestamps
-        ]
+        state_type = states[0].get_scenario_object_state_type()
+        cr_states = state_type.build_cr_states(
+            states, used_timestamps, first_used_time_step, obstacle_extra_info
+        )
+        return self._cr_states_to_dynamic_obstacle(obstacle_id, cr_states, states[0])
 
-        obstacle_type = states[0].get_obstacle_type()
+    @staticmethod
+    def _cr_states_to_dynamic_obstacle(
+        obstacle_id: int,
+        cr_states: List[State],
+        first_state: SimScenarioObjectState,
+    ) -> DynamicObstacle:
+        """
+        Creating the obstacle from its CommonRoad states.
+        :param obstacle_id: id of the obstacle
+        :param cr_states: the CommonRoad states of consecutive time steps
+        :param first_state: the first simulated state, providing the type and dimensions of the obstacle
+        :return: created CommonRoad obstacle
+        """
+        first_used_time_step = cr_states[0].time_step
+        obstacle_type = first_state.get_obstacle_type()
         if obstacle_type == ObstacleType.PEDESTRIAN:
             # for pedestrian, we consider an overapproximated circular area.
             # see: Koschi, Markus, et al. "Set-based prediction of pedestrians in urban environments considering
             # formalized traffic rules." IEEE ITSC, 2018
             shape = Circle(
-                max(states[0].get_object_length() / 2.0, states[0].get_object_width())
+                max(
+                    first_state.get_object_length() / 2.0,
+                    first_state.get_object_width(),
+                )
                 / 2.0
             )
         else:
             shape = Rectangle(
-                states[0].get_object_length(), states[0].get_object_width()
+                first_state.get_object_length(), first_state.get_object_width()
             )
 
-        trajectory = Trajectory(
-            first_used_time_step,
-            [
-                state.to_cr_state(i + first_used_time_step)
-                for i, state in enumerate(used_states)
-            ],
-        )
+        trajectory = Trajectory(first_used_time_step, cr_states)
 
         # Exclude the first state in the trajectory for the prediction
         trimmed_states = trajectory.state_list[1:]
@@ -471,14 +1011,16 @@ class Osc2CrConverter(Converter):
         self,
         scenario: Scenario,
         pps: PlanningProblemSet,
+        name_xosc: Optional[str] = None,
     ) -> None:
         """
         Writing the CommonRoad scenario to xml file together with the planning problem set
         :param scenario: CommonRoad scenario
         :param pps: planning problem set
+        :param name_xosc: name of the scenario, defaults to the name of the converted file
         """
         COUNTRY = "OSC"  # OpenSCENARIO
-        SCENE = self.config.general.name_xosc
+        SCENE = name_xosc if name_xosc is not None else self.config.general.name_xosc
         CONFIG = self.config.scenario.config
         # T: single trajectories
         PRED = self.config.scenario.pred
@@ -499,6 +1041,8 @@ class Osc2CrConverter(Converter):
         ending_cause: ESimEndingCause,
         sim_time: float,
         runtime: float,
+        sim_time_saved: float = 0.0,
+        map_cache_hit: Optional[bool] = None,
     ) -> ConversionStatistics:
         """
         Building the statistics of the conversion.
@@ -509,6 +1053,8 @@ class Osc2CrConverter(Converter):
         :param ending_cause: why simulation is finished
         :param sim_time: simulation time in total
         :param runtime: runtime of converting the scenario
+        :param sim_time_saved: simulation time saved by ending the simulation early
+        :param map_cache_hit: whether the map was found in the in-process map cache, None if not looked up
         :return: statistics
         """
         util_logger.print_and_log_info(
@@ -527,6 +1073,10 @@ class Osc2CrConverter(Converter):
         util_logger.print_and_log_info(
             logger, f"#\t The ending cause {ending_cause.name}"
         )
+        if sim_time_saved > 0.0:
+            util_logger.print_and_log_info(
+                logger, f"#\t Simulation time saved: {sim_time_saved:.2f} s"
+            )
         util_logger.print_and_log_info(
             logger, "# ============================================== #"
         )
@@ -541,6 +1091,9 @@ class Osc2CrConverter(Converter):
             sim_ending_cause=ending_cause,
             sim_time=sim_time,
             runtime=runtime,
+            sim_time_saved=sim_time_saved,
+            map_cache_hits=int(map_cache_hit is True),
+            map_cache_misses=int(map_cache_hit is False),
         )
 
     def run_analysis(
@@ -555,11 +1108,15 @@ class Osc2CrConverter(Converter):
         if len(analyzers) == 0:
             return {}
         else:
-            trimmed_scenario = trim_scenario(scenario)
+            view = scenario_view(scenario)
             if not keep_ego_vehicle:
-                trimmed_scenario.add_objects(obstacles[ego_vehicle])
-                if len(scenario.lanelet_network.lanelets) > 0:
-                    scenario.assign_obstacles_to_lanelets()
+                # the ego vehicle is assigned to the lanelets of the untrimmed map, like the other obstacles, without
+                # changing the assignments of the ego vehicle of the conversion
+                view.add_objects(share_obstacle(obstacles[ego_vehicle]))
+                if len(view.lanelet_network.lanelets) > 0:
+                    # only the added ego vehicle is assigned
+                    assign_obstacles_to_lanelets(view)
+            trimmed_scenario = trim_scenario(view, deep_copy=False)
             return {
                 e_analyzer: analyzer.run(
                     trimmed_scenario, obstacles, obstacles_extra_info
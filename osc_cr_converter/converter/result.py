@@ -7,9 +7,9 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 from dataclasses import dataclass
-from multiprocessing import Lock
+from enum import Enum
 from os import path
-from typing import Dict, Optional, Tuple, ClassVar
+from typing import Dict, List, Optional, Tuple, Union
 
 from commonroad.common.file_reader import CommonRoadFileReader
 from commonroad.common.file_writer import CommonRoadFileWriter, OverwriteExistingFile
@@ -21,6 +21,7 @@ from osc_cr_converter.analyzer.result import AnalyzerResult
 from osc_cr_converter.analyzer.enum_analyzer import EAnalyzer
 from osc_cr_converter.utility.statistics import ConversionStatistics
 from osc_cr_converter.converter.serializable import Serializable
+from osc_cr_converter.utility.general import reserve_unique_file
 
 
 @dataclass(frozen=True)
@@ -33,7 +34,6 @@ class Osc2CrConverterResult(Serializable):
     the Serializable interface
     """
 
-    __lock: ClassVar[Lock] = Lock()
     statistics: ConversionStatistics
     analysis: Dict[EAnalyzer, Tuple[float, Dict[str, AnalyzerResult]]]
     xosc_file: str
@@ -44,6 +44,9 @@ class Osc2CrConverterResult(Serializable):
     scenario: Optional[Scenario]
     planning_problem_set: Optional[PlanningProblemSet]
 
+    # values of the parameters of the converted variant, e.g. of a ParameterValueDistribution
+    parameter_values: Optional[Dict[str, str]] = None
+
     def __getstate__(self) -> Dict:
         data = self.__dict__.copy()
         if (
@@ -53,19 +56,18 @@ class Osc2CrConverterResult(Serializable):
         ):
             del data["scenario"]
             del data["planning_problem_set"]
-            file_path_base = path.join(
-                Serializable.storage_dir,
-                path.splitext(path.basename(self.xosc_file))[0],
+            file_path = reserve_unique_file(
+                path.join(
+                    Serializable.storage_dir,
+                    path.splitext(path.basename(self.xosc_file))[0],
+                ),
+                ".xml",
             )
-            with self.__lock:
-                i = 1
-                while path.exists(file_path := file_path_base + f"{i}.xml"):
-                    i += 1
-                CommonRoadFileWriter(
-                    scenario=self.scenario,
-                    planning_problem_set=self.planning_problem_set,
-                ).write_to_file(file_path, OverwriteExistingFile.SKIP)
-                data["file_path"] = file_path
+            CommonRoadFileWriter(
+                scenario=self.scenario,
+                planning_problem_set=self.planning_problem_set,
+            ).write_to_file(file_path, OverwriteExistingFile.ALWAYS)
+            data["file_path"] = file_path
 
         return data
 
@@ -82,3 +84,22 @@ class Osc2CrConverterResult(Serializable):
             data["planning_problem_set"] = pps
 
         self.__dict__.update(data)
+
+
+@dataclass(frozen=True)
+class Osc2CrDistributionResult(Serializable):
+    """
+    The result of converting a ParameterValueDistribution, containing the result of every variant of its scenario,
+    either an Osc2CrConverterResult or the EFailureReason of the variant
+    """
+
+    xosc_file: str
+    scenario_file: str
+    parameter_sets: List[Dict[str, str]]
+    variants: List[Union[Osc2CrConverterResult, Enum]]
+
+    def __getstate__(self) -> Dict:
+        return self.__dict__.copy()
+
+    def __setstate__(self, data: Dict):
+        self.__dict__.update(data)
@@ -0,0 +1,172 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from commonroad.scenario.state import State
+from scenariogeneration.xosc import Vehicle
+
+from osc_cr_converter.wrapper.base.scenario_object import (
+    SimScenarioObjectState,
+    SimScenarioObjectTrajectory,
+)
+
+
+class _ObjectStream:
+    """
+    Not yet converted states and already built CommonRoad states of one object
+    """
+
+    def __init__(self, first_state: SimScenarioObjectState, first_time_step: int):
+        self.first_state = first_state
+        self.first_time_step = first_time_step
+        self.next_time_step = first_time_step
+        self.parts: List[SimScenarioObjectTrajectory] = []
+        self.last_timestamp: Optional[float] = None
+        self.cr_states: List[State] = []
+
+
+class StreamingStateBuilder:
+    """
+    Builds the CommonRoad states of all objects while their simulated states are streamed by
+    SimWrapper.simulate_scenario_stream.
+
+    The CommonRoad state of a time step is resampled from the two recorded states closest to it (see StateResampler),
+    hence it is final once two states at or after the time step were recorded. Only the states still needed for the
+    pending time steps are kept, and the result equals converting the complete trajectories at once.
+    """
+
+    def __init__(
+        self, dt_cr: float, obstacles_extra_info: Dict[str, Optional[Vehicle]]
+    ):
+        self.dt_cr = dt_cr
+        self.obstacles_extra_info = obstacles_extra_info
+        self._objects: Dict[str, _ObjectStream] = {}
+
+    @property
+    def object_names(self) -> List[str]:
+        """
+        Names of all objects for which states were streamed
+        """
+        return list(self._objects.keys())
+
+    def add(self, states: Dict[str, SimScenarioObjectTrajectory]):
+        """
+        Add the next states of the objects
+
+        :param states: New chronologically ordered states per object name
+        """
+        for object_name, trajectory in states.items():
+            if len(trajectory) == 0:
+                continue
+            timestamps = trajectory.get_timestamps()
+            stream = self._objects.get(object_name)
+            if stream is None:
+                stream = _ObjectStream(
+                    trajectory[0], self._closest_time_step(float(timestamps[0]))
+                )
+                self._objects[object_name] = stream
+            elif math.isclose(float(timestamps[0]), stream.last_timestamp):
+                # like the recorders, a state with the timestamp of the previous state replaces it
+                last_part = stream.parts.pop()
+                if len(last_part) > 1:
+                    stream.parts.append(last_part[:-1])
+            stream.parts.append(trajectory)
+            stream.last_timestamp = float(timestamps[-1])
+
+    def build_completed(self):
+        """
+        Build the CommonRoad states of all time steps which can no longer change and drop the states not needed anymore
+        """
+        for object_name, stream in self._objects.items():
+            trajectory = self._join(stream)
+            timestamps = trajectory.get_timestamps()
+            if len(timestamps) < 2:
+                continue
+            # the time steps with at least two recorded states at or after them
+            last_time_step = math.floor(float(timestamps[-2]) / self.dt_cr) + 1
+            while last_time_step * self.dt_cr > timestamps[-2]:
+                last_time_step -= 1
+            self._build(object_name, stream, trajectory, last_time_step)
+
+    def finish(
+        self, sim_time: float
+    ) -> Dict[str, Tuple[List[State], SimScenarioObjectState]]:
+        """
+        Build the remaining CommonRoad states after the simulation ended
+
+        :param sim_time: The total simulated time
+        :return: Per object name the CommonRoad states and the first simulated state
+        """
+        final_time_step = math.floor(sim_time / self.dt_cr)
+        results = {}
+        for object_name, stream in self._objects.items():
+            if len(stream.cr_states) == 0:
+                # the first time step may only be clipped to the simulated time now
+                stream.first_time_step = min(stream.first_time_step, final_time_step)
+                stream.next_time_step = stream.first_time_step
+            last_time_step = min(
+                self._closest_time_step(stream.last_timestamp), final_time_step
+            )
+            self._build(object_name, stream, self._join(stream), last_time_step)
+            results[object_name] = (
+                stream.cr_states[: last_time_step - stream.first_time_step + 1],
+                stream.first_state,
+            )
+        return results
+
+    def _build(
+        self,
+        object_name: str,
+        stream: _ObjectStream,
+        trajectory: SimScenarioObjectTrajectory,
+        last_time_step: int,
+    ):
+        if last_time_step >= stream.next_time_step:
+            timestamps = [
+                time_step * self.dt_cr
+                for time_step in range(stream.next_time_step, last_time_step + 1)
+            ]
+            stream.cr_states.extend(
+                stream.first_state.get_scenario_object_state_type().build_cr_states(
+                    trajectory,
+                    timestamps,
+                    stream.next_time_step,
+                    self.obstacles_extra_info.get(object_name),
+                )
+            )
+            stream.next_time_step = last_time_step + 1
+            # the two states before the next time step are still candidates for it
+            first_needed = max(
+                0,
+                int(
+                    np.searchsorted(
+                        trajectory.get_timestamps(),
+                        stream.next_time_step * self.dt_cr,
+                    )
+                )
+                - 2,
+            )
+            trajectory = trajectory[first_needed:]
+        stream.parts = [trajectory]
+
+    @staticmethod
+    def _join(stream: _ObjectStream) -> SimScenarioObjectTrajectory:
+        return type(stream.parts[0]).concatenate(stream.parts)
+
+    def _closest_time_step(self, timestamp: float) -> int:
+        """
+        The time step closest to the timestamp, the earlier one on ties
+        """
+        time_step = max(0, math.floor(timestamp / self.dt_cr))
+        return min(
+            range(max(0, time_step - 1), time_step + 2),
+            key=lambda step: math.fabs(timestamp - step * self.dt_cr),
+        )
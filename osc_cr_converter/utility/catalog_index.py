@@ -0,0 +1,333 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import warnings
+import xml.etree.ElementTree as Et
+from dataclasses import dataclass, field
+from os import path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from scenariogeneration.xosc import Vehicle
+
+from osc_cr_converter.utility.general import file_lock
+
+# (absolute path, modification time in ns, size in bytes) of a catalog file
+CatalogFileKey = Tuple[str, int, int]
+
+# version of the persisted index, increased whenever CatalogFileEntries changes
+_INDEX_VERSION = 3
+
+
+@dataclass
+class CatalogFileEntries:
+    """
+    The already resolved Vehicle entries of one catalog file
+
+    Attributes
+        catalog_name name of the catalog defined in the file, None if the file defines no catalog
+        content_hash SHA-256 hash of the content of the file the vehicles were resolved from, None if the file is
+            not persisted or no vehicle was resolved from it yet
+        vehicles serialized Vehicle element per resolved entry name
+        missing_vehicles entry names known to have no Vehicle entry in the file
+    """
+
+    catalog_name: Optional[str]
+    content_hash: Optional[str] = None
+    vehicles: Dict[str, bytes] = field(default_factory=dict)
+    missing_vehicles: Set[str] = field(default_factory=set)
+
+    def merge(self, other: "CatalogFileEntries"):
+        """
+        Add the resolved entries of the same catalog file resolved by another process
+        """
+        if self.content_hash is None:
+            self.content_hash = other.content_hash
+        self.vehicles.update(other.vehicles)
+        self.missing_vehicles |= other.missing_vehicles
+
+
+class CatalogIndex:
+    """
+    Index of the Vehicle entries of catalog files, keyed by the path, modification time and size of each file, so a
+    changed file is indexed again.
+
+    Entries are resolved lazily: a catalog file is streamed only until the catalog name, respectively the requested
+    entry is found, clearing every passed entry, so neither a complete tree of the file is built nor are unreferenced
+    entries parsed. The resolved entries are shared by all scenarios of a process (see shared) and, if an index file
+    is given, persisted on disk across runs. Concurrent processes merge their entries into the index file under a file
+    lock. The index file is plain JSON, so loading it never executes code. A persisted Vehicle is only returned if the
+    content hash of its catalog file still matches, which is checked once per process and only for the files a Vehicle
+    is returned from. Looked up Vehicles are parsed once per process and then reused.
+    """
+
+    # indices of this process per index file
+    _shared: Dict[Optional[str], "CatalogIndex"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, index_file: Optional[str] = None):
+        """
+        :param index_file: File to persist the index in, None keeps it in memory only
+        """
+        self.index_file = path.abspath(index_file) if index_file is not None else None
+        self._files: Dict[CatalogFileKey, CatalogFileEntries] = {}
+        self._vehicles: Dict[Tuple[CatalogFileKey, str], Vehicle] = {}
+        self._changed_keys: Set[CatalogFileKey] = set()
+        # files whose vehicles were resolved or checked against their content by this process
+        self._verified_keys: Set[CatalogFileKey] = set()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        if self.index_file is not None:
+            self._files.update(self._load())
+
+    @staticmethod
+    def shared(index_file: Optional[str] = None) -> "CatalogIndex":
+        """
+        The index of this process persisted in the index file
+        """
+        if index_file is not None:
+            index_file = path.abspath(index_file)
+        with CatalogIndex._shared_lock:
+            if index_file not in CatalogIndex._shared:
+                CatalogIndex._shared[index_file] = CatalogIndex(index_file)
+            return CatalogIndex._shared[index_file]
+
+    def entries(self, catalog_file: str) -> CatalogFileEntries:
+        """
+        The resolved Vehicle entries of the catalog file, reading its catalog name if it is new or changed
+
+        :param catalog_file: Path of the catalog file
+        """
+        return self._entries(self._key(catalog_file))
+
+    def find_vehicle(
+        self, catalog_files: List[str], catalog_name: str, entry_name: str
+    ) -> Optional[Vehicle]:
+        """
+        Find a Vehicle entry in the catalog with the given name.
+
+        If several of the catalog files define the catalog, the first one containing the entry is used.
+
+        :param catalog_files: The catalog files to search in
+        :param catalog_name: Name of the catalog
+        :param entry_name: Name of the entry
+        :return: The Vehicle or None if the catalog contains no such Vehicle
+        """
+        for catalog_file in catalog_files:
+            key = self._key(catalog_file)
+            with self._lock:
+                entries = self._entries(key)
+                if entries.catalog_name != catalog_name:
+                    continue
+                if entry_name in entries.vehicles and not self._verify(key, entries):
+                    entries = self._index(key)
+                    if entries.catalog_name != catalog_name:
+                        continue
+                if entry_name in entries.missing_vehicles:
+                    self.hits += 1
+                    continue
+                if entry_name in entries.vehicles:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    vehicle_element = _stream_vehicle(key[0], entry_name)
+                    self._changed_keys.add(key)
+                    if vehicle_element is None:
+                        entries.missing_vehicles.add(entry_name)
+                        continue
+                    if self.index_file is not None and entries.content_hash is None:
+                        entries.content_hash = _content_hash(key[0])
+                        self._verified_keys.add(key)
+                    entries.vehicles[entry_name] = Et.tostring(vehicle_element)
+
+                vehicle = self._vehicles.get((key, entry_name))
+                if vehicle is None:
+                    vehicle = Vehicle.parse(Et.fromstring(entries.vehicles[entry_name]))
+                    self._vehicles[(key, entry_name)] = vehicle
+                return vehicle
+        return None
+
+    def save(self):
+        """
+        Merge the newly indexed files into the index file, if any
+        """
+        with self._lock:
+            if self.index_file is None or len(self._changed_keys) == 0:
+                return
+            changed_files = {key: self._files[key] for key in self._changed_keys}
+            self._changed_keys = set()
+        os.makedirs(path.dirname(self.index_file), exist_ok=True)
+        with file_lock(self.index_file + ".lock"):
+            files = self._load()
+            for key, entries in changed_files.items():
+                # drop the entries of outdated versions of the file
+                for outdated_key in [k for k in files.keys() if k[0] == key[0]]:
+                    if outdated_key != key:
+                        del files[outdated_key]
+                if key in files and (
+                    None in (files[key].content_hash, entries.content_hash)
+                    or files[key].content_hash == entries.content_hash
+                ):
+                    entries.merge(files[key])
+                files[key] = entries
+            file_descriptor, tmp_file = tempfile.mkstemp(
+                dir=path.dirname(self.index_file)
+            )
+            try:
+                with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                    json.dump(_dump_index(files), file)
+                os.replace(tmp_file, self.index_file)
+            finally:
+                if path.exists(tmp_file):
+                    os.remove(tmp_file)
+
+    def _load(self) -> Dict[CatalogFileKey, CatalogFileEntries]:
+        if not path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, encoding="utf-8") as file:
+                return _load_index(json.load(file))
+        except Exception as e:
+            warnings.warn(
+                f"<CatalogIndex/load> Ignoring unreadable index {self.index_file}: {e}"
+            )
+            return {}
+
+    def _entries(self, key: CatalogFileKey) -> CatalogFileEntries:
+        with self._lock:
+            entries = self._files.get(key)
+            if entries is None:
+                entries = self._index(key)
+            return entries
+
+    def _index(self, key: CatalogFileKey) -> CatalogFileEntries:
+        """
+        Index the catalog file from scratch, dropping its previous entries
+        """
+        with self._lock:
+            entries = CatalogFileEntries(catalog_name=_stream_catalog_name(key[0]))
+            self._files[key] = entries
+            self._changed_keys.add(key)
+            self._verified_keys.add(key)
+            return entries
+
+    def _verify(self, key: CatalogFileKey, entries: CatalogFileEntries) -> bool:
+        """
+        Whether the resolved vehicles of the catalog file match its content, e.g. if the file changed without
+        changing its modification time and size after the entries were persisted
+        """
+        with self._lock:
+            if key not in self._verified_keys:
+                if entries.content_hash != _content_hash(key[0]):
+                    return False
+                self._verified_keys.add(key)
+            return True
+
+    @staticmethod
+    def _key(catalog_file: str) -> CatalogFileKey:
+        catalog_file = path.abspath(catalog_file)
+        stat = os.stat(catalog_file)
+        return catalog_file, stat.st_mtime_ns, stat.st_size
+
+
+def _dump_index(files: Dict[CatalogFileKey, CatalogFileEntries]) -> dict:
+    return {
+        "version": _INDEX_VERSION,
+        "files": [
+            {
+                "path": key[0],
+                "mtime_ns": key[1],
+                "size": key[2],
+                "catalog_name": entries.catalog_name,
+                "content_hash": entries.content_hash,
+                "vehicles": {
+                    name: vehicle.decode("utf-8")
+                    for name, vehicle in entries.vehicles.items()
+                },
+                "missing_vehicles": sorted(entries.missing_vehicles),
+            }
+            for key, entries in files.items()
+        ],
+    }
+
+
+def _load_index(index: dict) -> Dict[CatalogFileKey, CatalogFileEntries]:
+    if index.get("version") != _INDEX_VERSION:
+        return {}
+    return {
+        (file["path"], int(file["mtime_ns"]), int(file["size"])): CatalogFileEntries(
+            catalog_name=file["catalog_name"],
+            content_hash=file["content_hash"],
+            vehicles={
+                name: vehicle.encode("utf-8")
+                for name, vehicle in file["vehicles"].items()
+            },
+            missing_vehicles=set(file["missing_vehicles"]),
+        )
+        for file in index["files"]
+    }
+
+
+def _content_hash(catalog_file: str) -> str:
+    content_hash = hashlib.sha256()
+    with open(catalog_file, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def _iterparse(catalog_file: str) -> Iterator[Tuple[str, Et.Element]]:
+    """
+    Stream the start and end events of the catalog file, closing it once the iteration stops
+    """
+    with open(catalog_file, "rb") as file:
+        yield from Et.iterparse(file, events=("start", "end"))
+
+
+def _stream_catalog_name(catalog_file: str) -> Optional[str]:
+    """
+    Read the name of the catalog defined in the file, stopping at the start of the Catalog element
+    """
+    depth = 0
+    for event, element in _iterparse(catalog_file):
+        if event == "end":
+            depth -= 1
+            continue
+        if depth == 1 and element.tag == "Catalog":
+            return element.attrib.get("name")
+        depth += 1
+    return None
+
+
+def _stream_vehicle(catalog_file: str, entry_name: str) -> Optional[Et.Element]:
+    """
+    Find the Vehicle entry in the catalog file, stopping as soon as it is complete. All passed entries are cleared and
+    removed, so the memory used does not grow with the size of the catalog.
+    """
+    depth = 0
+    catalog = None
+    for event, element in _iterparse(catalog_file):
+        if event == "start":
+            if depth == 1 and element.tag == "Catalog":
+                catalog = element
+            depth += 1
+            continue
+        depth -= 1
+        if catalog is None or depth != 2:
+            continue
+        # element is an entry of the catalog
+        if element.tag == "Vehicle" and element.attrib.get("name") == entry_name:
+            return element
+        element.clear()
+        catalog.remove(element)
+    return None
@@ -177,9 +177,32 @@ class EsminiParams(BaseParam):
     # version
     version: str = "default"  # we use v2.29.3 as default version
 
+    # directory of the checksum-verified esmini binaries, defaults to the environment variable
+    # OSC_CR_CONVERTER_ESMINI_CACHE and otherwise to the package directory
+    cache_dir: Optional[str] = None
+    # preinstalled esmini bin directory or library used instead of the cache, defaults to the environment variable
+    # OSC_CR_CONVERTER_ESMINI_LIB
+    lib_path: Optional[str] = None
+    # never access the network, only use the preinstalled or cached binaries
+    offline: bool = False
+    # location of the esmini releases, e.g. a mirror of https://github.com/esmini/esmini/releases
+    releases_url: str = "https://github.com/esmini/esmini/releases"
+
     # lower and upper time limits for the simulation duration
     min_time: float = 5.0
     max_time: float = 60.0
+    # derive the maximum simulation time per scenario from its SimulationTimeConditions, adding max_time_margin
+    max_time_from_triggers: bool = False
+    max_time_margin: float = 2.0
+
+    # end the simulation early, once the condition held for the given time in seconds (None disables the policy)
+    # all stories of the storyboard are complete
+    stories_complete_hold_time: Optional[float] = None
+    # no object is faster than standstill_max_speed
+    standstill_hold_time: Optional[float] = None
+    standstill_max_speed: float = 0.01
+    # all objects are off-road
+    off_road_hold_time: Optional[float] = None
 
     # logging information
     log_to_console: bool = False
@@ -191,6 +214,20 @@ class EsminiParams(BaseParam):
     # simulation time step size
     dt_sim: float = 0.01
 
+    # record only the simulated states needed to resample the trajectories with dt_cr
+    record_aligned_only: bool = True
+
+    # count and time every call of an esmini library function and log the statistics after each simulation
+    instrument_native_calls: bool = False
+
+    # build the CommonRoad states in a separate thread while the simulation is still running
+    stream_simulation: bool = False
+
+    # simulate in a pool of esmini engine processes instead of the converter's process
+    use_engine_pool: bool = False
+    # number of engine processes of the pool, 0 uses one per available processor
+    num_engines: int = 0
+
     # use the associated OpenDRIVE map
     use_implicit_odr_file: bool = True
     odr_file_override: Optional[str] = None
@@ -221,6 +258,35 @@ class ScenarioParams(BaseParam):
     config: str = "1"  # 1-9
     pred: str = "1"
 
+    # persist the index of the catalog entries across runs in catalog_index_file, defaulting to the output directory
+    persist_catalog_index: bool = False
+    catalog_index_file: Optional[str] = None
+
+    # cache the converted OpenDRIVE maps across runs in map_cache_dir, defaulting to the output directory, evicting the
+    # least recently used maps if the cache exceeds map_cache_max_size bytes. The entries are authenticated with the
+    # secret key in map_cache_key_file, defaulting to ~/.osc_cr_converter/map_cache.key
+    use_map_cache: bool = False
+    map_cache_dir: Optional[str] = None
+    map_cache_key_file: Optional[str] = None
+    map_cache_max_size: int = 2 * 1024**3
+    # maximum estimated memory of the converted maps kept by each process to convert scenarios on the same map without
+    # converting or loading the map again, 0 disables it
+    map_memory_cache_size: int = 512 * 1024**2
+    # run the independent stages of a conversion concurrently: the map conversion, the search for the extra
+    # information of the entities and the simulation. The reported runtime stays the sum of the runtimes of the stages
+    concurrent_stages: bool = False
+
+    # convert the variants of ParameterValueDistributions, instead of failing with
+    # SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION. run_conversion then returns a list with the scenario or failure
+    # of each variant. The map and the catalog entries are converted once and shared by all variants: parameters
+    # referenced by the RoadNetwork or the Entities, e.g. the catalog entry of a vehicle, are not resolved per variant
+    expand_parameter_distributions: bool = False
+    # number of variants converted concurrently, 0 uses one per available processor. By default, the variants are
+    # converted one after another with the SimWrapper of the converter, since the BatchConverter already runs one
+    # converter per processor. With more workers, unless esmini.use_engine_pool is set or the SimWrapper was set
+    # explicitly, the variants are simulated in an engine pool of this size
+    num_variant_workers: int = 1
+
 
 @dataclass
 class ConverterParams(BaseParam):
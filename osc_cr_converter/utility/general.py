@@ -7,18 +7,35 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 import copy
+import os
+import sys
+from contextlib import contextmanager, suppress
 from dataclasses import fields
-from typing import get_origin, Union, get_args
+from typing import get_origin, Union, get_args, Iterator, List
 
+import numpy as np
+import shapely
+from commonroad.prediction.prediction import TrajectoryPrediction
+from commonroad.scenario.lanelet import Lanelet
 from commonroad.scenario.scenario import Scenario
 
+from osc_cr_converter.utility.lanelet_assignment import (
+    assign_obstacles_to_lanelets,
+    share_assignments,
+)
+
 
 def trim_scenario(scenario: Scenario, deep_copy: bool = True) -> Scenario:
-    trimmed_scenario = copy.deepcopy(scenario) if deep_copy else scenario
+    if deep_copy:
+        trimmed_scenario = copy.deepcopy(scenario)
+        share_assignments(scenario, trimmed_scenario)
+    else:
+        trimmed_scenario = scenario
 
     if len(trimmed_scenario.lanelet_network.lanelets) == 0:
         return trimmed_scenario
-    trimmed_scenario.assign_obstacles_to_lanelets()
+    remove_unoccupied_lanelets(trimmed_scenario)
+    assign_obstacles_to_lanelets(trimmed_scenario)
 
     if any(
         obstacle.prediction.shape_lanelet_assignment is None
@@ -40,12 +57,192 @@ def trim_scenario(scenario: Scenario, deep_copy: bool = True) -> Scenario:
         lanelet = trimmed_scenario.lanelet_network.find_lanelet_by_id(lanelet_id)
         if lanelet is not None:
             removable_lanelets.append(lanelet)
-    trimmed_scenario.remove_lanelet(removable_lanelets)
-    trimmed_scenario.assign_obstacles_to_lanelets()
+    remove_lanelets(trimmed_scenario, removable_lanelets)
+    assign_obstacles_to_lanelets(trimmed_scenario)
 
     return trimmed_scenario
 
 
+def remove_unoccupied_lanelets(scenario: Scenario) -> bool:
+    """
+    Remove the lanelets, which no dynamic obstacle of the scenario can occupy, before assigning the obstacles to the
+    lanelets.
+
+    The swept region of each obstacle, its recorded positions buffered by the circumradius of its shape, contains all
+    of its occupancies. Lanelets intersecting no swept region, looked up in an STRtree of the lanelet polygons, are
+    never assigned to an obstacle and thus removed by trim_scenario anyway, so trimming yields the same scenario
+    while assigning the obstacles only to the remaining lanelets.
+
+    :param scenario: The scenario, modified in place
+    :return: Whether the lanelets were filtered, which is skipped if trim_scenario would not trim the scenario
+    """
+    lanelets = scenario.lanelet_network.lanelets
+    if len(lanelets) == 0 or any(
+        not isinstance(obstacle.prediction, TrajectoryPrediction)
+        for obstacle in scenario.dynamic_obstacles
+    ):
+        return False
+
+    tree = shapely.STRtree([lanelet.polygon.shapely_object for lanelet in lanelets])
+    occupied_indices = set()
+    for obstacle in scenario.dynamic_obstacles:
+        positions = np.array(
+            [obstacle.initial_state.position]
+            + [state.position for state in obstacle.prediction.trajectory.state_list]
+        )
+        radius = shapely.Point(0, 0).hausdorff_distance(
+            obstacle.obstacle_shape.shapely_object
+        )
+        path = (
+            shapely.Point(positions[0])
+            if len(positions) == 1
+            else shapely.LineString(positions)
+        )
+        # the margin keeps lanelets only touching an occupancy despite rounding errors
+        swept_region = path.buffer(radius + 1e-6)
+        occupied_indices.update(
+            tree.query(swept_region, predicate="intersects").tolist()
+        )
+
+    remove_lanelets(
+        scenario,
+        [
+            lanelet
+            for index, lanelet in enumerate(lanelets)
+            if index not in occupied_indices
+        ],
+    )
+    return True
+
+
+def remove_lanelets(scenario: Scenario, lanelets: List[Lanelet]):
+    """
+    Remove the lanelets and the traffic signs and lights only referenced by them from the scenario.
+
+    Equivalent to Scenario.remove_lanelet, which however updates the references between the remaining lanelets and
+    rebuilds the spatial index of the lanelet network once per removed lanelet, which is quadratic in the size of
+    the map. As commonroad-io offers no removal of several lanelets at once, the lanelets are removed from the
+    internal attributes of the scenario and the lanelet network, which is why commonroad-io is pinned to the tested
+    releases and test_trim_scenario compares the result to Scenario.remove_lanelet.
+
+    :param scenario: The scenario, modified in place
+    :param lanelets: The lanelets to remove
+    """
+    if len(lanelets) == 0:
+        return
+    lanelet_network = scenario.lanelet_network
+    removed_ids = {lanelet.lanelet_id for lanelet in lanelets}
+    remaining_lanelets = [
+        lanelet
+        for lanelet in lanelet_network.lanelets
+        if lanelet.lanelet_id not in removed_ids
+    ]
+    removed_traffic_signs = set().union(
+        *[lanelet.traffic_signs for lanelet in lanelets]
+    ) - set().union(*[lanelet.traffic_signs for lanelet in remaining_lanelets])
+    removed_traffic_lights = set().union(
+        *[lanelet.traffic_lights for lanelet in lanelets]
+    ) - set().union(*[lanelet.traffic_lights for lanelet in remaining_lanelets])
+    scenario.remove_traffic_sign(
+        [
+            traffic_sign
+            for traffic_sign in lanelet_network.traffic_signs
+            if traffic_sign.traffic_sign_id in removed_traffic_signs
+        ]
+    )
+    scenario.remove_traffic_light(
+        [
+            traffic_light
+            for traffic_light in lanelet_network.traffic_lights
+            if traffic_light.traffic_light_id in removed_traffic_lights
+        ]
+    )
+
+    for lanelet_id in removed_ids:
+        del lanelet_network._lanelets[lanelet_id]
+        del lanelet_network._buffered_polygons[lanelet_id]
+        scenario._id_set.remove(lanelet_id)
+    lanelet_network.cleanup_lanelet_references()
+    lanelet_network._create_strtree()
+
+
+def reserve_unique_file(file_path_base: str, suffix: str) -> str:
+    """
+    Atomically create an empty file named file_path_base + i + suffix with the lowest free index i >= 1.
+
+    Creating the file exclusively makes the reservation safe between processes without any lock.
+
+    :param file_path_base: path of the file without index and suffix
+    :param suffix: suffix of the file, e.g. ".xml"
+    :return: path of the reserved file
+    """
+    i = 1
+    while True:
+        file_path = f"{file_path_base}{i}{suffix}"
+        try:
+            os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return file_path
+        except FileExistsError:
+            i += 1
+
+
+@contextmanager
+def file_lock(lock_file_path: str, remove: bool = False) -> Iterator[None]:
+    """
+    Hold an exclusive lock on the given file, blocking until other processes released it.
+
+    The lock is released by the operating system if the holding process dies, so it never has to be cleaned up.
+
+    :param lock_file_path: path of the lock file, created if missing
+    :param remove: remove the lock file when releasing the lock, so locks of many different keys leave no files
+        behind; ignored on Windows, where open files cannot be removed
+    """
+    if sys.platform.startswith("win32"):
+        import msvcrt
+
+        with open(lock_file_path, "a+b") as lock_file:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+
+    import fcntl
+
+    while True:
+        with open(lock_file_path, "a+b") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                if remove and not _is_locked_file(lock_file.fileno(), lock_file_path):
+                    # the previous holder removed the file after this process opened it, so lock the new file
+                    continue
+                try:
+                    yield
+                finally:
+                    if remove:
+                        with suppress(FileNotFoundError):
+                            os.remove(lock_file_path)
+                return
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _is_locked_file(file_descriptor: int, file_path: str) -> bool:
+    try:
+        return os.path.samestat(os.fstat(file_descriptor), os.stat(file_path))
+    except FileNotFoundError:
+        return False
+
+
 def dataclass_is_complete(dataclass_object) -> bool:
     for field in fields(dataclass_object):
         if get_origin(field.type) is not Union or type(None) not in get_args(
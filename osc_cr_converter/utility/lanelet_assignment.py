@@ -0,0 +1,158 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import weakref
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set, Tuple, Union
+
+from commonroad.prediction.prediction import Prediction
+from commonroad.scenario.lanelet import LaneletNetwork
+from commonroad.scenario.obstacle import DynamicObstacle, StaticObstacle
+from commonroad.scenario.scenario import Scenario
+
+
+@dataclass(frozen=True)
+class _Assignment:
+    obstacle: Union[DynamicObstacle, StaticObstacle]
+    prediction: Optional[Prediction]
+    lanelet_network: LaneletNetwork
+    lanelet_ids: FrozenSet[int]
+
+
+# recorded assignments of the obstacles per scenario, keyed by the identity of the scenario, as the hash of a Scenario
+# depends on its mutable content, and dropped once the scenario is garbage collected
+_recorded_assignments: Dict[
+    int, Tuple["weakref.ref[Scenario]", Dict[int, _Assignment]]
+] = {}
+
+
+def _assignments(scenario: Scenario) -> Dict[int, _Assignment]:
+    entry = _recorded_assignments.get(id(scenario))
+    if entry is None or entry[0]() is not scenario:
+        return {}
+    return entry[1]
+
+
+def _record_assignments(scenario: Scenario, assignments: Dict[int, _Assignment]):
+    scenario_id = id(scenario)
+
+    def forget(reference: "weakref.ref[Scenario]"):
+        if _recorded_assignments.get(scenario_id, (None,))[0] is reference:
+            del _recorded_assignments[scenario_id]
+
+    _recorded_assignments[scenario_id] = (weakref.ref(scenario, forget), assignments)
+
+
+def assign_obstacles_to_lanelets(scenario: Scenario) -> Set[int]:
+    """
+    Assign the obstacles of the scenario to its lanelets like Scenario.assign_obstacles_to_lanelets, reusing the
+    assignments of earlier calls.
+
+    The assignment of each obstacle is recorded per scenario together with the lanelets it was computed for. An
+    obstacle is only assigned again if it is new or replaced, or if lanelets were added since. If lanelets were only
+    removed, the lanelet ids of its assignment are filtered instead, since the lanelets occupied by the obstacle do
+    not depend on the other lanelets. Changing the trajectory or the shape of an obstacle in place is not detected.
+
+    :param scenario: The scenario, whose obstacles and lanelets are modified in place
+    :return: The ids of the obstacles, which were assigned again
+    """
+    lanelet_network = scenario.lanelet_network
+    lanelet_ids = frozenset(lanelet.lanelet_id for lanelet in lanelet_network.lanelets)
+    assignments = _assignments(scenario)
+    obstacles = {
+        obstacle.obstacle_id: obstacle
+        for obstacle in scenario.static_obstacles + scenario.dynamic_obstacles
+    }
+
+    outdated_ids = set()
+    for obstacle_id, obstacle in obstacles.items():
+        assignment = assignments.get(obstacle_id)
+        if (
+            assignment is None
+            or assignment.obstacle is not obstacle
+            or assignment.prediction is not getattr(obstacle, "prediction", None)
+            or assignment.lanelet_network is not lanelet_network
+            or not lanelet_ids <= assignment.lanelet_ids
+        ):
+            outdated_ids.add(obstacle_id)
+        elif lanelet_ids != assignment.lanelet_ids:
+            _restrict_assignment(obstacle, lanelet_ids)
+    if len(outdated_ids) > 0:
+        scenario.assign_obstacles_to_lanelets(obstacle_ids=outdated_ids)
+
+    _record_assignments(
+        scenario,
+        {
+            obstacle_id: _Assignment(
+                obstacle,
+                getattr(obstacle, "prediction", None),
+                lanelet_network,
+                lanelet_ids,
+            )
+            for obstacle_id, obstacle in obstacles.items()
+        },
+    )
+    return outdated_ids
+
+
+def _restrict_assignment(
+    obstacle: Union[DynamicObstacle, StaticObstacle], lanelet_ids: FrozenSet[int]
+):
+    if obstacle.initial_shape_lanelet_ids is not None:
+        obstacle.initial_shape_lanelet_ids = (
+            obstacle.initial_shape_lanelet_ids & lanelet_ids
+        )
+    if obstacle.initial_center_lanelet_ids is not None:
+        obstacle.initial_center_lanelet_ids = (
+            obstacle.initial_center_lanelet_ids & lanelet_ids
+        )
+    prediction = getattr(obstacle, "prediction", None)
+    if prediction is None:
+        return
+    if prediction.shape_lanelet_assignment is not None:
+        prediction.shape_lanelet_assignment = {
+            time_step: ids & lanelet_ids
+            for time_step, ids in prediction.shape_lanelet_assignment.items()
+        }
+    if prediction.center_lanelet_assignment is not None:
+        prediction.center_lanelet_assignment = {
+            time_step: ids & lanelet_ids
+            for time_step, ids in prediction.center_lanelet_assignment.items()
+        }
+
+
+def share_assignments(source: Scenario, target: Scenario):
+    """
+    Record the up-to-date assignments of the obstacles of the source scenario for the obstacles with the same ids in
+    the target scenario, so they are not assigned again.
+
+    :param source: The scenario, whose obstacles were assigned
+    :param target: A copy of the source scenario with copies of the obstacles and their assignments and the same
+        lanelets
+    """
+    lanelet_ids = frozenset(
+        lanelet.lanelet_id for lanelet in source.lanelet_network.lanelets
+    )
+    shared_assignments = {}
+    for obstacle_id, assignment in _assignments(source).items():
+        obstacle = source.obstacle_by_id(obstacle_id)
+        target_obstacle = target.obstacle_by_id(obstacle_id)
+        if (
+            target_obstacle is not None
+            and assignment.obstacle is obstacle
+            and assignment.prediction is getattr(obstacle, "prediction", None)
+            and assignment.lanelet_network is source.lanelet_network
+            and assignment.lanelet_ids == lanelet_ids
+        ):
+            shared_assignments[obstacle_id] = _Assignment(
+                target_obstacle,
+                getattr(target_obstacle, "prediction", None),
+                target.lanelet_network,
+                lanelet_ids,
+            )
+    _record_assignments(target, shared_assignments)
@@ -0,0 +1,478 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import copy
+import hashlib
+import hmac
+import os
+import pickle
+import secrets
+import struct
+import tempfile
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from importlib import metadata
+from os import path
+from typing import Callable, List, Optional, Tuple
+
+from commonroad.scenario.lanelet import Lanelet, LaneletNetwork
+from commonroad.scenario.scenario import Scenario
+from crdesigner.common.config.config_base import Attribute
+from crdesigner.common.config.general_config import general_config
+from crdesigner.common.config.opendrive_config import open_drive_config
+
+from osc_cr_converter.utility.general import file_lock
+
+# suffix of the files of the cached maps
+_ENTRY_SUFFIX = ".pickle"
+# version of the cache entries, increased whenever their format changes
+_CACHE_VERSION = 3
+# header of an entry: magic, version and CPU time of the conversion, followed by the HMAC of the pickled scenario
+_HEADER = struct.Struct("<8sId")
+_MAGIC = b"OSCCRMAP"
+_DIGEST_SIZE = hashlib.sha256().digest_size
+# secret key authenticating the cache entries, outside of the cache directory by default
+DEFAULT_MAP_CACHE_KEY_FILE = path.join("~", ".osc_cr_converter", "map_cache.key")
+# estimated memory of a lanelet besides its vertices, e.g. its id sets and shapely objects
+_LANELET_OVERHEAD = 4096
+# attributes of a LaneletNetwork shared by its copies: the spatial index and the immutable shapely polygons
+_SHARED_NETWORK_ATTRIBUTES = (
+    "_strtee",
+    "_buffered_polygons",
+    "_lanelet_id_index_by_id",
+)
+
+
+class MapCache:
+    """
+    On-disk cache of OpenDRIVE maps converted to CommonRoad by the CommonRoad Scenario Designer.
+
+    A map is keyed by the content hash of its OpenDRIVE file, the versions of crdesigner and commonroad-io and the
+    conversion parameters of crdesigner, so a changed map, update or configuration converts the map again. The
+    converted scenario holding the lanelet network is pickled after a header holding the CPU time of its conversion,
+    so a repeated conversion of a map shared by many scenarios only loads the file.
+
+    The pickled scenario is authenticated by an HMAC with a secret key of the user, kept outside of the cache
+    directory, and only unpickled if it matches, so whoever can write to the cache directory cannot make the
+    converter execute code.
+
+    Concurrent processes converting the same map wait for each other by a lock per map, so each map is converted only
+    once, and entries are written atomically. If the cache exceeds its maximum size, the least recently used maps are
+    evicted.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int, key_file: Optional[str] = None):
+        """
+        :param cache_dir: The cache directory, created if missing
+        :param max_size: The maximum total size of the cached maps in bytes
+        :param key_file: The file of the secret key, created if missing, defaults to DEFAULT_MAP_CACHE_KEY_FILE
+        """
+        self.cache_dir = path.abspath(path.expanduser(cache_dir))
+        self.max_size = max_size
+        self.key_file = path.abspath(
+            path.expanduser(key_file or DEFAULT_MAP_CACHE_KEY_FILE)
+        )
+        self._key: Optional[bytes] = None
+
+    def key(self, odr_file: str) -> str:
+        """
+        Key of the map converted from the OpenDRIVE file with the current crdesigner version and configuration
+
+        :param odr_file: Path of the OpenDRIVE file
+        """
+        return map_key(odr_file)
+
+    def entry_path(self, key: str) -> str:
+        """
+        Path of the cached map of the key
+        """
+        return path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def load_or_convert(
+        self,
+        odr_file: str,
+        convert: Callable[[str], Scenario],
+        key: Optional[str] = None,
+    ) -> Tuple[Scenario, bool]:
+        """
+        Load the converted map of the OpenDRIVE file, converting and caching it first if it is not cached yet.
+
+        Each call returns a new Scenario object, so it can be modified freely.
+
+        :param odr_file: Path of the OpenDRIVE file
+        :param convert: Conversion of an OpenDRIVE file into a scenario, e.g. opendrive_to_commonroad
+        :param key: The key of the map if already known
+        :return: The converted map and whether it was loaded from the cache
+        """
+        if key is None:
+            key = self.key(odr_file)
+        entry_path = self.entry_path(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with file_lock(path.join(self.cache_dir, key + ".lock"), remove=True):
+            scenario = self._load(entry_path)
+            if scenario is not None:
+                return scenario, True
+            scenario, _ = self._convert_and_store(entry_path, odr_file, convert)
+        self._evict()
+        return scenario, False
+
+    def prewarm(
+        self,
+        odr_file: str,
+        convert: Callable[[str], Scenario],
+        key: Optional[str] = None,
+    ) -> Tuple[float, bool]:
+        """
+        Convert and cache the map of the OpenDRIVE file if it is not cached yet, without loading a cached map.
+
+        :param odr_file: Path of the OpenDRIVE file
+        :param convert: Conversion of an OpenDRIVE file into a scenario, e.g. opendrive_to_commonroad
+        :param key: The key of the map if already known
+        :return: The CPU time in seconds converting the map took, also if it was converted before, and whether it was
+            already cached
+        """
+        if key is None:
+            key = self.key(odr_file)
+        entry_path = self.entry_path(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with file_lock(path.join(self.cache_dir, key + ".lock"), remove=True):
+            conversion_time = self._load_conversion_time(entry_path)
+            if conversion_time is not None:
+                _touch(entry_path)
+                return conversion_time, True
+            _, conversion_time = self._convert_and_store(entry_path, odr_file, convert)
+        self._evict()
+        return conversion_time, False
+
+    def _convert_and_store(
+        self, entry_path: str, odr_file: str, convert: Callable[[str], Scenario]
+    ) -> Tuple[Scenario, float]:
+        start_time = time.process_time()
+        scenario = convert(odr_file)
+        conversion_time = time.process_time() - start_time
+        self._store(entry_path, scenario, conversion_time)
+        return scenario, conversion_time
+
+    @staticmethod
+    def _load_conversion_time(entry_path: str) -> Optional[float]:
+        if not path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, "rb") as file:
+                magic, version, conversion_time = _HEADER.unpack(
+                    file.read(_HEADER.size)
+                )
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or version != _CACHE_VERSION:
+            return None
+        return conversion_time
+
+    def _load(self, entry_path: str):
+        if not path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, "rb") as file:
+                magic, version, _ = _HEADER.unpack(file.read(_HEADER.size))
+                if magic != _MAGIC or version != _CACHE_VERSION:
+                    return None
+                digest = file.read(_DIGEST_SIZE)
+                data = file.read()
+            # only data written with the key of the user is unpickled
+            if not hmac.compare_digest(digest, self._digest(data)):
+                raise ValueError("the HMAC does not match")
+            scenario = pickle.loads(data)
+        except Exception as e:
+            warnings.warn(
+                f"<MapCache/load> Ignoring unreadable cache entry {entry_path}: {e}"
+            )
+            return None
+        _touch(entry_path)
+        return scenario
+
+    def _store(self, entry_path: str, scenario: Scenario, conversion_time: float):
+        try:
+            data = pickle.dumps(scenario, protocol=pickle.HIGHEST_PROTOCOL)
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".", suffix=".tmp", dir=self.cache_dir
+            )
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(_HEADER.pack(_MAGIC, _CACHE_VERSION, conversion_time))
+                    file.write(self._digest(data))
+                    file.write(data)
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            # the converted map is still usable without caching it
+            warnings.warn(f"<MapCache/store> Failed to cache {entry_path}: {e}")
+
+    def _digest(self, data: bytes) -> bytes:
+        if self._key is None:
+            self._key = _load_or_create_key(self.key_file)
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _evict(self):
+        """
+        Remove the least recently used maps until the cache fits into its maximum size
+        """
+        with file_lock(path.join(self.cache_dir, "map_cache.lock")):
+            entries: List[Tuple[float, int, str]] = []
+            for file_name in os.listdir(self.cache_dir):
+                if not file_name.endswith(_ENTRY_SUFFIX):
+                    continue
+                entry_path = path.join(self.cache_dir, file_name)
+                try:
+                    stat = os.stat(entry_path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, entry_path in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                try:
+                    os.remove(entry_path)
+                except FileNotFoundError:
+                    pass
+                total_size -= size
+
+    def size(self) -> int:
+        """
+        Total size of the cached maps in bytes
+        """
+        if not path.isdir(self.cache_dir):
+            return 0
+        return sum(
+            path.getsize(path.join(self.cache_dir, file_name))
+            for file_name in os.listdir(self.cache_dir)
+            if file_name.endswith(_ENTRY_SUFFIX)
+        )
+
+
+class MapMemoryCache:
+    """
+    In-process LRU cache of converted maps, keyed like the MapCache.
+
+    The cached scenarios are never handed out, each lookup returns a structurally shared copy (see share_scenario)
+    instead, so converting scenarios on the same map neither converts nor deep copies it. If the estimated memory of
+    the cached maps exceeds the maximum, the least recently used maps are evicted.
+    """
+
+    _shared: Optional["MapMemoryCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_memory: int):
+        """
+        :param max_memory: The maximum estimated memory of the cached maps in bytes
+        """
+        self.max_memory = max_memory
+        self._maps: "OrderedDict[str, Tuple[Scenario, int]]" = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls, max_memory: int) -> "MapMemoryCache":
+        """
+        The cache shared by all converters of this process
+
+        :param max_memory: The maximum estimated memory of the cached maps in bytes
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = MapMemoryCache(max_memory)
+            cls._shared.max_memory = max_memory
+            return cls._shared
+
+    @property
+    def memory(self) -> int:
+        """
+        Estimated memory of the cached maps in bytes
+        """
+        return self._memory
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def get(self, key: str) -> Optional[Scenario]:
+        """
+        A copy of the cached map of the key, None if it is not cached
+        """
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._maps.move_to_end(key)
+            self.hits += 1
+        return share_scenario(cached[0])
+
+    def put(self, key: str, scenario: Scenario):
+        """
+        Cache the map, which must not be modified afterwards
+
+        :param key: The key of the map
+        :param scenario: The scenario containing the converted map and no obstacles
+        """
+        memory = estimate_memory(scenario)
+        with self._lock:
+            previous = self._maps.pop(key, None)
+            if previous is not None:
+                self._memory -= previous[1]
+            if memory > self.max_memory:
+                return
+            self._maps[key] = (scenario, memory)
+            self._memory += memory
+            while self._memory > self.max_memory:
+                _, (_, evicted_memory) = self._maps.popitem(last=False)
+                self._memory -= evicted_memory
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+            self._memory = 0
+
+
+def map_key(odr_file: str) -> str:
+    """
+    Key of the map converted from the OpenDRIVE file with the current crdesigner version and configuration
+
+    :param odr_file: Path of the OpenDRIVE file
+    """
+    key_hash = hashlib.sha256()
+    with open(odr_file, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            key_hash.update(chunk)
+    key_hash.update(repr(_conversion_parameters()).encode())
+    return key_hash.hexdigest()
+
+
+def estimate_memory(scenario: Scenario) -> int:
+    """
+    Estimated memory of the map of the scenario in bytes, dominated by the vertices of its lanelets, which are also
+    repeated by the polygons of each lanelet
+    """
+    return sum(
+        3
+        * (
+            lanelet.left_vertices.nbytes
+            + lanelet.right_vertices.nbytes
+            + lanelet.center_vertices.nbytes
+        )
+        + _LANELET_OVERHEAD
+        for lanelet in scenario.lanelet_network.lanelets
+    )
+
+
+def share_scenario(scenario: Scenario) -> Scenario:
+    """
+    Copy the scenario, sharing the immutable geometry of its map with the original.
+
+    The lanelets are copied shallowly, sharing their vertices and polygons, while all their containers, e.g. their
+    successors or the obstacles on the lanelet, are copied. The lanelet network shares the spatial index of the
+    lanelets and copies everything else. Hence, the copy can be modified like a deep copy by adding obstacles,
+    assigning them to lanelets or removing lanelets, as long as the vertices of the lanelets are not changed in place.
+
+    :param scenario: The scenario to copy
+    :return: The copy
+    """
+    shared = _shallow_copy(scenario)
+    for name, value in vars(scenario).items():
+        if isinstance(value, LaneletNetwork):
+            setattr(shared, name, _share_lanelet_network(value))
+        elif isinstance(value, (dict, list, set)):
+            setattr(shared, name, copy.copy(value))
+    shared.scenario_id = copy.copy(scenario.scenario_id)
+    return shared
+
+
+def _share_lanelet_network(network: LaneletNetwork) -> LaneletNetwork:
+    shared = _shallow_copy(network)
+    for name, value in vars(network).items():
+        if name == "_lanelets":
+            shared._lanelets = {
+                lanelet_id: _share_lanelet(lanelet)
+                for lanelet_id, lanelet in value.items()
+            }
+        elif name in _SHARED_NETWORK_ATTRIBUTES:
+            setattr(shared, name, copy.copy(value))
+        else:
+            setattr(shared, name, copy.deepcopy(value))
+    return shared
+
+
+def _share_lanelet(lanelet: Lanelet) -> Lanelet:
+    shared = _shallow_copy(lanelet)
+    for name, value in vars(lanelet).items():
+        if isinstance(value, dict):
+            setattr(shared, name, {key: copy.copy(v) for key, v in value.items()})
+        elif isinstance(value, (list, set)):
+            setattr(shared, name, copy.copy(value))
+    return shared
+
+
+def _load_or_create_key(key_file: str) -> bytes:
+    """
+    Read the secret key from the file, creating it readable only by the user if missing
+    """
+    if not path.exists(key_file):
+        os.makedirs(path.dirname(key_file), mode=0o700, exist_ok=True)
+        # mkstemp creates the file readable only by the user
+        fd, tmp_path = tempfile.mkstemp(dir=path.dirname(key_file))
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(secrets.token_bytes(32))
+            # linking fails if a concurrent process created the key first
+            os.link(tmp_path, key_file)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    with open(key_file, "rb") as file:
+        key = file.read()
+    if len(key) == 0:
+        raise ValueError(f"empty key file {key_file}")
+    return key
+
+
+def _touch(entry_path: str):
+    try:
+        # marks the entry as recently used for the eviction
+        os.utime(entry_path)
+    except FileNotFoundError:
+        pass
+
+
+def _shallow_copy(obj):
+    # copy.copy would pickle the LaneletNetwork, rebuilding its spatial index
+    shared = obj.__class__.__new__(obj.__class__)
+    shared.__dict__.update(obj.__dict__)
+    return shared
+
+
+def _conversion_parameters() -> Tuple:
+    """
+    Everything besides the OpenDRIVE file influencing the converted map
+    """
+    return (
+        _CACHE_VERSION,
+        metadata.version("commonroad-scenario-designer"),
+        metadata.version("commonroad-io"),
+        tuple(
+            (name, repr(attribute.value))
+            for config in (general_config, open_drive_config)
+            for name, attribute in sorted(vars(type(config)).items())
+            if isinstance(attribute, Attribute)
+        ),
+    )
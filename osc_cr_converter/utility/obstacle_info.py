@@ -8,69 +8,62 @@ __status__ = "Pre-alpha"
 
 import os
 import warnings
-import xml.etree.ElementTree as Et
 from dataclasses import dataclass
 from os import path
-from typing import Dict, Optional, Set, Union
+from typing import Dict, List, Optional, Set, Union
 
-from scenariogeneration.xosc import (
-    Vehicle,
-    ParseOpenScenario,
-    Scenario,
-    CatalogReference,
-    Catalog,
-)
+from scenariogeneration.xosc import Vehicle, Catalog
 
 from osc_cr_converter.analyzer.error import AnalyzerErrorResult
+from osc_cr_converter.utility.catalog_index import CatalogIndex
 from osc_cr_converter.utility.general import dataclass_is_complete
+from osc_cr_converter.utility.parsed_scenario import ParsedScenario
 
 
 @dataclass
 class ObstacleExtraInfoFinder:
     scenario_path: str = None
     obstacle_names: Set[str] = None
+    # the already parsed scenario file, parsed on demand if not given
+    parsed_scenario: Optional[ParsedScenario] = None
+    # index of the catalog entries, defaults to the in-memory index shared by the process
+    catalog_index: Optional[CatalogIndex] = None
 
     def run(self) -> Union[AnalyzerErrorResult, Dict[str, Optional[Vehicle]]]:
         assert dataclass_is_complete(self)
         try:
-            scenario: Scenario = ParseOpenScenario(self.scenario_path)
+            if self.parsed_scenario is None:
+                self.parsed_scenario = ParsedScenario.parse(self.scenario_path)
+            scenario_objects = self.parsed_scenario.scenario_objects
 
             matched_obstacles: Dict[str, Vehicle] = {
                 o_name: None for o_name in self.obstacle_names
             }
-            for scenario_object in scenario.entities.scenario_objects:
-                if scenario_object.name not in matched_obstacles.keys():
+            for o_name in matched_obstacles.keys():
+                if o_name not in scenario_objects:
                     continue
-                if scenario_object.name in self.obstacle_names and isinstance(
-                    scenario_object.entityobject, Vehicle
-                ):
-                    matched_obstacles[
-                        scenario_object.name
-                    ] = scenario_object.entityobject
+                vehicle = scenario_objects[o_name].find("Vehicle")
+                if vehicle is not None:
+                    matched_obstacles[o_name] = Vehicle.parse(vehicle)
 
             if all([obstacle is not None for obstacle in matched_obstacles.values()]):
                 return matched_obstacles
 
-            catalogs = self._parse_catalogs(scenario)
-            for scenario_object in scenario.entities.scenario_objects:
-                if scenario_object.name not in matched_obstacles.keys():
+            if self.catalog_index is None:
+                self.catalog_index = CatalogIndex.shared()
+            catalog_files = self._find_catalog_files()
+            for o_name, obstacle in matched_obstacles.items():
+                if obstacle is not None or o_name not in scenario_objects:
                     continue
-                if (
-                    scenario_object.name in matched_obstacles
-                    and matched_obstacles[scenario_object.name] is not None
-                ):
+                catalog_reference = scenario_objects[o_name].find("CatalogReference")
+                if catalog_reference is None:
                     continue
-                if isinstance(scenario_object.entityobject, CatalogReference):
-                    if scenario_object.entityobject.catalogname in catalogs:
-                        for obj in catalogs[scenario_object.entityobject.catalogname]:
-                            if (
-                                obj.tag == "Vehicle"
-                                and obj.attrib["name"]
-                                == scenario_object.entityobject.entryname
-                            ):
-                                matched_obstacles[scenario_object.name] = Vehicle.parse(
-                                    obj
-                                )
+                matched_obstacles[o_name] = self.catalog_index.find_vehicle(
+                    catalog_files,
+                    catalog_reference.attrib.get("catalogName"),
+                    catalog_reference.attrib.get("entryName"),
+                )
+            self.catalog_index.save()
 
             return matched_obstacles
         except Exception as e:
@@ -79,22 +72,20 @@ class ObstacleExtraInfoFinder:
             )
             return AnalyzerErrorResult.from_exception(e)
 
-    def _parse_catalogs(self, scenario: Scenario) -> Dict[str, Et.Element]:
+    def _find_catalog_files(self) -> List[str]:
         assert (
             "VehicleCatalog" in Catalog._CATALOGS
         ), "Probably the OpenSCENARIO standard changed"
-        if "VehicleCatalog" in scenario.catalog.catalogs:
+        catalog_locations = self.parsed_scenario.catalog_locations
+        if "VehicleCatalog" in catalog_locations:
             # Prefer the VehicleCatalog by inserting it at first
-            catalog_locations = [scenario.catalog.catalogs["VehicleCatalog"]]
-            catalog_locations.extend(
-                [
-                    location
-                    for l_name, location in scenario.catalog.catalogs.items()
-                    if l_name != "VehicleCatalog"
-                ]
-            )
+            catalog_locations = [catalog_locations["VehicleCatalog"]] + [
+                location
+                for l_name, location in catalog_locations.items()
+                if l_name != "VehicleCatalog"
+            ]
         else:
-            catalog_locations = scenario.catalog.catalogs.values()
+            catalog_locations = catalog_locations.values()
 
         catalog_files = []
         for catalog_path in catalog_locations:
@@ -103,14 +94,4 @@ class ObstacleExtraInfoFinder:
                 file = path.join(catalog_path, file)
                 if path.isfile(file):
                     catalog_files.append(file)
-
-        return {
-            catalog.attrib["name"]: catalog
-            for catalog_file in catalog_files
-            if (catalog := self._parse_single_catalog(catalog_file)) is not None
-        }
-
-    @staticmethod
-    def _parse_single_catalog(catalog_file) -> Optional[Et.Element]:
-        root = Et.parse(catalog_file)
-        return root.find("Catalog")
+        return catalog_files
@@ -0,0 +1,183 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import itertools
+import math
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import Element
+
+import numpy as np
+
+# attempts to draw a value of a bounded normal distribution within its range, before clipping it
+_MAX_REJECTIONS = 100
+
+
+def expand_parameter_value_distribution(
+    root: Element, default_seed: int = 0
+) -> List[Dict[str, str]]:
+    """
+    Expand the ParameterValueDistribution of an OpenSCENARIO file into the concrete parameter sets of its variants.
+
+    A deterministic distribution yields every combination of the values of its single parameter distributions and
+    the parameter value sets of its multi parameter distributions. A stochastic distribution yields numberOfTestRuns
+    parameter sets, each drawing all parameters independently, reproducibly using its randomSeed.
+
+    :param root: The root element of the OpenSCENARIO file
+    :param default_seed: The seed used if a stochastic distribution defines no randomSeed
+    :return: The values per parameter name of each variant
+    """
+    distribution = root.find("ParameterValueDistribution")
+    if distribution is None:
+        raise ValueError(
+            "<ParameterDistribution> File contains no ParameterValueDistribution"
+        )
+    deterministic = distribution.find("Deterministic")
+    if deterministic is not None:
+        return _expand_deterministic(deterministic)
+    stochastic = distribution.find("Stochastic")
+    if stochastic is not None:
+        return _expand_stochastic(stochastic, default_seed)
+    raise ValueError(
+        "<ParameterDistribution> ParameterValueDistribution is neither Deterministic nor Stochastic"
+    )
+
+
+def _expand_deterministic(deterministic: Element) -> List[Dict[str, str]]:
+    components: List[List[Dict[str, str]]] = []
+    for element in deterministic:
+        if element.tag == "DeterministicSingleParameterDistribution":
+            name = _attribute(element, "parameterName")
+            components.append(
+                [{name: value} for value in _deterministic_values(element)]
+            )
+        elif element.tag == "DeterministicMultiParameterDistribution":
+            components.append(
+                [
+                    {
+                        _attribute(assignment, "parameterRef"): _attribute(
+                            assignment, "value"
+                        )
+                        for assignment in value_set.iterfind("ParameterAssignment")
+                    }
+                    for value_set in element.iterfind(
+                        "ValueSetDistribution/ParameterValueSet"
+                    )
+                ]
+            )
+    parameter_sets = []
+    for combination in itertools.product(*components):
+        parameter_set = {}
+        for parameters in combination:
+            parameter_set.update(parameters)
+        parameter_sets.append(parameter_set)
+    return parameter_sets
+
+
+def _deterministic_values(distribution: Element) -> List[str]:
+    distribution_set = distribution.find("DistributionSet")
+    if distribution_set is not None:
+        return [
+            _attribute(element, "value")
+            for element in distribution_set.iterfind("Element")
+        ]
+    distribution_range = distribution.find("DistributionRange")
+    if distribution_range is not None:
+        step_width = _number(distribution_range, "stepWidth")
+        lower, upper = _range(distribution_range)
+        if step_width <= 0:
+            raise ValueError(
+                f"<ParameterDistribution> Invalid stepWidth {step_width} of a DistributionRange"
+            )
+        # the tolerance keeps the upper limit, if it is a multiple of the step width apart from the lower limit
+        num_steps = math.floor((upper - lower) / step_width + 1e-9)
+        return [_format(lower + i * step_width) for i in range(num_steps + 1)]
+    raise ValueError(
+        f"<ParameterDistribution> Unsupported distribution of parameter {_attribute(distribution, 'parameterName')}"
+    )
+
+
+def _expand_stochastic(stochastic: Element, default_seed: int) -> List[Dict[str, str]]:
+    num_test_runs = int(_number(stochastic, "numberOfTestRuns"))
+    seed = stochastic.attrib.get("randomSeed")
+    rng = np.random.default_rng(int(float(seed)) if seed is not None else default_seed)
+    distributions = [
+        (_attribute(distribution, "parameterName"), distribution)
+        for distribution in stochastic.iterfind("StochasticDistribution")
+    ]
+    return [
+        {name: _draw(distribution, rng) for name, distribution in distributions}
+        for _ in range(num_test_runs)
+    ]
+
+
+def _draw(distribution: Element, rng: np.random.Generator) -> str:
+    normal = distribution.find("NormalDistribution")
+    if normal is not None:
+        mean = _number(normal, "expectedValue")
+        std = math.sqrt(_number(normal, "variance"))
+        bounds = _range(normal) if normal.find("Range") is not None else None
+        for _ in range(_MAX_REJECTIONS):
+            value = rng.normal(mean, std)
+            if bounds is None or bounds[0] <= value <= bounds[1]:
+                return _format(value)
+        return _format(min(max(value, bounds[0]), bounds[1]))
+
+    uniform = distribution.find("UniformDistribution")
+    if uniform is not None:
+        return _format(rng.uniform(*_range(uniform)))
+
+    poisson = distribution.find("PoissonDistribution")
+    if poisson is not None:
+        value = int(rng.poisson(_number(poisson, "expectedValue")))
+        if poisson.find("Range") is not None:
+            lower, upper = _range(poisson)
+            value = min(max(value, math.ceil(lower)), math.floor(upper))
+        return str(value)
+
+    histogram = distribution.find("Histogram")
+    if histogram is not None:
+        bins = histogram.findall("Bin")
+        weights = np.array([_number(histogram_bin, "weight") for histogram_bin in bins])
+        histogram_bin = bins[rng.choice(len(bins), p=weights / weights.sum())]
+        return _format(rng.uniform(*_range(histogram_bin)))
+
+    probability_set = distribution.find("ProbabilityDistributionSet")
+    if probability_set is not None:
+        elements = probability_set.findall("Element")
+        weights = np.array([_number(element, "weight") for element in elements])
+        element = elements[rng.choice(len(elements), p=weights / weights.sum())]
+        return _attribute(element, "value")
+
+    raise ValueError(
+        f"<ParameterDistribution> Unsupported distribution of parameter {_attribute(distribution, 'parameterName')}"
+    )
+
+
+def _attribute(element: Element, name: str) -> str:
+    value: Optional[str] = element.attrib.get(name)
+    if value is None:
+        raise ValueError(
+            f"<ParameterDistribution> {element.tag} is missing the attribute {name}"
+        )
+    return value
+
+
+def _number(element: Element, name: str) -> float:
+    return float(_attribute(element, name))
+
+
+def _range(element: Element) -> Tuple[float, float]:
+    value_range = element.find("Range")
+    if value_range is None:
+        raise ValueError(f"<ParameterDistribution> {element.tag} is missing its Range")
+    return _number(value_range, "lowerLimit"), _number(value_range, "upperLimit")
+
+
+def _format(value: float) -> str:
+    # avoids accumulated floating point errors like 0.30000000000000004 in the parameter values
+    return format(float(value), ".12g")
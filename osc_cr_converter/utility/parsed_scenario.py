@@ -0,0 +1,142 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import re
+import xml.etree.ElementTree as Et
+from dataclasses import dataclass, field
+from os import path
+from typing import Dict, Iterable, Optional, Set
+
+from osc_cr_converter.utility.sim_time_budget import SimTimeBudget
+
+# elements of the storyboard whose content is not needed by the converter, e.g. trajectories of actions
+_DISCARDED_STORYBOARD_ELEMENTS = {"Action", "PrivateAction", "GlobalAction"}
+# elements read by the converter once per scenario, without resolving the parameters they reference
+_UNRESOLVED_ELEMENTS = ("RoadNetwork", "Entities")
+_PARAMETER_REFERENCE = re.compile(r"\$([A-Za-z_]\w*)")
+
+
+@dataclass(frozen=True)
+class ParsedScenario:
+    """
+    The information of an OpenSCENARIO file needed by the converter, parsed once and shared by all conversion stages
+
+    Attributes
+        source_file absolute path of the OpenSCENARIO file
+        has_storyboard whether the file defines a Storyboard
+        is_catalog whether the file defines a Catalog
+        is_parameter_value_distribution whether the file defines a ParameterValueDistribution
+        referenced_scenario_file OpenSCENARIO file referenced by the ParameterValueDistribution, if any
+        logic_file OpenDRIVE file of the RoadNetwork, if any
+        catalog_locations directory per catalog type, e.g. VehicleCatalog, relative to the OpenSCENARIO file
+        scenario_objects ScenarioObject elements per name
+        sim_time_budget time budget derived from the SimulationTimeConditions of the storyboard
+        root root element of the file without the discarded storyboard elements
+    """
+
+    source_file: str
+    has_storyboard: bool
+    is_catalog: bool
+    is_parameter_value_distribution: bool
+    referenced_scenario_file: Optional[str]
+    logic_file: Optional[str]
+    catalog_locations: Dict[str, str]
+    scenario_objects: Dict[str, Et.Element]
+    sim_time_budget: SimTimeBudget
+    root: Et.Element = field(repr=False, compare=False)
+
+    @staticmethod
+    def parse(source_file: str) -> "ParsedScenario":
+        """
+        Parse the OpenSCENARIO file in a single pass. The actions of the storyboard, which contain e.g. the inline
+        trajectories, are discarded while parsing, so they are never kept in memory completely.
+
+        :param source_file: The OpenSCENARIO file
+        :return: The parsed information
+        """
+        source_file = path.abspath(source_file)
+        root = None
+        storyboard_depth = None
+        depth = 0
+        for event, element in Et.iterparse(source_file, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                elif depth == 1 and element.tag == "Storyboard":
+                    storyboard_depth = depth
+                depth += 1
+                continue
+            depth -= 1
+            if storyboard_depth is not None:
+                if depth == storyboard_depth:
+                    storyboard_depth = None
+                elif element.tag in _DISCARDED_STORYBOARD_ELEMENTS:
+                    element.clear()
+
+        directory = path.dirname(source_file)
+        referenced_scenario_file = None
+        pvd = root.find("ParameterValueDistribution")
+        if (
+            pvd is not None
+            and (scenario_file := pvd.find("ScenarioFile[@filepath]")) is not None
+        ):
+            referenced_scenario_file = path.join(
+                directory, scenario_file.attrib["filepath"]
+            )
+        logic_file = root.find("RoadNetwork/LogicFile[@filepath]")
+
+        return ParsedScenario(
+            source_file=source_file,
+            has_storyboard=root.find("Storyboard") is not None,
+            is_catalog=root.find("Catalog") is not None,
+            is_parameter_value_distribution=pvd is not None,
+            referenced_scenario_file=referenced_scenario_file,
+            logic_file=path.join(directory, logic_file.attrib["filepath"])
+            if logic_file is not None
+            else None,
+            catalog_locations={
+                catalog.tag: directory_element.attrib["path"]
+                for catalog in root.iterfind("CatalogLocations/*")
+                if (directory_element := catalog.find("Directory[@path]")) is not None
+            },
+            scenario_objects={
+                scenario_object.attrib["name"]: scenario_object
+                for scenario_object in root.iterfind("Entities/ScenarioObject[@name]")
+            },
+            sim_time_budget=SimTimeBudget.from_xosc_root(root),
+            root=root,
+        )
+
+    def variant_sim_time_budget(
+        self, parameter_values: Dict[str, str]
+    ) -> SimTimeBudget:
+        """
+        The time budget of a variant of the scenario, e.g. of a ParameterValueDistribution
+
+        :param parameter_values: Values overriding the declared values of global parameters
+        :return: The time budget
+        """
+        return SimTimeBudget.from_xosc_root(self.root, parameter_values)
+
+    def unresolved_parameters(self, parameter_names: Iterable[str]) -> Set[str]:
+        """
+        The parameters referenced by the RoadNetwork or the Entities of the scenario. The converter reads these
+        elements as written, so the map and the catalog entries do not depend on the values of these parameters.
+
+        :param parameter_names: Names of the parameters, e.g. of the variants of a ParameterValueDistribution
+        :return: The referenced ones of the given parameters
+        """
+        referenced = set()
+        for tag in _UNRESOLVED_ELEMENTS:
+            element = self.root.find(tag)
+            if element is None:
+                continue
+            for child in element.iter():
+                for value in child.attrib.values():
+                    referenced.update(_PARAMETER_REFERENCE.findall(value))
+        return referenced.intersection(parameter_names)
@@ -0,0 +1,68 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import copy
+from typing import Union
+
+from commonroad.scenario.obstacle import DynamicObstacle, StaticObstacle
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.utility.lanelet_assignment import share_assignments
+from osc_cr_converter.utility.map_cache import share_scenario
+
+
+def scenario_view(scenario: Scenario) -> Scenario:
+    """
+    Create a lightweight view of the scenario, which can be trimmed without a deep copy.
+
+    The view shares the geometry of the lanelets like share_scenario and the trajectories and shapes of the obstacles
+    with the original. Only the containers modified by trimming, i.e. the lanelet set and references, the obstacles
+    on each lanelet and the lanelet assignments of the obstacles, are copied. Hence, removing lanelets from the view
+    or assigning its obstacles to lanelets leaves the original untouched, while the trajectories must not be changed
+    in place.
+
+    :param scenario: The scenario to view
+    :return: The view, which can be passed to trim_scenario with deep_copy=False
+    """
+    view = share_scenario(scenario)
+    view._dynamic_obstacles = {
+        obstacle_id: share_obstacle(obstacle)
+        for obstacle_id, obstacle in scenario._dynamic_obstacles.items()
+    }
+    view._static_obstacles = {
+        obstacle_id: share_obstacle(obstacle)
+        for obstacle_id, obstacle in scenario._static_obstacles.items()
+    }
+    share_assignments(scenario, view)
+    return view
+
+
+def share_obstacle(
+    obstacle: Union[DynamicObstacle, StaticObstacle]
+) -> Union[DynamicObstacle, StaticObstacle]:
+    """
+    Copy the obstacle for a scenario view, sharing its trajectory and shape, but not its lanelet assignments
+
+    :param obstacle: The obstacle to copy
+    :return: The copy, whose lanelet assignments can be changed without changing the original
+    """
+    shared = copy.copy(obstacle)
+    shared.initial_shape_lanelet_ids = copy.copy(obstacle.initial_shape_lanelet_ids)
+    shared.initial_center_lanelet_ids = copy.copy(obstacle.initial_center_lanelet_ids)
+    prediction = getattr(obstacle, "prediction", None)
+    if prediction is not None:
+        shared.prediction = copy.copy(prediction)
+        for name in ("shape_lanelet_assignment", "center_lanelet_assignment"):
+            assignment = getattr(prediction, name)
+            if assignment is not None:
+                setattr(
+                    shared.prediction,
+                    name,
+                    {time_step: set(ids) for time_step, ids in assignment.items()},
+                )
+    return shared
@@ -0,0 +1,142 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+from xml.etree.ElementTree import Element
+
+# rules of a SimulationTimeCondition which become true once the time passes the value
+_PASSING_RULES = {"greaterThan", "greaterOrEqual", "equalTo"}
+# edges of a condition which fire when the condition becomes true
+_FIRING_EDGES = {"none", "rising", "risingOrFalling"}
+
+
+@dataclass(frozen=True)
+class SimTimeBudget:
+    """
+    Time budget of a scenario derived from its SimulationTimeConditions before simulating it
+
+    Attributes
+        stop_time simulation time by which the StopTrigger of the storyboard has fired, None if no condition group
+            depends on the simulation time only
+        estimated_stop_time expected simulation time at which the StopTrigger fires, before which no condition group
+            depending on the simulation time can fire, None if no condition group depends on the simulation time
+        required_time simulation time until which events are started by the simulation time
+    """
+
+    stop_time: Optional[float]
+    estimated_stop_time: Optional[float]
+    required_time: float
+
+    @staticmethod
+    def from_xosc_root(
+        root: Element, parameter_values: Optional[Dict[str, str]] = None
+    ) -> "SimTimeBudget":
+        """
+        Derive the time budget from the root element of an OpenSCENARIO file
+
+        :param root: The root element of the OpenSCENARIO file
+        :param parameter_values: Values overriding the declared values of global parameters, e.g. of a variant
+        :return: The time budget
+        """
+        parameters = _global_parameters(root)
+        if parameter_values is not None:
+            parameters.update(parameter_values)
+
+        stop_time = None
+        estimated_stop_time = None
+        stop_trigger = root.find("Storyboard/StopTrigger")
+        if stop_trigger is not None:
+            # The trigger fires once any of its condition groups fires, and a group fires once all its conditions are
+            # true. A group can therefore not fire before its latest SimulationTimeCondition, which is only a lower
+            # bound if the group contains further conditions, and fires right then if it does not.
+            for condition_group in stop_trigger.findall("ConditionGroup"):
+                conditions = condition_group.findall("Condition")
+                condition_times = [
+                    condition_time
+                    for condition in conditions
+                    if (condition_time := _condition_time(condition, parameters))
+                    is not None
+                ]
+                if len(condition_times) == 0:
+                    continue
+                group_stop_time = max(condition_times)
+                estimated_stop_time = _min(estimated_stop_time, group_stop_time)
+                if len(condition_times) == len(conditions):
+                    stop_time = _min(stop_time, group_stop_time)
+
+        required_time = 0.0
+        for start_trigger in root.iterfind("Storyboard/Story//StartTrigger"):
+            for condition in start_trigger.iterfind("ConditionGroup/Condition"):
+                condition_time = _condition_time(condition, parameters)
+                if condition_time is not None:
+                    required_time = max(required_time, condition_time)
+
+        return SimTimeBudget(
+            stop_time=stop_time,
+            estimated_stop_time=estimated_stop_time,
+            required_time=required_time,
+        )
+
+    def max_time(self, default_max_time: float, margin: float) -> float:
+        """
+        The maximum simulation time of the scenario
+
+        :param default_max_time: The maximum simulation time used, if the StopTrigger does not surely fire by a
+            simulation time
+        :param margin: Additional simulation time after the StopTrigger fired or the last timed event started
+        :return: The maximum simulation time
+        """
+        if self.stop_time is not None:
+            return self.stop_time + margin
+        # the estimated stop time is only a lower bound, so the simulation must not end before it
+        max_time = max(default_max_time, self.required_time + margin)
+        if self.estimated_stop_time is not None:
+            max_time = max(max_time, self.estimated_stop_time + margin)
+        return max_time
+
+
+def _min(value: Optional[float], other: float) -> float:
+    return other if value is None else min(value, other)
+
+
+def _global_parameters(root: Element) -> Dict[str, str]:
+    return {
+        declaration.attrib["name"]: declaration.attrib["value"]
+        for declaration in root.iterfind("ParameterDeclarations/ParameterDeclaration")
+        if "name" in declaration.attrib and "value" in declaration.attrib
+    }
+
+
+def _resolve_number(
+    value: Optional[str], parameters: Dict[str, str]
+) -> Optional[float]:
+    if value is not None and value.startswith("$") and not value.startswith("${"):
+        value = parameters.get(value[1:])
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _condition_time(condition: Element, parameters: Dict[str, str]) -> Optional[float]:
+    """
+    Simulation time at which the condition fires, if it is a SimulationTimeCondition, else None
+    """
+    sim_time_condition = condition.find("ByValueCondition/SimulationTimeCondition")
+    if sim_time_condition is None:
+        return None
+    if condition.attrib.get("conditionEdge", "none") not in _FIRING_EDGES:
+        return None
+    if sim_time_condition.attrib.get("rule") not in _PASSING_RULES:
+        return None
+    value = _resolve_number(sim_time_condition.attrib.get("value"), parameters)
+    delay = _resolve_number(condition.attrib.get("delay", "0"), parameters)
+    if value is None or delay is None:
+        return None
+    return max(0.0, value) + delay
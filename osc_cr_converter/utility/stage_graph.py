@@ -0,0 +1,95 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class _Stage:
+    function: Callable[..., Any]
+    depends_on: Tuple[str, ...]
+
+
+class StageGraph:
+    """
+    A small directed acyclic graph of the stages of a conversion.
+
+    Each stage is called with the results of the stages it depends on as keyword arguments. Running the graph
+    concurrently starts every stage as soon as its dependencies are finished, so independent stages, e.g. the
+    simulation with esmini and the conversion of the map with crdesigner, overlap and the runtime of the graph is
+    the runtime of its longest path instead of the sum of all stages.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, _Stage] = {}
+        # runtime in seconds of each finished stage
+        self.runtimes: Dict[str, float] = {}
+
+    def add(
+        self, name: str, function: Callable[..., Any], depends_on: Sequence[str] = ()
+    ):
+        """
+        Add a stage to the graph
+
+        :param name: The unique name of the stage, which is also the keyword of its result for depending stages
+        :param function: The stage, called with the results of its dependencies
+        :param depends_on: Names of the already added stages, whose results are needed by the stage
+        """
+        if name in self._stages:
+            raise ValueError(f"<StageGraph/add> Stage {name} is already added")
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(
+                    f"<StageGraph/add> Stage {name} depends on unknown stage {dependency}"
+                )
+        self._stages[name] = _Stage(function, tuple(depends_on))
+
+    def run(self, concurrent: bool = True) -> Dict[str, Any]:
+        """
+        Run all stages, raising the exception of the first failed stage after the running stages finished
+
+        :param concurrent: Whether independent stages run concurrently in threads, otherwise the stages run one after
+            another in the order they were added
+        :return: The result of each stage
+        """
+        results: Dict[str, Any] = {}
+        if not concurrent or len(self._stages) <= 1:
+            for name, stage in self._stages.items():
+                results[name] = self._run_stage(name, stage, results)
+            return results
+
+        with ThreadPoolExecutor(len(self._stages)) as executor:
+            pending = dict(self._stages)
+            running: Dict[Future, str] = {}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        del pending[name]
+                        running[
+                            executor.submit(self._run_stage, name, stage, results)
+                        ] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        # the running stages cannot be interrupted, the remaining ones are not started
+                        wait(running)
+                        raise future.exception()
+                    results[name] = future.result()
+        return results
+
+    def _run_stage(self, name: str, stage: _Stage, results: Dict[str, Any]) -> Any:
+        start_time = time.time()
+        result = stage.function(
+            **{dependency: results[dependency] for dependency in stage.depends_on}
+        )
+        self.runtimes[name] = time.time() - start_time
+        return result
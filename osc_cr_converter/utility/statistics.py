@@ -25,6 +25,11 @@ class ConversionStatistics(Serializable):
     sim_ending_cause: ESimEndingCause
     sim_time: float
     runtime: float
+    # simulated time saved by ending the simulation before the maximum simulation time
+    sim_time_saved: float = 0.0
+    # lookups of the converted map in the in-process map cache, at most one per scenario
+    map_cache_hits: int = 0
+    map_cache_misses: int = 0
 
     def __getstate__(self) -> dict:
         return self.__dict__.copy()
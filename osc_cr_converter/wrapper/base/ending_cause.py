@@ -18,3 +18,17 @@ class ESimEndingCause(Enum):
     MAX_TIME_REACHED = auto()
     END_DETECTED = auto()
     SCENARIO_FINISHED_BY_SIMULATOR = auto()
+    ALL_STORIES_COMPLETE = auto()
+    ALL_ENTITIES_STANDSTILL = auto()
+    ALL_ENTITIES_OFF_ROAD = auto()
+
+    @property
+    def is_early_termination(self) -> bool:
+        """
+        Whether a termination policy ended the simulation before the maximum simulation time was reached
+        """
+        return self in (
+            ESimEndingCause.ALL_STORIES_COMPLETE,
+            ESimEndingCause.ALL_ENTITIES_STANDSTILL,
+            ESimEndingCause.ALL_ENTITIES_OFF_ROAD,
+        )
@@ -7,8 +7,10 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 from abc import abstractmethod
-from typing import Tuple, List, Type, Optional
+from collections.abc import Sequence as SequenceABC
+from typing import Tuple, List, Type, Optional, Sequence
 
+import numpy as np
 from commonroad.scenario.obstacle import ObstacleType
 from commonroad.scenario.trajectory import State
 from scenariogeneration.xosc import Vehicle
@@ -43,6 +45,39 @@ class SimScenarioObjectState:
         raise NotImplementedError
 
 
+class SimScenarioObjectTrajectory(SequenceABC):
+    """
+    The Baseclass for the chronologically ordered SimScenarioObjectStates of one object recorded during the simulation.
+
+    Implementations may store the states in any (e.g. columnar) format, as long as indexing yields
+    SimScenarioObjectStates.
+    """
+
+    @abstractmethod
+    def __getitem__(self, index: int) -> SimScenarioObjectState:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_timestamps(self) -> np.ndarray:
+        """
+        The timestamps of all recorded states
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def concatenate(
+        cls, trajectories: Sequence["SimScenarioObjectTrajectory"]
+    ) -> "SimScenarioObjectTrajectory":
+        """
+        Join chronologically ordered parts of the trajectory of one object
+        """
+        raise NotImplementedError
+
+
 class ScenarioObjectState:
     """
     The baseclass for the scenario object states.
@@ -125,6 +160,43 @@ class ScenarioObjectState:
             obstacle_extra_info=obstacle_extra_info,
         )
 
+    @classmethod
+    def build_cr_states(
+        cls,
+        states: List[SimScenarioObjectState],
+        timestamps: Sequence[float],
+        first_time_step: int,
+        obstacle_extra_info: Optional[Vehicle],
+    ) -> List[State]:
+        """
+        Build the CommonRoad states of an object for all given timestamps at once.
+
+        This yields the same states as calling build_interpolated and to_cr_state for every timestamp, but the
+        closest recorded states are looked up for all timestamps together. Subclasses can override this to also
+        compute the state fields in a vectorized way.
+
+        :param states:List[SimScenarioObjectState]: All recorded states of the object
+        :param timestamps:Sequence[float]: The timestamps at which the CommonRoad states should be created
+        :param first_time_step:int: The CommonRoad time step of the first timestamp
+        :param obstacle_extra_info:Optional[Vehicle]: Extra information about the Vehicle
+        :return: One CommonRoad state per timestamp
+        """
+        assert len(states) > 0
+        resampler = StateResampler(
+            np.array([state.get_timestamp() for state in states], dtype=np.float64),
+            np.asarray(timestamps, dtype=np.float64),
+        )
+        return [
+            cls(
+                timestamp=timestamp,
+                closest_states=(states[i0], states[i1]),
+                obstacle_extra_info=obstacle_extra_info,
+            ).to_cr_state(first_time_step + i)
+            for i, (timestamp, i0, i1) in enumerate(
+                zip(timestamps, resampler.closest_idx, resampler.second_closest_idx)
+            )
+        ]
+
     @abstractmethod
     def to_cr_state(self, time_step: int) -> State:
         """
@@ -189,3 +261,79 @@ class ScenarioObjectState:
             getattr(self._closest[1], field_name),
         )
         return (val1 - val0) / self._dt1
+
+
+class StateResampler:
+    """
+    Vectorized counterpart of ScenarioObjectState.build_interpolated.
+
+    For every target timestamp the two closest recorded timestamps are determined with a single binary search, matching
+    the choice (including tie-breaking) of sorting all recorded states by their distance to the target. Afterwards any
+    recorded field can be interpolated, differentiated or picked from the closest state for all targets at once.
+    """
+
+    def __init__(self, recorded_timestamps: np.ndarray, target_timestamps: np.ndarray):
+        assert len(recorded_timestamps) > 0
+        if len(recorded_timestamps) == 1:
+            idx0 = np.zeros(len(target_timestamps), dtype=np.intp)
+            idx1 = idx0
+        else:
+            order = np.argsort(recorded_timestamps, kind="stable")
+            sorted_timestamps = recorded_timestamps[order]
+            insert = np.searchsorted(sorted_timestamps, target_timestamps)
+            # The two closest recorded timestamps are always among these four neighbours of the insertion point
+            candidates = insert[:, np.newaxis] + np.arange(-2, 2)
+            valid = (candidates >= 0) & (candidates < len(sorted_timestamps))
+            candidates = np.clip(candidates, 0, len(sorted_timestamps) - 1)
+            distances = np.where(
+                valid,
+                np.abs(
+                    target_timestamps[:, np.newaxis] - sorted_timestamps[candidates]
+                ),
+                np.inf,
+            )
+            closest = np.argsort(distances, axis=1, kind="stable")[:, :2]
+            rows = np.arange(len(target_timestamps))
+            idx0 = order[candidates[rows, closest[:, 0]]]
+            idx1 = order[candidates[rows, closest[:, 1]]]
+
+        self._idx0 = idx0
+        self._idx1 = idx1
+        self._dt1 = recorded_timestamps[idx1] - recorded_timestamps[idx0]
+        self._dt2 = target_timestamps - recorded_timestamps[idx0]
+
+    @property
+    def closest_idx(self) -> np.ndarray:
+        """
+        Per target timestamp the index of the closest recorded state
+        """
+        return self._idx0
+
+    @property
+    def second_closest_idx(self) -> np.ndarray:
+        """
+        Per target timestamp the index of the second closest recorded state
+        """
+        return self._idx1
+
+    def interpolated(self, values: np.ndarray) -> np.ndarray:
+        """
+        Linearly interpolate the recorded values at all target timestamps
+        """
+        return values[self._idx0] + self.differentiated(values) * self._dt2
+
+    def differentiated(self, values: np.ndarray) -> np.ndarray:
+        """
+        Rate of change of the recorded values between the two closest states of all target timestamps.
+        If both closest states coincide the rate is 0.
+        """
+        delta = values[self._idx1] - values[self._idx0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gradient = delta / self._dt1
+        return np.where(self._dt1 != 0, gradient, 0.0)
+
+    def closest(self, values: np.ndarray) -> np.ndarray:
+        """
+        The recorded values of the closest state at all target timestamps
+        """
+        return values[self._idx0]
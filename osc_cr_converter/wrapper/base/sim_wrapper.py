@@ -7,13 +7,13 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 import warnings
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, Generator
 from dataclasses import dataclass
 
 from commonroad.common.validity import is_real_number
 
 from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
-from osc_cr_converter.wrapper.base.scenario_object import SimScenarioObjectState
+from osc_cr_converter.wrapper.base.scenario_object import SimScenarioObjectTrajectory
 from osc_cr_converter.utility.configuration import ConverterParams, EsminiParams
 
 
@@ -24,11 +24,11 @@ class WrapperSimResult:
 
     Attributes
         ending_cause cause why the simulation ended
-        states_per_vehicle List of simulation states per vehicle
+        states Recorded simulation states per vehicle name
         total_simulation_time total time simulated (Not execution time)
     """
 
-    states: Dict[str, List[SimScenarioObjectState]]
+    states: Dict[str, SimScenarioObjectTrajectory]
     sim_time: float
     runtime: float
     ending_cause: ESimEndingCause
@@ -53,6 +53,9 @@ class SimWrapper:
     def __init__(self, config: ConverterParams):
         self.config = config
         self.max_time = config.esmini.max_time
+        self.record_dt = (
+            config.scenario.dt_cr if config.esmini.record_aligned_only else None
+        )
 
     @property
     def max_time(self) -> float:
@@ -72,16 +75,71 @@ class SimWrapper:
                 f"<EsminiWrapper/max_time> Tried to set to non real number value {new_max_time}."
             )
 
-    def simulate_scenario(self, scenario_path: str, sim_dt: float) -> WrapperSimResult:
+    @property
+    def record_dt(self) -> Optional[float]:
+        """
+        If set, only the states needed to resample the trajectories at the multiples of record_dt are recorded
+        """
+        return self._record_dt
+
+    @record_dt.setter
+    def record_dt(self, new_record_dt: Optional[float]):
+        if new_record_dt is None or (
+            is_real_number(new_record_dt) and new_record_dt > 0
+        ):
+            self._record_dt = new_record_dt
+        else:
+            warnings.warn(
+                f"<EsminiWrapper/record_dt> Tried to set to invalid value {new_record_dt}."
+            )
+
+    def simulate_scenario(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> WrapperSimResult:
         """
         Simulate a scenario and return its results
 
         :param scenario_path Path to the .xosc scenario file
         :param sim_dt delta time used for the simulation
+        :param parameter_values Values overriding the declared values of global parameters of the scenario
         :return The WrapperSimResult
         """
         raise NotImplementedError
 
+    def simulate_scenario_stream(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> Generator[Any, None, WrapperSimResult]:
+        """
+        Simulate a scenario, yielding frames of the new states while the simulation is still running. Each frame is
+        converted to the states per vehicle name by frame_states. The states of the whole simulation are not kept,
+        hence the returned WrapperSimResult contains no states.
+
+        The default implementation simulates the whole scenario and yields all its states per vehicle name at once.
+
+        :param scenario_path Path to the .xosc scenario file
+        :param sim_dt delta time used for the simulation
+        :param parameter_values Values overriding the declared values of global parameters of the scenario
+        :return The WrapperSimResult without states, as value of the StopIteration
+        """
+        if parameter_values is None:
+            result = self.simulate_scenario(scenario_path, sim_dt)
+        else:
+            result = self.simulate_scenario(scenario_path, sim_dt, parameter_values)
+        if len(result.states) > 0:
+            yield result.states
+        return WrapperSimResult(
+            states={},
+            sim_time=result.sim_time,
+            runtime=result.runtime,
+            ending_cause=result.ending_cause,
+        )
+
     def view_scenario(
         self, scenario_path: str, window_size: Optional[EsminiParams.WindowSize] = None
     ):
@@ -113,3 +171,13 @@ class SimWrapper:
             f"{self.__class__} did not implement to render a scenario to a gif"
         )
         return False
+
+    def frame_states(self, frame: Any) -> Dict[str, SimScenarioObjectTrajectory]:
+        """
+        Convert a frame yielded by simulate_scenario_stream to the new states per vehicle name. The frames of the
+        default implementation already are the states per vehicle name.
+
+        :param frame The yielded frame
+        :return The chronologically ordered new states per vehicle name
+        """
+        return frame
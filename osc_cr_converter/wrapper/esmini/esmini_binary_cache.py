@@ -0,0 +1,158 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import warnings
+from os import path
+from typing import Callable, List, Optional
+
+from osc_cr_converter.utility.general import file_lock
+from osc_cr_converter.wrapper.esmini.esmini_lib import esmini_lib_name
+
+# environment variable overriding the default cache directory
+ESMINI_CACHE_DIR_ENV = "OSC_CR_CONVERTER_ESMINI_CACHE"
+
+_VERSION_PATTERN = re.compile(r"v(\d+)\.(\d+)\.(\d+)")
+_MANIFEST_NAME = "MANIFEST.sha256"
+
+
+def _platform_tag() -> str:
+    if sys.platform.startswith("linux"):
+        return "linux"
+    elif sys.platform.startswith("darwin"):
+        return "mac"
+    elif sys.platform.startswith("win32"):
+        return "win"
+    raise OSError(f"<EsminiBinaryCache> Unsupported platform: {sys.platform}")
+
+
+def _sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EsminiBinaryCache:
+    """
+    Directory of esmini binaries with one entry per version and platform.
+
+    An entry is only used if the SHA-256 checksum of its esmini library matches the one recorded in its manifest when
+    the entry was populated. Entries are populated in a temporary directory and moved in place afterwards, guarded by a
+    file lock per entry, so concurrent processes download a version only once and never see partial entries.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        :param cache_dir: The cache directory, defaults to the OSC_CR_CONVERTER_ESMINI_CACHE environment variable and
+            otherwise to the directory of this package
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get(ESMINI_CACHE_DIR_ENV)
+        if cache_dir is None:
+            cache_dir = path.abspath(path.dirname(__file__))
+        self.cache_dir = path.abspath(path.expanduser(cache_dir))
+
+    def entry_path(self, version: str) -> str:
+        """
+        Directory of the cache entry of the version for the current platform
+        """
+        return path.join(self.cache_dir, f"esmini_{version}-{_platform_tag()}")
+
+    def bin_path(self, version: str) -> str:
+        """
+        The esmini bin directory of the cache entry of the version
+        """
+        return path.join(self.entry_path(version), "esmini", "bin")
+
+    def lookup(self, version: str) -> Optional[str]:
+        """
+        The bin directory of the version, if its entry exists and its checksum matches
+
+        :param version: The esmini version, e.g. v2.29.3
+        :return: The esmini bin directory or None
+        """
+        manifest_path = path.join(self.entry_path(version), _MANIFEST_NAME)
+        if not path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r") as manifest:
+            expected_checksum, lib_rel_path = manifest.read().split(maxsplit=1)
+        lib_path = path.join(self.entry_path(version), lib_rel_path.strip())
+        if not path.exists(lib_path) or _sha256(lib_path) != expected_checksum:
+            warnings.warn(
+                f"<EsminiBinaryCache/lookup> Checksum mismatch of {lib_path}, ignoring the entry"
+            )
+            return None
+        return self.bin_path(version)
+
+    def versions(self) -> List[str]:
+        """
+        All versions with a valid entry for the current platform, sorted from oldest to newest
+        """
+        if not path.isdir(self.cache_dir):
+            return []
+        suffix = f"-{_platform_tag()}"
+        versions = []
+        for dir_name in os.listdir(self.cache_dir):
+            if not dir_name.startswith("esmini_") or not dir_name.endswith(suffix):
+                continue
+            version = dir_name[len("esmini_") : -len(suffix)]
+            if _VERSION_PATTERN.fullmatch(version) and self.lookup(version):
+                versions.append(version)
+        return sorted(
+            versions,
+            key=lambda v: tuple(int(n) for n in _VERSION_PATTERN.fullmatch(v).groups()),
+        )
+
+    def populate(
+        self, version: str, download: Callable[[str, str], bool]
+    ) -> Optional[str]:
+        """
+        Create the entry of the version unless another process already did, and return its bin directory
+
+        :param version: The esmini version, e.g. v2.29.3
+        :param download: Function extracting the esmini release of the version into the given directory, returning
+            whether it succeeded
+        :return: The esmini bin directory or None, if the download failed
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with file_lock(self.entry_path(version) + ".lock"):
+            if (bin_path := self.lookup(version)) is not None:
+                return bin_path
+
+            staging_dir = tempfile.mkdtemp(
+                prefix=path.basename(self.entry_path(version)) + ".",
+                dir=self.cache_dir,
+            )
+            try:
+                if not download(version, staging_dir):
+                    return None
+                lib_rel_path = path.join("esmini", "bin", esmini_lib_name())
+                lib_path = path.join(staging_dir, lib_rel_path)
+                if not path.exists(lib_path):
+                    warnings.warn(
+                        f"<EsminiBinaryCache/populate> esmini {version} contains no {lib_rel_path}"
+                    )
+                    return None
+                with open(path.join(staging_dir, _MANIFEST_NAME), "w") as manifest:
+                    manifest.write(f"{_sha256(lib_path)}  {lib_rel_path}\n")
+
+                # replace an invalid entry
+                if path.exists(self.entry_path(version)):
+                    shutil.rmtree(self.entry_path(version))
+                os.rename(staging_dir, self.entry_path(version))
+            finally:
+                if path.exists(staging_dir):
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+        return self.lookup(version)
@@ -0,0 +1,386 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, List, Tuple, Any, Dict, Generator
+
+import numpy as np
+
+from osc_cr_converter.analyzer.error import AnalyzerErrorResult
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SE_STRUCT_DTYPE,
+    EsminiTrajectory,
+)
+from osc_cr_converter.wrapper.esmini.esmini_wrapper import (
+    EsminiStreamFrame,
+    EsminiWrapper,
+)
+from osc_cr_converter.utility.configuration import EsminiParams
+
+
+@dataclass(frozen=True)
+class _SharedSimResult:
+    """
+    A WrapperSimResult whose recorded states were moved to a shared memory block by an engine process
+    """
+
+    shm_name: Optional[str]
+    layout: List[Tuple[str, int, int]]  # (object name, first state, number of states)
+    sim_time: float
+    runtime: float
+    ending_cause: ESimEndingCause
+
+    @staticmethod
+    def pack(result: WrapperSimResult) -> "_SharedSimResult":
+        layout = []
+        num_states = 0
+        for object_name, trajectory in result.states.items():
+            layout.append((object_name, num_states, len(trajectory)))
+            num_states += len(trajectory)
+
+        shm_name = None
+        if num_states > 0:
+            shm = SharedMemory(create=True, size=num_states * SE_STRUCT_DTYPE.itemsize)
+            shared = np.ndarray(num_states, dtype=SE_STRUCT_DTYPE, buffer=shm.buf)
+            for (_, first, length), trajectory in zip(layout, result.states.values()):
+                shared[first : first + length] = trajectory.array
+            del shared
+            shm.close()
+            shm_name = shm.name
+
+        return _SharedSimResult(
+            shm_name=shm_name,
+            layout=layout,
+            sim_time=result.sim_time,
+            runtime=result.runtime,
+            ending_cause=result.ending_cause,
+        )
+
+    def unpack(self) -> WrapperSimResult:
+        states = {}
+        if self.shm_name is not None:
+            shm = SharedMemory(name=self.shm_name)
+            try:
+                shared = np.ndarray(
+                    sum(length for _, _, length in self.layout),
+                    dtype=SE_STRUCT_DTYPE,
+                    buffer=shm.buf,
+                )
+                states = {
+                    object_name: EsminiTrajectory(shared[first : first + length].copy())
+                    for object_name, first, length in self.layout
+                }
+                del shared
+            finally:
+                shm.close()
+                shm.unlink()
+
+        return WrapperSimResult(
+            states=states,
+            sim_time=self.sim_time,
+            runtime=self.runtime,
+            ending_cause=self.ending_cause,
+        )
+
+
+def _engine_main(esmini_wrapper: EsminiWrapper, connection: Connection):
+    """
+    Main loop of an engine process, running the requested EsminiWrapper methods until None is received
+    """
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        method, args, (max_time, record_dt) = task
+        try:
+            esmini_wrapper.max_time = max_time
+            esmini_wrapper.record_dt = record_dt
+            result = getattr(esmini_wrapper, method)(*args)
+            if method == "simulate_scenario_stream":
+                result = _forward_stream(result, connection)
+            if isinstance(result, WrapperSimResult):
+                result = _SharedSimResult.pack(result)
+            connection.send((True, result))
+        except Exception as e:
+            connection.send((False, AnalyzerErrorResult.from_exception(e)))
+    connection.close()
+
+
+def _forward_stream(
+    stream: Generator[EsminiStreamFrame, None, WrapperSimResult],
+    connection: Connection,
+) -> Optional[WrapperSimResult]:
+    """
+    Send the frames of a streaming simulation, each once the previous one was received, until the simulation ends or
+    the receiver stops it
+
+    :return: The result of the simulation, None if it was stopped
+    """
+    while True:
+        try:
+            frame = next(stream)
+        except StopIteration as e:
+            return e.value
+        connection.send((None, frame))
+        if not connection.recv():
+            stream.close()
+            return None
+
+
+class _Engine:
+    """
+    Handle of a single engine process
+    """
+
+    def __init__(self, esmini_wrapper: EsminiWrapper):
+        # spawn a fresh interpreter, so every engine loads its own instance of the esmini library
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_engine_main, args=(esmini_wrapper, child_connection), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+    def call(
+        self, method: str, args: Tuple, settings: Tuple[float, Optional[float]]
+    ) -> Any:
+        self.connection.send((method, args, settings))
+        success, result = self.connection.recv()
+        if not success:
+            raise RuntimeError(f"<EsminiEnginePool/{method}> {result}")
+        return result
+
+    def stop_stream(self):
+        """
+        Stop the streaming simulation of the engine and wait for its end
+        """
+        while self.connection.recv()[0] is None:
+            self.connection.send(False)
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.exitcode is None:
+            self.process.kill()
+        self.connection.close()
+
+
+class EsminiEnginePool(SimWrapper):
+    """
+    A SimWrapper keeping a pool of engine processes, each running its own EsminiWrapper with its own loaded esmini
+    library. As esmini keeps global state, a single process can only simulate one scenario at a time, but the pool
+    simulates as many scenarios concurrently as it has engines, e.g. when simulate_scenario is called from multiple
+    threads.
+
+    Engines are started lazily when all running engines are busy, and a crashed engine is replaced. The recorded
+    states are returned through shared memory instead of being pickled, the frames of a streaming simulation are sent
+    one after another while the engine simulates the next one.
+
+    The max_time and the record_dt apply to all calls of the pool. Callers needing their own settings, e.g. the
+    converters of different threads, use their own pool sharing the engines (see share).
+    """
+
+    def __init__(
+        self, esmini_wrapper: EsminiWrapper, num_engines: Optional[int] = None
+    ):
+        super().__init__(esmini_wrapper.config)
+        self.max_time = esmini_wrapper.max_time
+        self.record_dt = esmini_wrapper.record_dt
+        self._esmini_wrapper = esmini_wrapper
+        self.num_engines = num_engines
+        self._reset()
+
+    @property
+    def num_engines(self) -> int:
+        """
+        Maximum number of engine processes, defaults to the number of available processors
+        """
+        return self._num_engines
+
+    @num_engines.setter
+    def num_engines(self, new_num_engines: Optional[int]):
+        if new_num_engines is None or new_num_engines <= 0:
+            self._num_engines = os.cpu_count() or 1
+        else:
+            self._num_engines = new_num_engines
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_engines"]
+        del state["_idle_engines"]
+        del state["_engines_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
+
+    def __enter__(self) -> "EsminiEnginePool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def simulate_scenario(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> WrapperSimResult:
+        # wrappers not supporting parameter values are only called with them if they are needed
+        args = (scenario_path, sim_dt)
+        if parameter_values is not None:
+            args += (parameter_values,)
+        result = self._call("simulate_scenario", args)
+        if result is None:
+            return WrapperSimResult.failure()
+        return result.unpack()
+
+    def simulate_scenario_stream(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> Generator[EsminiStreamFrame, None, WrapperSimResult]:
+        args = (scenario_path, sim_dt)
+        if parameter_values is not None:
+            args += (parameter_values,)
+        engine = self._acquire_engine()
+        try:
+            engine.connection.send(
+                ("simulate_scenario_stream", args, (self.max_time, self.record_dt))
+            )
+            while True:
+                success, result = engine.connection.recv()
+                if success is None:
+                    # the engine simulates the next frame while this one is consumed
+                    engine.connection.send(True)
+                    try:
+                        yield result
+                    except GeneratorExit:
+                        engine.stop_stream()
+                        raise
+                elif success:
+                    return result.unpack()
+                else:
+                    logging.warning(
+                        f"<EsminiEnginePool/simulate_scenario_stream> {result}"
+                    )
+                    return WrapperSimResult.failure()
+        except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+            logging.warning(
+                f"<EsminiEnginePool/simulate_scenario_stream> Engine crashed: {e}"
+            )
+            engine = self._replace_engine(engine)
+            return WrapperSimResult.failure()
+        except GeneratorExit:
+            raise
+        except BaseException:
+            engine = self._replace_engine(engine)
+            raise
+        finally:
+            self._idle_engines.put(engine)
+
+    def frame_states(self, frame: EsminiStreamFrame) -> Dict[str, EsminiTrajectory]:
+        return self._esmini_wrapper.frame_states(frame)
+
+    def share(self) -> "EsminiEnginePool":
+        """
+        A pool sharing the engines of this pool, but with its own max_time and record_dt
+
+        :return: The new pool, closing either pool stops the engines of both
+        """
+        pool = EsminiEnginePool.__new__(EsminiEnginePool)
+        pool.__dict__.update(self.__dict__)
+        return pool
+
+    def view_scenario(
+        self, scenario_path: str, window_size: Optional[EsminiParams.WindowSize] = None
+    ):
+        self._call("view_scenario", (scenario_path, window_size))
+
+    def render_scenario_to_gif(
+        self,
+        scenario_path: str,
+        gif_file_path: str,
+        fps: int = 30,
+        gif_size: Optional[EsminiParams.WindowSize] = None,
+    ) -> bool:
+        return bool(
+            self._call(
+                "render_scenario_to_gif", (scenario_path, gif_file_path, fps, gif_size)
+            )
+        )
+
+    def close(self):
+        """
+        Stop all engine processes
+        """
+        with self._engines_lock:
+            for engine in self._engines:
+                engine.stop()
+            # cleared in place, since shared with the pools created by share
+            self._engines.clear()
+            while not self._idle_engines.empty():
+                self._idle_engines.get_nowait()
+
+    def _reset(self):
+        self._engines: List[_Engine] = []
+        self._idle_engines: queue.Queue = queue.Queue()
+        self._engines_lock = threading.Lock()
+
+    def _acquire_engine(self) -> _Engine:
+        with self._engines_lock:
+            if self._idle_engines.empty() and len(self._engines) < self.num_engines:
+                engine = _Engine(self._esmini_wrapper)
+                self._engines.append(engine)
+                return engine
+        return self._idle_engines.get()
+
+    def _call(self, method: str, args: Tuple) -> Any:
+        engine = self._acquire_engine()
+        try:
+            return engine.call(method, args, (self.max_time, self.record_dt))
+        except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+            logging.warning(f"<EsminiEnginePool/{method}> Engine crashed: {e}")
+            engine = self._replace_engine(engine)
+            return None
+        except RuntimeError as e:
+            logging.warning(str(e))
+            return None
+        except BaseException:
+            # the engine might still answer the interrupted call, so it must not be reused
+            engine = self._replace_engine(engine)
+            raise
+        finally:
+            # a lost engine would block all callers waiting for an idle one forever
+            self._idle_engines.put(engine)
+
+    def _replace_engine(self, engine: _Engine) -> _Engine:
+        with self._engines_lock:
+            engine.stop()
+            self._engines.remove(engine)
+            new_engine = _Engine(self._esmini_wrapper)
+            self._engines.append(new_engine)
+        return new_engine
@@ -0,0 +1,170 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import ctypes as ct
+import time
+from dataclasses import dataclass
+from os import path
+from sys import platform
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import SEStruct
+
+# void (*fnPtr)(const char *name, int type, int state)
+SE_STORYBOARD_CALLBACK = ct.CFUNCTYPE(None, ct.c_char_p, ct.c_int, ct.c_int)
+
+# (restype, argtypes) of the used functions as declared in esminiLib.hpp
+_PROTOTYPES: Dict[str, Tuple[Any, List[Any]]] = {
+    "SE_Init": (ct.c_int, [ct.c_char_p, ct.c_int, ct.c_int, ct.c_int, ct.c_int]),
+    "SE_InitWithArgs": (ct.c_int, [ct.c_int, ct.POINTER(ct.c_char_p)]),
+    "SE_Close": (None, []),
+    "SE_LogToConsole": (None, [ct.c_bool]),
+    "SE_SetLogFilePath": (ct.c_int, [ct.c_char_p]),
+    "SE_SetSeed": (None, [ct.c_uint]),
+    "SE_OpenOSISocket": (ct.c_int, [ct.c_char_p]),
+    "SE_RegisterStoryBoardElementStateChangeCallback": (
+        None,
+        [SE_STORYBOARD_CALLBACK],
+    ),
+    "SE_SetWindowPosAndSize": (None, [ct.c_int, ct.c_int, ct.c_int, ct.c_int]),
+    "SE_Step": (ct.c_int, []),
+    "SE_StepDT": (ct.c_int, [ct.c_float]),
+    "SE_GetSimulationTime": (ct.c_float, []),
+    "SE_GetQuitFlag": (ct.c_int, []),
+    "SE_GetNumberOfObjects": (ct.c_int, []),
+    "SE_GetId": (ct.c_int, [ct.c_int]),
+    "SE_GetObjectState": (ct.c_int, [ct.c_int, ct.POINTER(SEStruct)]),
+    "SE_GetObjectName": (ct.c_char_p, [ct.c_int]),
+    "SE_GetObjectStates": (
+        ct.c_int,
+        [ct.POINTER(ct.c_int), ct.POINTER(SEStruct)],
+    ),
+}
+
+# functions missing in older esmini versions
+_OPTIONAL_FUNCTIONS = {"SE_GetObjectStates", "SE_InitWithArgs"}
+
+
+def esmini_lib_name() -> str:
+    """
+    File name of the esmini library on the current platform
+    """
+    if platform.startswith("linux"):
+        return "libesminiLib.so"
+    elif platform.startswith("darwin"):
+        return "libesminiLib.dylib"
+    elif platform.startswith("win32"):
+        return "esminiLib.dll"
+    raise OSError(f"<EsminiLib> Unsupported platform: {platform}")
+
+
+@dataclass
+class NativeCallStatistics:
+    """
+    Number of calls of a native esmini function and the total time spent in them, including the ctypes conversions
+    """
+
+    calls: int = 0
+    time: float = 0.0
+
+
+class EsminiLib:
+    """
+    Typed binding of the esmini library.
+
+    Every used function of esminiLib is declared with its full prototype and bound once as attribute of this object,
+    so calls skip the dynamic attribute lookup of ctypes.CDLL and the untyped default conversions. Optional functions
+    missing in the loaded esmini version are bound to None.
+
+    If instrumented, every call is counted and timed, showing how much of the simulation loop is spent in native
+    calls.
+    """
+
+    # bindings loaded in this process per library path and instrumentation
+    _loaded: Dict[Tuple[str, bool], "EsminiLib"] = {}
+
+    def __init__(self, lib: ct.CDLL, instrumented: bool = False):
+        self._lib = lib
+        self.instrumented = instrumented
+        self._call_statistics: Dict[str, NativeCallStatistics] = {}
+        for name, (restype, argtypes) in _PROTOTYPES.items():
+            if not hasattr(lib, name):
+                if name not in _OPTIONAL_FUNCTIONS:
+                    raise AttributeError(f"<EsminiLib> {name} missing in esmini")
+                setattr(self, name, None)
+                continue
+            function = getattr(lib, name)
+            function.restype = restype
+            function.argtypes = argtypes
+            if instrumented:
+                function = self._instrument(name, function)
+            setattr(self, name, function)
+
+    @staticmethod
+    def load(esmini_bin_path: str, instrumented: bool = False) -> "EsminiLib":
+        """
+        Load the esmini library of the current platform, or reuse the binding loaded before in this process
+
+        :param esmini_bin_path: Path to the esmini bin directory: "path/to/esmini/bin", or to the library itself
+        :param instrumented: If true every native call is counted and timed
+        :return: The binding of the loaded library
+        """
+        lib_path = path.abspath(esmini_bin_path)
+        if not path.isfile(lib_path):
+            lib_path = path.join(lib_path, esmini_lib_name())
+        key = (lib_path, instrumented)
+        if key not in EsminiLib._loaded:
+            EsminiLib._loaded[key] = EsminiLib(ct.CDLL(lib_path), instrumented)
+        return EsminiLib._loaded[key]
+
+    def has(self, name: str) -> bool:
+        """
+        Whether the loaded esmini version provides the function
+        """
+        return getattr(self, name, None) is not None
+
+    @property
+    def call_statistics(self) -> Dict[str, NativeCallStatistics]:
+        """
+        Statistics of the called functions since the last reset, only recorded if instrumented
+        """
+        return dict(self._call_statistics)
+
+    def reset_call_statistics(self):
+        self._call_statistics = {}
+
+    def format_call_statistics(self, total_time: Optional[float] = None) -> str:
+        """
+        Table of the call statistics, sorted by the time spent in the functions
+
+        :param total_time: If given, the share of this time spent in each function is included
+        """
+        lines = []
+        for name, statistics in sorted(
+            self._call_statistics.items(), key=lambda item: -item[1].time
+        ):
+            line = f"{name:<50s} {statistics.calls:8d} calls {statistics.time:9.4f} s"
+            if total_time:
+                line += f" {100 * statistics.time / total_time:6.2f} %"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _instrument(self, name: str, function: Callable) -> Callable:
+        def instrumented_function(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                duration = time.perf_counter() - start
+                statistics = self._call_statistics.get(name)
+                if statistics is None:
+                    statistics = self._call_statistics[name] = NativeCallStatistics()
+                statistics.calls += 1
+                statistics.time += duration
+
+        return instrumented_function
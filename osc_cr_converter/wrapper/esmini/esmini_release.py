@@ -0,0 +1,146 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import os
+import posixpath
+import re
+import shutil
+import sys
+from os import path
+from typing import List, Optional
+from zipfile import ZipFile
+
+import requests
+
+# default location of the esmini releases
+ESMINI_RELEASES_URL = "https://github.com/esmini/esmini/releases"
+
+# shared libraries in the bin directory of a release, which esmini needs at runtime
+_SHARED_LIBRARY_PATTERN = re.compile(r".+(\.so(\.\d+)*|\.dylib|\.dll)")
+
+
+def release_archive_name() -> str:
+    """
+    Name of the esmini release archive of the current platform
+    """
+    if sys.platform.startswith("linux"):
+        return "esmini-bin_ubuntu.zip"
+    elif sys.platform.startswith("darwin"):
+        return "esmini-bin_mac_catalina.zip"
+    elif sys.platform.startswith("win32"):
+        return "esmini-bin_win_x64.zip"
+    raise OSError(f"<EsminiRelease> Unsupported platform: {sys.platform}")
+
+
+def release_archive_url(version: str, releases_url: str = ESMINI_RELEASES_URL) -> str:
+    """
+    URL of the esmini release archive of the version for the current platform
+    """
+    return "/".join(
+        [releases_url.rstrip("/"), "download", version, release_archive_name()]
+    )
+
+
+def download_file(
+    url: str,
+    file_path: str,
+    max_attempts: int = 3,
+    chunk_size: int = 1 << 20,
+    timeout: float = 30.0,
+):
+    """
+    Stream the file at the url to the given path, holding only one chunk in memory.
+
+    The data is written to file_path + ".part" first. An existing part file of a previous interrupted download is
+    resumed with an HTTP range request, if the server supports it, as are downloads interrupted during this call.
+
+    :param url: The URL of the file
+    :param file_path: The path to store the file
+    :param max_attempts: Number of connection attempts, before the error of the last one is raised
+    :param chunk_size: Number of bytes read and written at once
+    :param timeout: Timeout in seconds of connecting and of waiting for data
+    :raises requests.exceptions.RequestException: If the download failed
+    """
+    part_path = file_path + ".part"
+    for attempt in range(1, max_attempts + 1):
+        offset = path.getsize(part_path) if path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+        try:
+            with requests.get(
+                url, headers=headers, stream=True, timeout=timeout
+            ) as response:
+                if response.status_code == 416:
+                    # the part file already holds the complete file
+                    break
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # the server ignored the range, hence the file is sent from the start
+                    offset = 0
+                expected_size = _expected_size(response, offset)
+                with open(part_path, "r+b" if offset > 0 else "wb") as file:
+                    file.seek(offset)
+                    file.truncate()
+                    for chunk in response.iter_content(chunk_size):
+                        file.write(chunk)
+            if expected_size is not None and path.getsize(part_path) < expected_size:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"<EsminiRelease/download_file> Connection closed after "
+                    f"{path.getsize(part_path)} of {expected_size} bytes"
+                )
+            break
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt == max_attempts:
+                raise
+    os.replace(part_path, file_path)
+
+
+def extract_shared_libraries(archive_path: str, bin_path: str) -> List[str]:
+    """
+    Extract only the shared libraries of the bin directory of an esmini release archive, skipping the executables and
+    resources which the esmini library does not need.
+
+    :param archive_path: The path of the release archive
+    :param bin_path: The directory to extract the libraries into
+    :return: The names of the extracted libraries
+    :raises zipfile.BadZipFile: If the archive is corrupt
+    """
+    os.makedirs(bin_path, exist_ok=True)
+    extracted = []
+    with ZipFile(archive_path, "r") as archive:
+        for member in archive.infolist():
+            directory, name = posixpath.split(member.filename.replace("\\", "/"))
+            if member.is_dir() or posixpath.basename(directory) != "bin":
+                continue
+            if _SHARED_LIBRARY_PATTERN.fullmatch(name) is None:
+                continue
+            # only the base name is used, so members can not be written outside of bin_path
+            with archive.open(member) as source, open(
+                path.join(bin_path, name), "wb"
+            ) as target:
+                shutil.copyfileobj(source, target)
+            extracted.append(name)
+    return extracted
+
+
+def _expected_size(response: requests.Response, offset: int) -> Optional[int]:
+    """
+    Size of the complete file according to the response headers, None if unknown
+    """
+    content_range = response.headers.get("Content-Range")
+    if content_range is not None and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        return offset + int(content_length)
+    return None
@@ -7,15 +7,18 @@ __email__ = "commonroad@lists.lrz.de"
 __status__ = "beta"
 
 import ctypes as ct
-from typing import Type
+from typing import Type, List, Sequence, Optional, Union
 
 import numpy as np
 from commonroad.scenario.obstacle import ObstacleType
 from commonroad.scenario.state import CustomState
+from scenariogeneration.xosc import Vehicle
 
 from osc_cr_converter.wrapper.base.scenario_object import (
     ScenarioObjectState,
     SimScenarioObjectState,
+    SimScenarioObjectTrajectory,
+    StateResampler,
 )
 
 
@@ -112,6 +115,63 @@ class SEStruct(ct.Structure, SimScenarioObjectState):
             return ObstacleType.UNKNOWN
 
 
+# NumPy equivalent of the SEStruct memory layout
+SE_STRUCT_DTYPE = np.dtype(
+    [(field_name, np.dtype(c_type)) for field_name, c_type in SEStruct._fields_]
+)
+assert SE_STRUCT_DTYPE.itemsize == ct.sizeof(SEStruct)
+
+
+class EsminiTrajectory(SimScenarioObjectTrajectory):
+    """
+    Array backed trajectory of one object, storing its recorded states as structured NumPy array with the
+    SE_STRUCT_DTYPE. Single states are only converted to SEStructs when they are accessed by index.
+    """
+
+    def __init__(self, states: np.ndarray):
+        assert states.dtype == SE_STRUCT_DTYPE
+        self._states = states
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        The recorded states as structured NumPy array
+        """
+        return self._states
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[SEStruct, "EsminiTrajectory"]:
+        if isinstance(index, slice):
+            return EsminiTrajectory(self._states[index])
+        return SEStruct.from_buffer_copy(self._states[index].tobytes())
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get_timestamps(self) -> np.ndarray:
+        return self._states["timestamp"]
+
+    @classmethod
+    def concatenate(
+        cls, trajectories: Sequence["EsminiTrajectory"]
+    ) -> "EsminiTrajectory":
+        if len(trajectories) == 1:
+            return trajectories[0]
+        return EsminiTrajectory(
+            np.concatenate([trajectory.array for trajectory in trajectories])
+        )
+
+
+def se_structs_to_array(states: Sequence[SEStruct]) -> np.ndarray:
+    """
+    Structured NumPy array with the SE_STRUCT_DTYPE of a sequence of SEStructs, only copied if not array backed yet
+    """
+    if isinstance(states, EsminiTrajectory):
+        return states.array
+    return np.frombuffer((SEStruct * len(states))(*states), dtype=SE_STRUCT_DTYPE)
+
+
 class EsminiScenarioObjectState(ScenarioObjectState):
     """
     Class that converts from SEStructs to CommonRoad states
@@ -289,6 +349,70 @@ class EsminiScenarioObjectState(ScenarioObjectState):
             self._height = self._get_interpolated("height")
         return self._height
 
+    @classmethod
+    def build_cr_states(
+        cls,
+        states: Sequence[SEStruct],
+        timestamps: Sequence[float],
+        first_time_step: int,
+        obstacle_extra_info: Optional[Vehicle],
+    ) -> List[CustomState]:
+        """
+        Vectorized version of to_cr_state for all timestamps of one object, see ScenarioObjectState.build_cr_states
+        """
+        assert len(states) > 0
+        recorded = se_structs_to_array(states)
+
+        def field(field_name: str) -> np.ndarray:
+            return recorded[field_name].astype(np.float64)
+
+        resampler = StateResampler(
+            field("timestamp"), np.asarray(timestamps, dtype=np.float64)
+        )
+        x, y, z = (resampler.interpolated(field(f)) for f in ("x", "y", "z"))
+        h, p, r = (resampler.interpolated(field(f)) for f in ("h", "p", "r"))
+        offset_x, offset_y = (
+            resampler.interpolated(field(f)) for f in ("centerOffsetX", "centerOffsetY")
+        )
+        offset_z = resampler.interpolated(field("centerOffsetZ"))
+        speed = resampler.interpolated(field("speed"))
+        steering_angle = resampler.interpolated(field("wheel_angle"))
+        h_rate = resampler.differentiated(field("h"))
+
+        # same rotation as in to_cr_state, only the x and y rows are needed
+        c_h, s_h = np.cos(h), np.sin(h)  # heading
+        c_p, s_p = np.cos(p), np.sin(p)  # pitch
+        c_r, s_r = np.cos(r), np.sin(r)  # roll
+        positions = np.stack(
+            (
+                x
+                + c_h * c_p * offset_x
+                + (c_h * s_p * s_r - s_h * c_r) * offset_y
+                + (c_h * s_p * c_r + s_h * s_r) * offset_z,
+                y
+                + s_h * c_p * offset_x
+                + (s_h * s_p * s_r + c_h * c_r) * offset_y
+                + (s_h * s_p * s_r - c_h * s_r) * offset_z,
+            ),
+            axis=1,
+        )
+        return [
+            CustomState(
+                time_step=first_time_step + i,
+                position=positions[i],
+                orientation=orientation,
+                velocity=velocity,
+                steering_angle=steering,
+                yaw_rate=yaw_rate,
+                slip_angle=0.0,
+            )
+            for i, (orientation, velocity, steering, yaw_rate) in enumerate(
+                zip(
+                    h.tolist(), speed.tolist(), steering_angle.tolist(), h_rate.tolist()
+                )
+            )
+        ]
+
     def to_cr_state(self, time_step: int) -> CustomState:
         c_h, s_h = np.cos(self.h), np.sin(self.h)  # heading
         c_p, s_p = np.cos(self.p), np.sin(self.p)  # pitch
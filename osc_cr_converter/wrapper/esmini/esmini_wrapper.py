@@ -8,20 +8,33 @@ __status__ = "beta"
 
 import ctypes as ct
 import logging
-import math
 import os.path
 import re
+import threading
 import time
 import warnings
 from multiprocessing import Lock
 from os import path
-from sys import platform
-from typing import Optional, List, Dict, Union
+from typing import Optional, List, Dict, NamedTuple, Union, Generator
 
 import imageio
+import numpy as np
 
 from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
-from osc_cr_converter.wrapper.esmini.esmini_scenario_object import SEStruct
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SEStruct,
+    SE_STRUCT_DTYPE,
+    EsminiTrajectory,
+)
+from osc_cr_converter.wrapper.esmini.esmini_lib import (
+    EsminiLib,
+    SE_STORYBOARD_CALLBACK,
+)
+from osc_cr_converter.wrapper.esmini.state_recorder import EsminiStateRecorder
+from osc_cr_converter.wrapper.esmini.termination_policy import (
+    TerminationPolicy,
+    termination_policies_from_config,
+)
 from osc_cr_converter.wrapper.esmini.storyboard_element import (
     EStoryBoardElementState,
     EStoryBoardElementLevel,
@@ -30,16 +43,36 @@ from osc_cr_converter.wrapper.esmini.storyboard_element import (
 from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
 from osc_cr_converter.utility.configuration import ConverterParams, EsminiParams
 
+# number of simulation steps per streamed frame if the recorded states are not aligned to a time step
+_STREAM_FRAME_STEPS = 10
+
+
+class EsminiStreamFrame(NamedTuple):
+    """
+    A frame yielded by EsminiWrapper.simulate_scenario_stream
+
+    Attributes
+        states the new states of all objects as structured array with the SE_STRUCT_DTYPE
+        object_names the names of the objects by id, shared by all frames of a simulation
+    """
+
+    states: np.ndarray
+    object_names: Dict[int, str]
+
 
 class EsminiWrapper(SimWrapper):
     """
     The implementation of the SimWrapper to simulate, render to gif, and view scenarios in a window based in the
     Environment Simulator Minimalistic (esmini).
 
-    Due to the possible usage of udp sockets this wrapper will only run sequential which is enforced by the __lock.
+    esmini keeps global state, hence only one scenario can run per process at a time, which is enforced by the __lock.
+    The lock is process local, so separate processes (e.g. the workers of the BatchConverter) simulate concurrently.
+    Viewing and rendering write screenshots to the shared working directory and therefore stay sequential across
+    processes using the __render_lock.
     """
 
-    __lock: Lock = Lock()
+    __lock: threading.Lock = threading.Lock()
+    __render_lock: Lock = Lock()
 
     _all_sim_elements: Dict[StoryBoardElement, EStoryBoardElementState]
 
@@ -49,6 +82,12 @@ class EsminiWrapper(SimWrapper):
     _callback_functor: ct.CFUNCTYPE
     _sim_end_detected_time: Optional[float]
 
+    _state_buffer: Optional[ct.Array]
+    _state_frame: Optional[np.ndarray]
+    _object_ids: List[int]
+    _object_id_bytes: bytes
+    _object_state_pointers: List
+
     def __init__(self, esmini_bin_path: str, config: ConverterParams):
         super().__init__(config=config)
         self._esmini_lib_bin_path = esmini_bin_path
@@ -58,6 +97,9 @@ class EsminiWrapper(SimWrapper):
 
         self.log_to_console = config.esmini.log_to_console
         self.log_to_file = config.esmini.log_to_file
+        self.termination_policies: List[
+            TerminationPolicy
+        ] = termination_policies_from_config(config.esmini)
 
         self._reset()
 
@@ -76,9 +118,9 @@ class EsminiWrapper(SimWrapper):
             self._min_time = new_min_time
 
     @property
-    def esmini_lib(self) -> ct.CDLL:
+    def esmini_lib(self) -> EsminiLib:
         """
-        The ctypes wrapper of the esmini lib.
+        The typed ctypes binding of the esmini lib.
         The object will be created by setting the esmini_lib_bin_path property
         """
         return self._esmini_lib
@@ -93,33 +135,19 @@ class EsminiWrapper(SimWrapper):
     @_esmini_lib_bin_path.setter
     def _esmini_lib_bin_path(self, new_esmini_lib_bin_path: str):
         if hasattr(self, "_esmini_lib"):
-            warnings.warn(
-                "<EsminiWrapper/esmini_lib> EsminiLib ctypes object is immutable"
-            )
+            warnings.warn("<EsminiWrapper/esmini_lib> EsminiLib object is immutable")
         elif path.exists(new_esmini_lib_bin_path):
             self._esmini_lib_bin_path_ = new_esmini_lib_bin_path
-            if platform.startswith("linux"):
-                self._esmini_lib = ct.CDLL(
-                    path.join(new_esmini_lib_bin_path, "libesminiLib.so")
-                )
-            elif platform.startswith("darwin"):
-                self._esmini_lib = ct.CDLL(
-                    path.join(new_esmini_lib_bin_path, "libesminiLib.dylib")
-                )
-            elif platform.startswith("win32"):
-                self._esmini_lib = ct.CDLL(
-                    path.join(new_esmini_lib_bin_path, "esminiLib.dll")
-                )
-            else:
-                warnings.warn(
-                    f"<EsminiWrapper/esmini_lib> Unsupported platform: {platform}"
+            try:
+                self._esmini_lib = EsminiLib.load(
+                    new_esmini_lib_bin_path,
+                    instrumented=self.config.esmini.instrument_native_calls,
                 )
+            except (OSError, AttributeError) as e:
+                warnings.warn(f"<EsminiWrapper/esmini_lib> {e}")
                 return
-
-            self._esmini_lib.SE_StepDT.argtypes = [ct.c_float]
-            self._esmini_lib.SE_GetSimulationTime.restype = ct.c_float
-            self._esmini_lib.SE_SetSeed.argtypes = [ct.c_uint]
-            self._esmini_lib.SE_GetObjectName.restype = ct.c_char_p
+            # SE_GetObjectStates fetches all object states at once, but is missing in older esmini versions
+            self._bulk_state_fetch = self._esmini_lib.has("SE_GetObjectStates")
 
         else:
             warnings.warn(
@@ -189,6 +217,12 @@ class EsminiWrapper(SimWrapper):
         del state["_first_frame_run"]
         del state["_callback_functor"]
         del state["_sim_end_detected_time"]
+        del state["_bulk_state_fetch"]
+        del state["_state_buffer"]
+        del state["_state_frame"]
+        del state["_object_ids"]
+        del state["_object_id_bytes"]
+        del state["_object_state_pointers"]
         return state
 
     def __setstate__(self, state):
@@ -196,10 +230,18 @@ class EsminiWrapper(SimWrapper):
         self._esmini_lib_bin_path = state["_esmini_lib_bin_path_"]
         self._reset()
 
-    def simulate_scenario(self, scenario_path: str, sim_dt: float) -> WrapperSimResult:
+    def simulate_scenario(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> WrapperSimResult:
         with EsminiWrapper.__lock:
             if not self._initialize_scenario_engine(
-                scenario_path, viewer_mode=0, use_threading=False
+                scenario_path,
+                viewer_mode=0,
+                use_threading=False,
+                parameter_values=parameter_values,
             ):
                 warnings.warn(
                     "<EsminiWrapper/simulate_scenario> Failed to initialize scenario engine"
@@ -207,38 +249,98 @@ class EsminiWrapper(SimWrapper):
                 return WrapperSimResult.failure()
             sim_time = 0.0
             runtime_start = time.time()
-            all_states: Dict[int, List[SEStruct]]
-            all_states = {
-                object_id: [state]
-                for object_id, state in self._get_scenario_object_states().items()
-            }
-            while (cause := self._sim_finished()) is None:
+            recorder = EsminiStateRecorder(record_dt=self.record_dt)
+            states = self._record_scenario_object_states(recorder)
+            while (cause := self._sim_finished(states)) is None:
                 self._sim_step(sim_dt)
                 sim_time += sim_dt
-                for object_id, new_state in self._get_scenario_object_states().items():
-                    if object_id not in all_states:
-                        all_states[object_id] = [new_state]
-                    elif math.isclose(
-                        new_state.timestamp, all_states[object_id][-1].timestamp
-                    ):
-                        all_states[object_id][-1] = new_state
-                    else:
-                        all_states[object_id].append(new_state)
+                states = self._record_scenario_object_states(recorder)
             runtime = time.time() - runtime_start
+            self._log_native_call_statistics(runtime)
             return WrapperSimResult(
                 states={
-                    self._get_scenario_object_name(object_id): states
-                    for object_id, states in all_states.items()
+                    self._get_scenario_object_name(object_id): trajectory
+                    for object_id, trajectory in recorder.trajectories().items()
                 },
                 sim_time=sim_time,
                 runtime=runtime,
                 ending_cause=cause,
             )
 
+    def simulate_scenario_stream(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> Generator[EsminiStreamFrame, None, WrapperSimResult]:
+        with EsminiWrapper.__lock:
+            if not self._initialize_scenario_engine(
+                scenario_path,
+                viewer_mode=0,
+                use_threading=False,
+                parameter_values=parameter_values,
+            ):
+                warnings.warn(
+                    "<EsminiWrapper/simulate_scenario_stream> Failed to initialize scenario engine"
+                )
+                return WrapperSimResult.failure()
+            sim_time = 0.0
+            runtime_start = time.time()
+            object_names: Dict[int, str] = {}
+            # the states are decimated like in simulate_scenario and yielded about once per recorded time step
+            recorder = EsminiStateRecorder(record_dt=self.record_dt)
+            steps_per_frame = (
+                max(1, round(self.record_dt / sim_dt))
+                if self.record_dt is not None
+                else _STREAM_FRAME_STEPS
+            )
+            num_steps = 0
+            states = self._record_scenario_object_states(recorder)
+            while (cause := self._sim_finished(states)) is None:
+                self._sim_step(sim_dt)
+                sim_time += sim_dt
+                num_steps += 1
+                states = self._record_scenario_object_states(recorder)
+                if num_steps % steps_per_frame == 0:
+                    frame = self._stream_frame(recorder.pop_settled(), object_names)
+                    if frame is not None:
+                        yield frame
+            frame = self._stream_frame(recorder.pop_settled(final=True), object_names)
+            if frame is not None:
+                yield frame
+            runtime = time.time() - runtime_start
+            self._log_native_call_statistics(runtime)
+            return WrapperSimResult(
+                states={},
+                sim_time=sim_time,
+                runtime=runtime,
+                ending_cause=cause,
+            )
+
+    def _stream_frame(
+        self, states: np.ndarray, object_names: Dict[int, str]
+    ) -> Optional[EsminiStreamFrame]:
+        if len(states) == 0:
+            return None
+        # the names are looked up while the scenario engine still knows the objects
+        for object_id in set(states["id"].tolist()) - object_names.keys():
+            object_names[object_id] = self._get_scenario_object_name(object_id)
+        return EsminiStreamFrame(states, object_names)
+
+    def frame_states(self, frame: EsminiStreamFrame) -> Dict[str, EsminiTrajectory]:
+        states = frame.states[np.argsort(frame.states["id"], kind="stable")]
+        object_ids, starts = np.unique(states["id"], return_index=True)
+        return {
+            frame.object_names[object_id]: EsminiTrajectory(object_states)
+            for object_id, object_states in zip(
+                object_ids.tolist(), np.split(states, starts[1:])
+            )
+        }
+
     def view_scenario(
         self, scenario_path: str, window_size: Optional[EsminiParams.WindowSize] = None
     ):
-        with EsminiWrapper.__lock:
+        with EsminiWrapper.__render_lock, EsminiWrapper.__lock:
             if not self._initialize_scenario_engine(
                 scenario_path, viewer_mode=1, use_threading=True
             ):
@@ -259,7 +361,7 @@ class EsminiWrapper(SimWrapper):
         fps: int = 30,
         window_size: Optional[EsminiParams.WindowSize] = None,
     ) -> bool:
-        with EsminiWrapper.__lock:
+        with EsminiWrapper.__render_lock, EsminiWrapper.__lock:
             if not self._initialize_scenario_engine(
                 scenario_path, viewer_mode=7, use_threading=False
             ):
@@ -289,17 +391,36 @@ class EsminiWrapper(SimWrapper):
                     os.remove(image)
             return True
 
+    @staticmethod
+    def _reset_process_lock():
+        """
+        A forked child gets a copy of the parent's lock, which might be held by another thread of the parent
+        """
+        EsminiWrapper.__lock = threading.Lock()
+
     def _reset(self):
         self._all_sim_elements = {}
+        for policy in self.termination_policies:
+            policy.reset()
         self._scenario_engine_initialized = False
         self._first_frame_run = False
         self._callback_functor = None
         self._sim_end_detected_time = None
+        self._state_buffer = None
+        self._state_frame = None
+        self._object_ids = []
+        self._object_id_bytes = b""
+        self._object_state_pointers = []
 
     def _initialize_scenario_engine(
-        self, scenario_path: str, viewer_mode: int, use_threading: bool
+        self,
+        scenario_path: str,
+        viewer_mode: int,
+        use_threading: bool,
+        parameter_values: Optional[Dict[str, str]] = None,
     ) -> bool:
         self._reset()
+        self.esmini_lib.reset_call_statistics()
 
         self.esmini_lib.SE_LogToConsole(self.log_to_console)
         if self.log_to_file is None:
@@ -307,29 +428,57 @@ class EsminiWrapper(SimWrapper):
         else:
             self.esmini_lib.SE_SetLogFilePath(self.log_to_file.encode("ASCII"))
 
-        ret = self.esmini_lib.SE_Init(
-            scenario_path.encode("ASCII"),
-            int(0),
-            int(viewer_mode),
-            int(use_threading),
-            int(0),
-        )
+        if parameter_values:
+            ret = self._initialize_with_parameter_values(
+                scenario_path, viewer_mode, use_threading, parameter_values
+            )
+        else:
+            ret = self.esmini_lib.SE_Init(
+                scenario_path.encode("ASCII"),
+                int(0),
+                int(viewer_mode),
+                int(use_threading),
+                int(0),
+            )
         if ret != 0:
             return False
 
         self.esmini_lib.SE_SetSeed(self.random_seed)
 
-        self.esmini_lib.SE_OpenOSISocket("127.0.0.1")
+        self.esmini_lib.SE_OpenOSISocket("127.0.0.1".encode("ASCII"))
 
-        self._callback_functor = ct.CFUNCTYPE(None, ct.c_char_p, ct.c_int, ct.c_int)(
-            self.__state_change_callback
-        )
+        self._callback_functor = SE_STORYBOARD_CALLBACK(self.__state_change_callback)
         self.esmini_lib.SE_RegisterStoryBoardElementStateChangeCallback(
             self._callback_functor
         )
         self._scenario_engine_initialized = True
         return True
 
+    def _initialize_with_parameter_values(
+        self,
+        scenario_path: str,
+        viewer_mode: int,
+        use_threading: bool,
+        parameter_values: Dict[str, str],
+    ) -> int:
+        """
+        Initialize esmini with its command line arguments, overriding the parameter values without writing a modified
+        scenario file. Only the headless mode is supported.
+        """
+        if not self.esmini_lib.has("SE_InitWithArgs"):
+            warnings.warn(
+                "<EsminiWrapper/_initialize_with_parameter_values> esmini does not support SE_InitWithArgs"
+            )
+            return -1
+        assert viewer_mode == 0, "Parameter values are only supported headless"
+        args = ["esmini", "--osc", scenario_path, "--headless"]
+        if use_threading:
+            args.append("--threads")
+        for name, value in parameter_values.items():
+            args += ["--param", f"{name}={value}"]
+        argv = (ct.c_char_p * len(args))(*[arg.encode("ASCII") for arg in args])
+        return self.esmini_lib.SE_InitWithArgs(len(args), argv)
+
     def _set_set_window_size(self, window_size: EsminiParams.WindowSize):
         self.esmini_lib.SE_SetWindowPosAndSize(
             window_size.x, window_size.y, window_size.width, window_size.height
@@ -356,7 +505,9 @@ class EsminiWrapper(SimWrapper):
         else:
             assert self.esmini_lib.SE_Step() == 0
 
-    def _sim_finished(self) -> Optional[ESimEndingCause]:
+    def _sim_finished(
+        self, states: Optional[np.ndarray] = None
+    ) -> Optional[ESimEndingCause]:
         if not self._scenario_engine_initialized:
             return None
         if not self._first_frame_run:
@@ -372,31 +523,91 @@ class EsminiWrapper(SimWrapper):
         if now >= self.max_time:
             self._log("{:.3f}: Max Execution time reached ".format(now))
             return ESimEndingCause.MAX_TIME_REACHED
+        if states is not None and now >= self.min_time:
+            for policy in self.termination_policies:
+                cause = policy.check(now, self._all_sim_elements, states)
+                if cause is not None:
+                    self._log(
+                        "{:.3f}: {} -> Scenario ended early".format(now, cause.name)
+                    )
+                    return cause
         return None
 
-    def _get_scenario_object_states(self) -> Optional[Dict[int, SEStruct]]:
+    def _record_scenario_object_states(
+        self, recorder: EsminiStateRecorder
+    ) -> Optional[np.ndarray]:
+        states = self._get_scenario_object_states()
+        if states is not None:
+            recorder.record(states)
+        return states
+
+    def _get_scenario_object_states(self) -> Optional[np.ndarray]:
+        """
+        Fetch the states of all objects into a reused buffer.
+
+        :return: Zero-copy view of the buffer as structured array with the SE_STRUCT_DTYPE, valid until the next call
+        """
         if not self._scenario_engine_initialized:
             raise RuntimeError("Scenario Engine not initialized")
         try:
-            objects = {}
-            for j in range(self.esmini_lib.SE_GetNumberOfObjects()):
-                object_id = self.esmini_lib.SE_GetId(j)
-                objects[object_id] = SEStruct()
-                self.esmini_lib.SE_GetObjectState(
-                    object_id, ct.byref(objects[object_id])
+            num_objects = self.esmini_lib.SE_GetNumberOfObjects()
+            if self._state_buffer is None or len(self._state_buffer) < num_objects:
+                self._state_buffer = (SEStruct * max(num_objects, 16))()
+                self._state_frame = np.frombuffer(
+                    self._state_buffer, dtype=SE_STRUCT_DTYPE
                 )
+                self._object_ids = []
 
-            return objects
+            if self._bulk_state_fetch:
+                num_fetched = ct.c_int(len(self._state_buffer))
+                self.esmini_lib.SE_GetObjectStates(
+                    ct.byref(num_fetched), self._state_buffer
+                )
+                return self._state_frame[: num_fetched.value]
+
+            state_frame = self._state_frame[:num_objects]
+            if len(self._object_ids) == num_objects:
+                # the ids only change if objects are added or deleted, which the states of the cached ids reveal:
+                # a deleted object leaves its invalidated id, since esmini does not fetch its state
+                state_frame["id"] = -1
+                self._fetch_object_states()
+                if state_frame["id"].tobytes() == self._object_id_bytes:
+                    return state_frame
+            self._object_ids = [self.esmini_lib.SE_GetId(j) for j in range(num_objects)]
+            self._object_id_bytes = np.array(
+                self._object_ids, dtype=SE_STRUCT_DTYPE["id"]
+            ).tobytes()
+            self._object_state_pointers = [
+                ct.byref(self._state_buffer[j]) for j in range(num_objects)
+            ]
+            self._fetch_object_states()
+            return state_frame
         except Exception as e:
             logging.warning(
                 "Unexpected exception during scenario object extraction: {}".format(e)
             )
             return None
 
+    def _fetch_object_states(self):
+        for object_id, pointer in zip(self._object_ids, self._object_state_pointers):
+            self.esmini_lib.SE_GetObjectState(object_id, pointer)
+
     def _get_scenario_object_name(self, object_id: int) -> Optional[str]:
         raw_name: bytes = self.esmini_lib.SE_GetObjectName(object_id)
         return f"no-name-{object_id}" if raw_name is None else raw_name.decode("utf-8")
 
+    def _log_native_call_statistics(self, runtime: float):
+        if self.esmini_lib.instrumented:
+            logging.info(
+                "<EsminiWrapper> Native esmini calls of the last simulation ({:.3f} s):\n{}".format(
+                    runtime, self.esmini_lib.format_call_statistics(runtime)
+                )
+            )
+
     def _log(self, text: str):
         if self.log_to_console:
             print(text)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=EsminiWrapper._reset_process_lock)
@@ -8,29 +8,45 @@ __status__ = "beta"
 
 import os
 import re
-import sys
 import warnings
-from io import BytesIO
 from os import path
-from typing import Optional
-from zipfile import ZipFile
+from typing import Dict, Optional, Tuple
+from zipfile import BadZipFile
 
 import requests
 
+from osc_cr_converter.wrapper.esmini.esmini_binary_cache import EsminiBinaryCache
+from osc_cr_converter.wrapper.esmini.esmini_release import (
+    download_file,
+    extract_shared_libraries,
+    release_archive_url,
+)
 from osc_cr_converter.wrapper.esmini.esmini_wrapper import EsminiWrapper
+from osc_cr_converter.wrapper.esmini.esmini_engine_pool import EsminiEnginePool
 from osc_cr_converter.utility.configuration import ConverterParams
 
+# environment variable pointing to a preinstalled esmini bin directory or library
+ESMINI_LIB_PATH_ENV = "OSC_CR_CONVERTER_ESMINI_LIB"
+
+# esmini bin paths provided in this process per provider settings, so each process resolves them only once
+_provided_bin_paths: Dict[Tuple, str] = {}
+
 
 class EsminiWrapperProvider:
 
     """
-    This class downloads the wanted esmini version from GitHub and creates an EsminiWrapper from it.
+    This class provides an EsminiWrapper of the wanted esmini version.
+
+    A preinstalled esmini library is used if configured, otherwise the version is taken from the EsminiBinaryCache and
+    only downloaded from GitHub if it is not cached yet and the provider is not offline.
 
     It works on Mac Windows and Linux
     """
 
     def __init__(self, config: ConverterParams):
-        self.storage_prefix = None
+        self.cache = EsminiBinaryCache(config.esmini.cache_dir)
+        self.lib_path = config.esmini.lib_path or os.environ.get(ESMINI_LIB_PATH_ENV)
+        self.offline = config.esmini.offline
         self.preferred_version = config.esmini.version
         self.config = config
 
@@ -39,14 +55,12 @@ class EsminiWrapperProvider:
         """
         Path prefix where the downloaded binaries shall be stored
         """
-        return self._path_prefix
+        return self.cache.cache_dir
 
     @storage_prefix.setter
     def storage_prefix(self, new_path_prefix: Optional[str]):
-        if new_path_prefix is None:
-            self._path_prefix = path.abspath(path.dirname(__file__))
-        elif path.exists(new_path_prefix):
-            self._path_prefix = new_path_prefix
+        if new_path_prefix is None or path.exists(new_path_prefix):
+            self.cache = EsminiBinaryCache(new_path_prefix)
         else:
             warnings.warn(
                 f"<EsminiWrapperProvider/storage_prefix> Path not found {new_path_prefix}"
@@ -74,12 +88,42 @@ class EsminiWrapperProvider:
             )
 
     def provide_esmini_wrapper(self) -> Optional[EsminiWrapper]:
+        bin_path = self.provide_esmini_bin_path()
+        if bin_path is None:
+            return None
+        return EsminiWrapper(bin_path, self.config)
+
+    def provide_esmini_bin_path(self) -> Optional[str]:
+        """
+        The path of the esmini bin directory or library to use, resolved once per process and provider settings
+
+        :return: The path or None if no esmini version is available
+        """
+        key = (
+            self.lib_path,
+            self.storage_prefix,
+            self.offline,
+            self.preferred_version,
+        )
+        bin_path = _provided_bin_paths.get(key)
+        if bin_path is None:
+            bin_path = self._resolve_esmini_bin_path()
+            if bin_path is not None:
+                _provided_bin_paths[key] = bin_path
+        return bin_path
+
+    def _resolve_esmini_bin_path(self) -> Optional[str]:
+        if self.lib_path is not None:
+            if path.exists(self.lib_path):
+                return path.abspath(self.lib_path)
+            warnings.warn(
+                f"<EsminiWrapperProvider/provide_esmini_wrapper> Preinstalled esmini {self.lib_path} not found"
+            )
+
         if self.preferred_version is not None:
-            if self._try_loading_version(self.preferred_version):
-                return EsminiWrapper(
-                    self._bin_path(self._esmini_path(self.preferred_version)),
-                    self.config,
-                )
+            bin_path = self._provide_version(self.preferred_version)
+            if bin_path is not None:
+                return bin_path
             else:
                 print(
                     "Failed loading specified esmini version: {}".format(
@@ -88,68 +132,64 @@ class EsminiWrapperProvider:
                 )
                 quit()
 
-        try:
-            r = requests.get("https://github.com/esmini/esmini/releases/latest")
-            version = r.url.split("/")[-1]
-            if self._try_loading_version(version):
-                return EsminiWrapper(
-                    self._bin_path(self._esmini_path(version)), self.config
+        if not self.offline:
+            try:
+                r = requests.get(
+                    self.config.esmini.releases_url.rstrip("/") + "/latest",
+                    timeout=10,
                 )
-        except requests.exceptions.ConnectionError:
-            pass
-
-        available_versions = sorted(
-            [
-                dir_path
-                for dir_path in os.listdir(self.storage_prefix)
-                if re.match(self._esmini_path(""), dir_path)
-                and os.path.exists(self._bin_path(dir_path))
-            ]
-        )
-
+                version = r.url.split("/")[-1]
+                bin_path = self._provide_version(version)
+                if bin_path is not None:
+                    return bin_path
+            except requests.exceptions.RequestException:
+                pass
+
+        available_versions = self.cache.versions()
         if len(available_versions) > 0:
-            return EsminiWrapper(self._bin_path(available_versions[-1]), self.config)
+            return self.cache.bin_path(available_versions[-1])
 
         return None
 
-    def _try_loading_version(self, version: str) -> bool:
-        if not path.exists(self._bin_path(self._esmini_path(version))):
-            return self._download_esmini(version)
-        return True
-
-    @staticmethod
-    def _esmini_path(version: str) -> str:
-        return "esmini_{}".format(version)
-
-    def _abs_path(self, rel_path: str) -> str:
-        return path.abspath(path.join(self.storage_prefix, rel_path))
-
-    def _bin_path(self, esmini_path: str) -> str:
-        return self._abs_path(path.join(esmini_path, "esmini", "bin"))
+    def provide_esmini_engine_pool(
+        self, num_engines: Optional[int] = None
+    ) -> Optional[EsminiEnginePool]:
+        """
+        Create an EsminiEnginePool, whose engines run the EsminiWrapper provided by provide_esmini_wrapper
 
-    def _download_esmini(self, version: str) -> bool:
-        archive_name = ""
-        if sys.platform.startswith("linux"):
-            archive_name = "esmini-bin_ubuntu.zip"
-        elif sys.platform.startswith("darwin"):
-            archive_name = "esmini-bin_mac_catalina.zip"
-        elif sys.platform.startswith("win32"):
-            archive_name = "esmini-bin_win_x64.zip"
-        else:
-            print("Unsupported platform: {}".format(sys.platform))
-            quit()
+        :param num_engines: Maximum number of engine processes, defaults to esmini.num_engines of the config
+        """
+        esmini_wrapper = self.provide_esmini_wrapper()
+        if esmini_wrapper is None:
+            return None
+        if num_engines is None:
+            num_engines = self.config.esmini.num_engines
+        return EsminiEnginePool(esmini_wrapper, num_engines)
+
+    def _provide_version(self, version: str) -> Optional[str]:
+        """
+        The bin directory of the cached version, downloading it first if needed and allowed
+        """
+        bin_path = self.cache.lookup(version)
+        if bin_path is None and not self.offline:
+            bin_path = self.cache.populate(version, self._download_esmini)
+        return bin_path
+
+    def _download_esmini(self, version: str, target_dir: str) -> bool:
+        # the archive is kept next to the cache entry until it is extracted, so interrupted downloads are resumed
+        archive_path = self.cache.entry_path(version) + ".zip"
         try:
-            r = requests.get(
-                "/".join(
-                    [
-                        "https://github.com/esmini/esmini/releases/download",
-                        version,
-                        archive_name,
-                    ]
-                )
+            download_file(
+                release_archive_url(version, self.config.esmini.releases_url),
+                archive_path,
+            )
+            extract_shared_libraries(
+                archive_path, path.join(target_dir, "esmini", "bin")
             )
-            with ZipFile(BytesIO(r.content), "r") as zipObj:
-                zipObj.extractall(self._abs_path(self._esmini_path(version)))
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.RequestException:
+            return False
+        except BadZipFile:
+            os.remove(archive_path)
             return False
+        os.remove(archive_path)
         return True
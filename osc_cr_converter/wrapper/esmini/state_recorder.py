@@ -0,0 +1,304 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SE_STRUCT_DTYPE,
+    EsminiTrajectory,
+)
+
+# the states are stored as opaque records, which NumPy copies as a whole instead of field by field
+_RAW_STATE_DTYPE = np.dtype((np.void, SE_STRUCT_DTYPE.itemsize))
+
+
+class EsminiStateRecorder:
+    """
+    Columnar storage of the object states recorded during an esmini simulation.
+
+    Per object id the states are kept as raw SE_STRUCT_DTYPE records in a growable NumPy array, so no Python object is
+    kept per recorded state. The arrays double their capacity when full, which makes appending amortised O(1), and an
+    object only allocates memory for its own states. The bookkeeping of a simulation step, i.e. which states replace,
+    drop or append states, is decided for all objects at once on NumPy arrays holding one entry per object, so only
+    the copy of each state into the array of its object remains per object. While the same objects are recorded with
+    the same timestamp and the same number of states, as usual in esmini, the bookkeeping is shared by all objects and
+    decided once per step.
+
+    If record_dt is set, the recorder keeps only the states needed to resample the trajectories at the multiples of
+    record_dt (see StateResampler): the first two states, the last two states and the two states before and after every
+    multiple of record_dt. Resampling at these timestamps then yields exactly the same result as with all states.
+    """
+
+    def __init__(self, initial_capacity: int = 256, record_dt: Optional[float] = None):
+        assert initial_capacity > 0
+        assert record_dt is None or record_dt > 0
+        self._initial_capacity = initial_capacity
+        self._record_dt = record_dt
+        # the slot of each object id, indexing its array and its entries of the bookkeeping arrays
+        self._slots: Dict[int, int] = {}
+        self._buffers: List[np.ndarray] = []
+        # per slot: number of recorded states, capacity of the array and timestamp of the last state
+        self._sizes = np.zeros(0, dtype=np.intp)
+        self._capacities = np.zeros(0, dtype=np.intp)
+        self._last_timestamps = np.zeros(0)
+        # per slot: whether the second to last and the last recorded state need to be kept
+        self._required = np.zeros((0, 2), dtype=bool)
+        # per slot: number of upcoming states that need to be kept
+        self._keep_next = np.zeros(0, dtype=np.intp)
+        # the object ids of the previous step and their slots, reused while no object is added or deleted
+        self._step_ids: Optional[bytes] = None
+        self._step_slots = np.zeros(0, dtype=np.intp)
+        self._step_slot_list: List[int] = []
+        # whether the objects of the previous step share their bookkeeping, which is then kept in the following
+        # attributes instead of their entries of the bookkeeping arrays
+        self._synchronized = False
+        self._shared_size = 0
+        self._shared_last_timestamp = 0.0
+        self._shared_required = (True, True)
+        self._shared_keep_next = 0
+
+    @property
+    def object_ids(self):
+        """
+        Ids of all objects for which states were recorded
+        """
+        return self._slots.keys()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Number of bytes allocated for the recorded states
+        """
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+    def record(self, states: np.ndarray):
+        """
+        Append the states of one simulation step. If the timestamp of a state matches the one of the previous state of
+        the same object, the previous state is replaced instead.
+
+        :param states:np.ndarray: Structured array with the SE_STRUCT_DTYPE holding at most one state per object
+        """
+        if len(states) == 0:
+            return
+        object_ids = states["id"]
+        timestamps = states["timestamp"]
+        if self._synchronized:
+            if object_ids.tobytes() == self._step_ids:
+                timestamp_list = timestamps.tolist()
+                if timestamp_list.count(timestamp_list[0]) == len(timestamp_list):
+                    self._record_synchronized(states, timestamp_list[0])
+                    return
+            self._unshare()
+        slots = self._slots_of(object_ids)
+        sizes = self._sizes[slots]
+        recorded = sizes > 0
+        replaced = recorded & np.isclose(
+            timestamps, self._last_timestamps[slots], rtol=1e-9, atol=0.0
+        )
+        sizes -= replaced
+        appended = recorded & ~replaced
+        if self._record_dt is not None and appended.any():
+            sizes[appended] = self._decimate(
+                slots[appended], sizes[appended], timestamps[appended]
+            )
+        for slot in slots[sizes >= self._capacities[slots]].tolist():
+            self._grow(slot)
+
+        buffers = self._buffers
+        for slot, size, state in zip(
+            slots.tolist(), sizes.tolist(), states.view(_RAW_STATE_DTYPE)
+        ):
+            buffers[slot][size] = state
+        self._sizes[slots] = sizes + 1
+        self._last_timestamps[slots] = timestamps
+        self._share(slots)
+
+    def trajectories(self) -> Dict[int, EsminiTrajectory]:
+        """
+        The recorded states per object id, trimmed to the used size
+        """
+        self._unshare()
+        return {
+            object_id: EsminiTrajectory(
+                self._buffers[slot][: self._sizes[slot]].copy().view(SE_STRUCT_DTYPE)
+            )
+            for object_id, slot in self._slots.items()
+        }
+
+    def pop_settled(self, final: bool = False) -> np.ndarray:
+        """
+        Remove and return the recorded states, which can no longer change. The last two states of each object are kept
+        unless the simulation ended, since the next recorded state may still replace or drop them.
+
+        :param final: Whether no further states will be recorded, so all states are returned
+        :return: Structured array with the SE_STRUCT_DTYPE holding the states of each object in chronological order
+        """
+        self._unshare()
+        num_kept = 0 if final else 2
+        settled = []
+        for slot in self._slots.values():
+            buffer = self._buffers[slot]
+            size = int(self._sizes[slot])
+            num_settled = size - num_kept
+            if num_settled <= 0:
+                continue
+            settled.append(buffer[:num_settled].copy().view(SE_STRUCT_DTYPE))
+            buffer[: size - num_settled] = buffer[num_settled:size]
+            self._sizes[slot] = size - num_settled
+        if len(settled) == 0:
+            return np.empty(0, dtype=SE_STRUCT_DTYPE)
+        return np.concatenate(settled)
+
+    def _record_synchronized(self, states: np.ndarray, timestamp: float):
+        """
+        Record the states of the objects of the previous step, which share their timestamp, like record, but deciding
+        once for all objects
+        """
+        size = self._shared_size
+        if math.isclose(timestamp, self._shared_last_timestamp):
+            size -= 1
+        elif self._record_dt is not None:
+            required = self._shared_required
+            keep_next = self._shared_keep_next
+            if self._crosses_grid(self._shared_last_timestamp, timestamp):
+                required = (True, True)
+                keep_next = 2
+            if size >= 2 and not required[0]:
+                for slot in self._step_slot_list:
+                    buffer = self._buffers[slot]
+                    buffer[size - 2] = buffer[size - 1]
+                size -= 1
+            self._shared_required = (required[1], keep_next > 0)
+            self._shared_keep_next = max(0, keep_next - 1)
+
+        buffers = self._buffers
+        for slot, state in zip(self._step_slot_list, states.view(_RAW_STATE_DTYPE)):
+            if size == len(buffers[slot]):
+                self._grow(slot)
+            buffers[slot][size] = state
+        self._shared_size = size + 1
+        self._shared_last_timestamp = timestamp
+
+    def _share(self, slots: np.ndarray):
+        """
+        Keep the bookkeeping of the objects in the slots in the shared attributes, if it is the same for all of them
+        """
+        slot = slots[0]
+        if (
+            (self._sizes[slots] == self._sizes[slot]).all()
+            and (self._last_timestamps[slots] == self._last_timestamps[slot]).all()
+            and (self._required[slots] == self._required[slot]).all()
+            and (self._keep_next[slots] == self._keep_next[slot]).all()
+        ):
+            self._synchronized = True
+            self._shared_size = int(self._sizes[slot])
+            self._shared_last_timestamp = float(self._last_timestamps[slot])
+            self._shared_required = tuple(self._required[slot].tolist())
+            self._shared_keep_next = int(self._keep_next[slot])
+
+    def _unshare(self):
+        """
+        Write the shared bookkeeping back to the entries of the objects of the previous step
+        """
+        if not self._synchronized:
+            return
+        slots = self._step_slots
+        self._sizes[slots] = self._shared_size
+        self._last_timestamps[slots] = self._shared_last_timestamp
+        self._required[slots] = self._shared_required
+        self._keep_next[slots] = self._shared_keep_next
+        self._synchronized = False
+
+    def _slots_of(self, object_ids: np.ndarray) -> np.ndarray:
+        """
+        The slots of the objects, adding a slot for each new object
+        """
+        ids = object_ids.tobytes()
+        if ids != self._step_ids:
+            slots = []
+            for object_id in object_ids.tolist():
+                slot = self._slots.get(object_id)
+                if slot is None:
+                    slot = self._add_slot(object_id)
+                slots.append(slot)
+            self._step_ids = ids
+            self._step_slots = np.array(slots, dtype=np.intp)
+            self._step_slot_list = slots
+        return self._step_slots
+
+    def _add_slot(self, object_id: int) -> int:
+        slot = len(self._buffers)
+        if slot == len(self._sizes):
+            added = max(slot, 4)
+            self._sizes = np.concatenate([self._sizes, np.zeros(added, np.intp)])
+            self._capacities = np.concatenate(
+                [self._capacities, np.zeros(added, np.intp)]
+            )
+            self._last_timestamps = np.concatenate(
+                [self._last_timestamps, np.zeros(added)]
+            )
+            self._required = np.concatenate(
+                [self._required, np.zeros((added, 2), dtype=bool)]
+            )
+            self._keep_next = np.concatenate(
+                [self._keep_next, np.zeros(added, np.intp)]
+            )
+        self._slots[object_id] = slot
+        self._buffers.append(np.empty(self._initial_capacity, dtype=_RAW_STATE_DTYPE))
+        self._capacities[slot] = self._initial_capacity
+        self._required[slot] = True
+        self._keep_next[slot] = 1
+        return slot
+
+    def _grow(self, slot: int):
+        size = self._shared_size if self._synchronized else self._sizes[slot]
+        buffer = np.empty(2 * self._capacities[slot], dtype=_RAW_STATE_DTYPE)
+        buffer[:size] = self._buffers[slot][:size]
+        self._buffers[slot] = buffer
+        self._capacities[slot] = len(buffer)
+
+    def _decimate(
+        self, slots: np.ndarray, sizes: np.ndarray, timestamps: np.ndarray
+    ) -> np.ndarray:
+        """
+        Drop the second to last state of the objects in the slots if it is not needed for resampling, before the
+        states with the given timestamps are appended.
+
+        :return: The indices at which the new states shall be stored
+        """
+        crosses_grid = self._crosses_grid(self._last_timestamps[slots], timestamps)
+        required = self._required[slots]
+        required[crosses_grid] = True
+        keep_next = np.where(crosses_grid, 2, self._keep_next[slots])
+
+        dropped = (sizes >= 2) & ~required[:, 0]
+        for slot, size in zip(slots[dropped].tolist(), sizes[dropped].tolist()):
+            buffer = self._buffers[slot]
+            buffer[size - 2] = buffer[size - 1]
+        sizes = sizes - dropped
+
+        self._required[slots, 0] = required[:, 1]
+        self._required[slots, 1] = keep_next > 0
+        self._keep_next[slots] = np.maximum(0, keep_next - 1)
+        return sizes
+
+    def _crosses_grid(self, previous_timestamps, timestamps):
+        """
+        Whether a multiple of record_dt lies in the interval (previous_timestamp, timestamp], for single timestamps or
+        per object
+        """
+        # the first multiple after the previous timestamp, robust against rounding
+        step = np.floor(previous_timestamps / self._record_dt)
+        step += step * self._record_dt <= previous_timestamps
+        step += step * self._record_dt <= previous_timestamps
+        return (step * self._record_dt > previous_timestamps) & (
+            step * self._record_dt <= timestamps
+        )
@@ -0,0 +1,148 @@
+__author__ = "Michael Ratzel, Yuanfei Lin"
+__copyright__ = "TUM Cyber-Physical Systems Group"
+__credits__ = ["KoSi"]
+__version__ = "0.1.0"
+__maintainer__ = "Yuanfei Lin"
+__email__ = "commonroad@lists.lrz.de"
+__status__ = "beta"
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from osc_cr_converter.utility.configuration import EsminiParams
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.esmini.storyboard_element import (
+    EStoryBoardElementLevel,
+    EStoryBoardElementState,
+    StoryBoardElement,
+)
+
+
+class TerminationPolicy:
+    """
+    Base class of the policies ending an esmini simulation before max_time is reached.
+
+    A policy ends the simulation once its condition held for at least hold_time seconds without interruption.
+    """
+
+    ending_cause: ESimEndingCause
+
+    def __init__(self, hold_time: float = 0.0):
+        assert hold_time >= 0.0
+        self.hold_time = hold_time
+        self._condition_met_since: Optional[float] = None
+
+    def reset(self):
+        """
+        Forget the state of the previous simulation
+        """
+        self._condition_met_since = None
+
+    def check(
+        self,
+        now: float,
+        sim_elements: Dict[StoryBoardElement, EStoryBoardElementState],
+        states: np.ndarray,
+    ) -> Optional[ESimEndingCause]:
+        """
+        Check whether the simulation shall end
+
+        :param now: The current simulation time
+        :param sim_elements: The current states of the storyboard elements
+        :param states: Structured array with the SE_STRUCT_DTYPE holding the current state of every object
+        :return: The ending cause if the simulation shall end, else None
+        """
+        if not self._condition_met(sim_elements, states):
+            self._condition_met_since = None
+            return None
+        if self._condition_met_since is None:
+            self._condition_met_since = now
+        if now - self._condition_met_since >= self.hold_time:
+            return self.ending_cause
+        return None
+
+    def _condition_met(
+        self,
+        sim_elements: Dict[StoryBoardElement, EStoryBoardElementState],
+        states: np.ndarray,
+    ) -> bool:
+        raise NotImplementedError
+
+
+class AllStoriesCompletePolicy(TerminationPolicy):
+    """
+    Ends the simulation when every story of the storyboard is complete
+    """
+
+    ending_cause = ESimEndingCause.ALL_STORIES_COMPLETE
+
+    def _condition_met(
+        self,
+        sim_elements: Dict[StoryBoardElement, EStoryBoardElementState],
+        states: np.ndarray,
+    ) -> bool:
+        story_states = [
+            state
+            for element, state in sim_elements.items()
+            if element.element_type == EStoryBoardElementLevel.STORY
+        ]
+        return len(story_states) > 0 and all(
+            state == EStoryBoardElementState.COMPLETE for state in story_states
+        )
+
+
+class StandstillPolicy(TerminationPolicy):
+    """
+    Ends the simulation when no object moved faster than max_speed for hold_time seconds
+    """
+
+    ending_cause = ESimEndingCause.ALL_ENTITIES_STANDSTILL
+
+    def __init__(self, hold_time: float, max_speed: float = 0.01):
+        super().__init__(hold_time)
+        self.max_speed = max_speed
+
+    def _condition_met(
+        self,
+        sim_elements: Dict[StoryBoardElement, EStoryBoardElementState],
+        states: np.ndarray,
+    ) -> bool:
+        return len(states) > 0 and bool(
+            np.all(np.abs(states["speed"]) <= self.max_speed)
+        )
+
+
+class OffRoadPolicy(TerminationPolicy):
+    """
+    Ends the simulation when all objects were off-road, i.e. not on any road of the map, for hold_time seconds
+    """
+
+    ending_cause = ESimEndingCause.ALL_ENTITIES_OFF_ROAD
+
+    def _condition_met(
+        self,
+        sim_elements: Dict[StoryBoardElement, EStoryBoardElementState],
+        states: np.ndarray,
+    ) -> bool:
+        # esmini reports a negative road id for objects which are not on a road
+        return len(states) > 0 and bool(np.all(states["roadId"] < 0))
+
+
+def termination_policies_from_config(config: EsminiParams) -> List[TerminationPolicy]:
+    """
+    Create the termination policies enabled in the esmini config
+
+    :param config: The esmini config
+    :return: The enabled termination policies
+    """
+    policies = []
+    if config.stories_complete_hold_time is not None:
+        policies.append(AllStoriesCompletePolicy(config.stories_complete_hold_time))
+    if config.standstill_hold_time is not None:
+        policies.append(
+            StandstillPolicy(config.standstill_hold_time, config.standstill_max_speed)
+        )
+    if config.off_road_hold_time is not None:
+        policies.append(OffRoadPolicy(config.off_road_hold_time))
+    return policies
@@ -28,7 +28,7 @@ setup(
     data_files=[(".", ["LICENSE"])],
     packages=find_packages(),
     install_requires=[
-        "commonroad-io>=2024.2",
+        "commonroad-io>=2024.2,<2025",
         "commonroad-scenario-designer>=0.8.2",
         "imageio>=2.28.1",
         "numpy>=1.19.0",
@@ -0,0 +1,84 @@
+import copy
+import os
+import unittest
+
+from commonroad.geometry.shape import Circle, Rectangle
+from commonroad.prediction.prediction import TrajectoryPrediction
+from commonroad.scenario.obstacle import DynamicObstacle, ObstacleType
+from commonroad.scenario.scenario import Scenario
+from commonroad.scenario.state import InitialState, CustomState
+from commonroad.scenario.trajectory import Trajectory
+from crdesigner.map_conversion.map_conversion_interface import opendrive_to_commonroad
+
+xodr_file = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "../scenarios/from_esmini/xodr/fabriksgatan.xodr",
+)
+
+
+def create_obstacle(
+    obstacle_id: int, shape, lanelet, num_states: int
+) -> DynamicObstacle:
+    """Obstacle driving along the center vertices of the lanelet, without trajectory if num_states is 0"""
+    positions = lanelet.center_vertices[: num_states + 1]
+    states = [
+        CustomState(position=position, orientation=0.0, time_step=time_step)
+        for time_step, position in enumerate(positions[1:], start=1)
+    ]
+    return DynamicObstacle(
+        obstacle_id=obstacle_id,
+        obstacle_type=ObstacleType.CAR,
+        obstacle_shape=shape,
+        initial_state=InitialState(
+            position=positions[0],
+            orientation=0.0,
+            velocity=0.0,
+            acceleration=0.0,
+            yaw_rate=0.0,
+            slip_angle=0.0,
+            time_step=0,
+        ),
+        prediction=TrajectoryPrediction(Trajectory(1, states), shape)
+        if len(states) > 0
+        else None,
+    )
+
+
+def lanelet_ids(scenario: Scenario):
+    return {lanelet.lanelet_id for lanelet in scenario.lanelet_network.lanelets}
+
+
+def lanelet_assignments(scenario: Scenario):
+    return {
+        obstacle.obstacle_id: (
+            obstacle.initial_shape_lanelet_ids,
+            obstacle.initial_center_lanelet_ids,
+            obstacle.prediction.shape_lanelet_assignment,
+            obstacle.prediction.center_lanelet_assignment,
+        )
+        for obstacle in scenario.dynamic_obstacles
+    }
+
+
+class ObstaclesOnMapTestCase(unittest.TestCase):
+    """Two obstacles driving on the first and the last lanelet of the fabriksgatan map, converted once per class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.map = opendrive_to_commonroad(xodr_file)
+
+    def setUp(self):
+        self.scenario = copy.deepcopy(self.map)
+        lanelets = self.scenario.lanelet_network.lanelets
+        self.obstacles = [
+            create_obstacle(
+                self.scenario.generate_object_id(),
+                Rectangle(4.0, 2.0),
+                lanelets[0],
+                5,
+            ),
+            create_obstacle(
+                self.scenario.generate_object_id(), Circle(1.0), lanelets[-1], 3
+            ),
+        ]
+        self.scenario.add_objects(self.obstacles)
@@ -0,0 +1,69 @@
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SEStruct,
+    EsminiTrajectory,
+    se_structs_to_array,
+)
+
+
+def create_recorded_states(num_states: int, dt: float, seed: int = 0):
+    """Creates a list of SEStructs resembling a recorded esmini trajectory"""
+    rng = np.random.default_rng(seed)
+    states = []
+    for i in range(num_states):
+        state = SEStruct()
+        state.timestamp = i * dt
+        state.x = 3.0 * i * dt + rng.normal()
+        state.y = 0.5 * i * dt + rng.normal()
+        state.z = rng.normal() * 0.1
+        state.h = rng.uniform(-np.pi, np.pi)
+        state.p = rng.normal() * 0.05
+        state.r = rng.normal() * 0.05
+        state.speed = rng.uniform(0, 20)
+        state.centerOffsetX = 1.4
+        state.centerOffsetY = 0.1
+        state.centerOffsetZ = 0.7
+        state.wheel_angle = rng.normal() * 0.1
+        state.length = 4.5
+        state.width = 1.8
+        state.objectType = 1
+        states.append(state)
+    return states
+
+
+class FakeSimWrapper(SimWrapper):
+    """
+    Returns a trajectory of two vehicles, recording the simulated parameter values
+    """
+
+    def __init__(self, config: ConverterParams):
+        super().__init__(config)
+        self.simulated_parameter_values = []
+        self._lock = threading.Lock()
+
+    def simulate_scenario(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> WrapperSimResult:
+        with self._lock:
+            self.simulated_parameter_values.append(parameter_values)
+        return WrapperSimResult(
+            states={
+                name: EsminiTrajectory(
+                    se_structs_to_array(create_recorded_states(100, sim_dt, seed))
+                )
+                for seed, name in enumerate(("Ego", "OverTaker"))
+            },
+            sim_time=99 * sim_dt,
+            runtime=0.0,
+            ending_cause=ESimEndingCause.END_DETECTED,
+        )
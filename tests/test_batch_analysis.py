@@ -0,0 +1,87 @@
+import contextlib
+import io
+import os
+import pickle
+import tempfile
+import unittest
+
+from osc_cr_converter.batch.analysis import analyze_results, _unpack_variants
+from osc_cr_converter.batch.converter import BatchConversionResult
+from osc_cr_converter.converter.base import EFailureReason
+from osc_cr_converter.converter.result import (
+    Osc2CrConverterResult,
+    Osc2CrDistributionResult,
+)
+from osc_cr_converter.utility.statistics import ConversionStatistics
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+
+
+def _converter_result(xosc_file: str, parameter_values=None) -> Osc2CrConverterResult:
+    return Osc2CrConverterResult(
+        statistics=ConversionStatistics(
+            num_obstacle_conversions=2,
+            failed_obstacle_conversions=[],
+            ego_vehicle="Ego",
+            ego_vehicle_found_with_filter=False,
+            ego_vehicle_removed=False,
+            sim_ending_cause=ESimEndingCause.END_DETECTED,
+            sim_time=10.0,
+            runtime=1.0,
+        ),
+        analysis={},
+        xosc_file=xosc_file,
+        xodr_file=None,
+        xodr_conversion_error=None,
+        obstacles_extra_info_finder_error=None,
+        scenario=None,
+        planning_problem_set=None,
+        parameter_values=parameter_values,
+    )
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def _batch_result(self, name: str, result) -> BatchConversionResult:
+        result_file = os.path.join(self.tmp_dir, f"{name}.pickle")
+        with open(result_file, "wb") as file:
+            pickle.dump(result, file)
+        return BatchConversionResult.from_result_file(result_file)
+
+    def test_distribution_variants_are_counted(self):
+        distribution = Osc2CrDistributionResult(
+            xosc_file="distribution.xosc",
+            scenario_file="scenario.xosc",
+            parameter_sets=[{"Speed": "10"}, {"Speed": "20"}, {"Speed": "30"}],
+            variants=[
+                _converter_result("distribution.xosc", {"Speed": "10"}),
+                EFailureReason.SIMULATION_FAILED_CREATING_OUTPUT,
+                _converter_result("distribution.xosc", {"Speed": "30"}),
+            ],
+        )
+        results = {
+            "scenario.xosc": self._batch_result(
+                "scenario", _converter_result("scenario.xosc")
+            ),
+            "distribution.xosc": self._batch_result("distribution", distribution),
+        }
+
+        variants = _unpack_variants(
+            "distribution.xosc", results["distribution.xosc"].get_result()
+        )
+        self.assertEqual(
+            [path for path, _ in variants],
+            ["distribution.xosc[0]", "distribution.xosc[1]", "distribution.xosc[2]"],
+        )
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            analyze_results(results)
+        lines = output.getvalue().splitlines()
+        self.assertIn(f"{'Total num scenarios':<50s}     4", lines)
+        self.assertIn(f"{' | of ParameterValueDistributions':<50s}     1", lines)
+        self.assertIn(f"{'Conversion success rate':<50s}  75.0 % (3/4)", lines)
+        self.assertIn("SIMULATION_FAILED_CREATING_OUTPUT : distribution.xosc[1]", lines)
@@ -0,0 +1,177 @@
+import os
+import pickle
+import tempfile
+import unittest
+import warnings
+from os import path
+from unittest import mock
+
+from osc_cr_converter.utility import catalog_index
+from osc_cr_converter.utility.catalog_index import CatalogIndex
+
+_catalog_template = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+   <FileHeader revMajor="1" revMinor="0" date="2023-01-01T00:00:00" description="Catalog" author="Test"/>
+   <Catalog name="{catalog_name}">{vehicles}
+   </Catalog>
+</OpenSCENARIO>
+"""
+
+_vehicle_template = """
+      <Vehicle name="{name}" vehicleCategory="car">
+         <ParameterDeclarations/>
+         <Performance maxSpeed="69" maxDeceleration="10" maxAcceleration="5"/>
+         <BoundingBox>
+            <Center x="1.4" y="0.0" z="0.75"/>
+            <Dimensions width="2.0" length="{length}" height="1.5"/>
+         </BoundingBox>
+         <Axles>
+            <FrontAxle maxSteering="0.5" wheelDiameter="0.8" trackWidth="1.68" positionX="2.98" positionZ="0.4"/>
+            <RearAxle maxSteering="0.0" wheelDiameter="0.8" trackWidth="1.68" positionX="0" positionZ="0.4"/>
+         </Axles>
+         <Properties/>
+      </Vehicle>"""
+
+
+def write_catalog(file: str, catalog_name: str, lengths: dict):
+    with open(file, "w") as f:
+        f.write(
+            _catalog_template.format(
+                catalog_name=catalog_name,
+                vehicles="".join(
+                    _vehicle_template.format(name=name, length=length)
+                    for name, length in lengths.items()
+                ),
+            )
+        )
+
+
+class TestCatalogIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.vehicle_catalog = path.join(self.tmp_dir.name, "VehicleCatalog.xosc")
+        self.other_catalog = path.join(self.tmp_dir.name, "OtherCatalog.xosc")
+        write_catalog(self.vehicle_catalog, "VehicleCatalog", {"car": 4.5, "van": 5})
+        write_catalog(self.other_catalog, "OtherCatalog", {"truck": 12})
+        self.catalog_files = [self.vehicle_catalog, self.other_catalog]
+        self.index_file = path.join(self.tmp_dir.name, "index", "catalogs.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_find_vehicle(self):
+        index = CatalogIndex()
+        car = index.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        self.assertEqual(car.name, "car")
+        self.assertEqual(car.boundingbox.boundingbox.length, 4.5)
+        self.assertIsNone(index.find_vehicle(self.catalog_files, "VehicleCatalog", "x"))
+        self.assertIsNone(index.find_vehicle(self.catalog_files, "Unknown", "car"))
+        self.assertEqual(index.misses, 2)
+        # the vehicle is parsed only once
+        self.assertIs(
+            index.find_vehicle(self.catalog_files, "VehicleCatalog", "car"), car
+        )
+
+    def test_changed_file_is_indexed_again(self):
+        index = CatalogIndex()
+        index.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        write_catalog(self.vehicle_catalog, "VehicleCatalog", {"car": 3.25})
+        car = index.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        self.assertEqual(car.boundingbox.boundingbox.length, 3.25)
+        self.assertEqual(index.misses, 2)
+
+    def test_stops_at_requested_entry(self):
+        # everything after the requested entry is never read
+        with open(self.vehicle_catalog) as f:
+            content = f.read()
+        with open(self.vehicle_catalog, "w") as f:
+            f.write(content[: content.index("</Vehicle>") + len("</Vehicle>")])
+            f.write("<Vehicle <<< not well-formed")
+        index = CatalogIndex()
+        car = index.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        self.assertEqual(car.boundingbox.boundingbox.length, 4.5)
+        # only the requested entry is kept
+        self.assertEqual(
+            set(index.entries(self.vehicle_catalog).vehicles.keys()), {"car"}
+        )
+
+    def test_missing_entry_is_remembered(self):
+        index = CatalogIndex()
+        self.assertIsNone(index.find_vehicle(self.catalog_files, "OtherCatalog", "x"))
+        self.assertIsNone(index.find_vehicle(self.catalog_files, "OtherCatalog", "x"))
+        self.assertEqual((index.misses, index.hits), (1, 1))
+        self.assertEqual(index.entries(self.other_catalog).missing_vehicles, {"x"})
+
+    def test_persisted_across_runs(self):
+        third_catalog = path.join(self.tmp_dir.name, "ThirdCatalog.xosc")
+        write_catalog(third_catalog, "ThirdCatalog", {"bus": 10})
+        # concurrent runs merge their entries into the index file
+        first_run = CatalogIndex(self.index_file)
+        second_run = CatalogIndex(self.index_file)
+        first_run.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        second_run.find_vehicle([third_catalog], "ThirdCatalog", "bus")
+        first_run.save()
+        second_run.save()
+
+        next_run = CatalogIndex(self.index_file)
+        self.assertEqual(
+            next_run.find_vehicle(self.catalog_files, "VehicleCatalog", "car").name,
+            "car",
+        )
+        self.assertEqual(
+            next_run.find_vehicle([third_catalog], "ThirdCatalog", "bus").name, "bus"
+        )
+        self.assertEqual(next_run.misses, 0)
+        # entries are resolved only once referenced
+        self.assertEqual(
+            next_run.find_vehicle(self.catalog_files, "OtherCatalog", "truck").name,
+            "truck",
+        )
+        self.assertEqual(next_run.misses, 1)
+
+    def test_shared_per_process(self):
+        self.assertIs(
+            CatalogIndex.shared(self.index_file), CatalogIndex.shared(self.index_file)
+        )
+        self.assertIsNot(CatalogIndex.shared(self.index_file), CatalogIndex.shared())
+
+    def test_index_of_other_content_is_not_used(self):
+        index = CatalogIndex(self.index_file)
+        index.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        index.save()
+        # change the file keeping its modification time and size
+        stat = os.stat(self.vehicle_catalog)
+        write_catalog(self.vehicle_catalog, "VehicleCatalog", {"car": 7.5, "van": 5})
+        os.utime(self.vehicle_catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        next_run = CatalogIndex(self.index_file)
+        car = next_run.find_vehicle(self.catalog_files, "VehicleCatalog", "car")
+        self.assertEqual(car.boundingbox.boundingbox.length, 7.5)
+        self.assertEqual(next_run.misses, 1)
+
+    def test_only_the_returned_file_is_hashed(self):
+        index = CatalogIndex(self.index_file)
+        index.find_vehicle(self.catalog_files, "OtherCatalog", "truck")
+        index.save()
+
+        next_run = CatalogIndex(self.index_file)
+        with mock.patch(
+            "osc_cr_converter.utility.catalog_index._content_hash",
+            wraps=catalog_index._content_hash,
+        ) as content_hash:
+            next_run.find_vehicle(self.catalog_files, "OtherCatalog", "truck")
+            next_run.find_vehicle(self.catalog_files, "OtherCatalog", "truck")
+        content_hash.assert_called_once_with(self.other_catalog)
+        self.assertEqual(next_run.misses, 0)
+
+    def test_unreadable_index_is_ignored(self):
+        os.makedirs(path.dirname(self.index_file))
+        with open(self.index_file, "wb") as f:
+            pickle.dump({"not": "an index"}, f)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            index = CatalogIndex(self.index_file)
+        self.assertEqual(
+            index.find_vehicle(self.catalog_files, "VehicleCatalog", "car").name,
+            "car",
+        )
@@ -0,0 +1,52 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.converter.result import Osc2CrConverterResult
+from osc_cr_converter.utility.configuration import ConverterParams
+from tests.simulated_states import FakeSimWrapper
+
+_xosc_file = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "../scenarios/from_esmini/xosc/cut-in_simple.xosc",
+)
+
+
+def create_converter(dt_cr: float) -> Osc2CrConverter:
+    config = ConverterParams()
+    config.debug.write_to_xml = False
+    config.scenario.dt_cr = dt_cr
+    config.scenario.use_map_cache = False
+    config.scenario.map_memory_cache_size = 0
+    converter = Osc2CrConverter(config)
+    converter.sim_wrapper = FakeSimWrapper(config)
+    return converter
+
+
+class TestConcurrentConverters(unittest.TestCase):
+    def test_one_converter_per_thread(self):
+        time_steps = [0.1, 0.2, 0.4, 0.5] * 2
+        converters = [create_converter(dt_cr) for dt_cr in time_steps]
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            side_effect=lambda *args, **kwargs: Scenario(0.1),
+        ), ThreadPoolExecutor(len(converters)) as executor:
+            scenarios = list(
+                executor.map(
+                    lambda converter: converter.run_conversion(_xosc_file),
+                    converters,
+                )
+            )
+
+        for dt_cr, converter, scenario in zip(time_steps, converters, scenarios):
+            self.assertIsInstance(scenario, Scenario)
+            self.assertEqual(scenario.dt, dt_cr)
+            # each converter keeps the result and the settings of its own conversion
+            self.assertIsInstance(converter.conversion_result, Osc2CrConverterResult)
+            self.assertIs(converter.conversion_result.scenario, scenario)
+            self.assertEqual(converter.sim_wrapper.record_dt, dt_cr)
+            self.assertEqual(converter.config.general.name_xosc, "cut-in_simple")
@@ -0,0 +1,114 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from os import path
+from typing import Union
+from unittest import mock
+
+from osc_cr_converter.batch.converter import BatchConverter
+from osc_cr_converter.batch.corpus_index import CorpusEntry, CorpusIndex, EScenarioKind
+from osc_cr_converter.converter.base import Converter, EFailureReason
+from osc_cr_converter.converter.serializable import Serializable
+
+_xosc_dir = path.join(
+    path.dirname(path.realpath(__file__)), "../scenarios/from_esmini/xosc/"
+)
+
+_parameter_value_distribution = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+   <FileHeader revMajor="1" revMinor="1" date="2023-01-01T00:00:00" description="Distribution" author="Test"/>
+   <ParameterValueDistribution>
+      <ScenarioFile filepath="cut-in_simple.xosc"/>
+   </ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+
+class FileNameConverter(Converter):
+    """
+    Converter returning the name of the converted file
+    """
+
+    def run_conversion(self, source_file: str) -> Union[str, EFailureReason]:
+        self.conversion_result = path.basename(source_file)
+        return self.conversion_result
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_file = path.join(self.tmp_dir.name, "index", "corpus.sqlite")
+        self.scenario = path.join(self.tmp_dir.name, "cut-in_simple.xosc")
+        shutil.copy(path.join(_xosc_dir, "cut-in_simple.xosc"), self.scenario)
+        self.catalog = path.join(self.tmp_dir.name, "VehicleCatalog.xosc")
+        shutil.copy(
+            path.join(_xosc_dir, "Catalogs/Vehicles/VehicleCatalog.xosc"), self.catalog
+        )
+        self.distribution = path.join(self.tmp_dir.name, "distribution.xosc")
+        with open(self.distribution, "w") as file:
+            file.write(_parameter_value_distribution)
+        self.files = [self.scenario, self.catalog, self.distribution]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_classify(self):
+        entries = CorpusIndex(self.index_file).classify(self.files, num_worker=2)
+        scenario = entries[self.scenario]
+        self.assertEqual(scenario.kind, EScenarioKind.SCENARIO)
+        self.assertIsNone(scenario.failure_reason)
+        self.assertEqual(
+            scenario.logic_file_path(self.scenario),
+            path.join(self.tmp_dir.name, "../xodr/straight_500m.xodr"),
+        )
+        self.assertEqual(
+            scenario.catalog_locations["VehicleCatalog"], "../xosc/Catalogs/Vehicles"
+        )
+        self.assertEqual(scenario.entity_count, 2)
+        self.assertEqual(
+            entries[self.catalog].failure_reason,
+            EFailureReason.SCENARIO_FILE_IS_CATALOG,
+        )
+        self.assertEqual(
+            entries[self.distribution].failure_reason,
+            EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION,
+        )
+
+    def test_reused_across_runs(self):
+        entries = CorpusIndex(self.index_file).classify(self.files, num_worker=1)
+        # a copy has the same content and is therefore not scanned again
+        copy = path.join(self.tmp_dir.name, "copy.xosc")
+        shutil.copy(self.scenario, copy)
+        with mock.patch.object(CorpusEntry, "scan") as scan:
+            next_entries = CorpusIndex(self.index_file).classify(
+                self.files + [copy], num_worker=1
+            )
+            scan.assert_not_called()
+        self.assertEqual(next_entries[copy], entries[self.scenario])
+        for file in self.files:
+            self.assertEqual(next_entries[file], entries[file])
+
+    def test_batch_dispatches_only_convertible_files(self):
+        storage_dir = Serializable.storage_dir
+        Serializable.storage_dir = path.join(self.tmp_dir.name, "results")
+        os.makedirs(Serializable.storage_dir)
+        try:
+            batch_converter = BatchConverter(FileNameConverter(), self.index_file)
+            batch_converter.file_list = self.files
+            batch_converter.run_batch_conversion(num_worker=1)
+            with open(
+                path.join(Serializable.storage_dir, "statistics.pickle"), "rb"
+            ) as file:
+                results = pickle.load(file)
+        finally:
+            Serializable.storage_dir = storage_dir
+        self.assertEqual(
+            {file: result.get_result() for file, result in results.items()},
+            {
+                self.scenario: "cut-in_simple.xosc",
+                self.catalog: EFailureReason.SCENARIO_FILE_IS_CATALOG,
+                self.distribution: EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION,
+            },
+        )
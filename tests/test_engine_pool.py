@@ -0,0 +1,123 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
+from osc_cr_converter.wrapper.esmini.esmini_engine_pool import EsminiEnginePool
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SEStruct,
+    EsminiTrajectory,
+    se_structs_to_array,
+)
+
+
+class RecordingSimWrapper(SimWrapper):
+    """Stands in for the EsminiWrapper inside the engine processes, reporting which process simulated"""
+
+    def simulate_scenario(self, scenario_path: str, sim_dt: float) -> WrapperSimResult:
+        num_states = int(self.max_time / sim_dt)
+        states = {
+            scenario_path: EsminiTrajectory(
+                se_structs_to_array(
+                    [
+                        SEStruct(id=os.getpid(), timestamp=i * sim_dt)
+                        for i in range(num_states)
+                    ]
+                )
+            )
+        }
+        return WrapperSimResult(
+            states=states,
+            sim_time=self.max_time,
+            runtime=0.0,
+            ending_cause=ESimEndingCause.MAX_TIME_REACHED,
+        )
+
+    def simulate_scenario_stream(self, scenario_path: str, sim_dt: float):
+        result = self.simulate_scenario(scenario_path, sim_dt)
+        for state in result.states[scenario_path]:
+            yield {scenario_path: EsminiTrajectory(se_structs_to_array([state]))}
+        return WrapperSimResult(
+            states={},
+            sim_time=result.sim_time,
+            runtime=result.runtime,
+            ending_cause=result.ending_cause,
+        )
+
+
+class TestEsminiEnginePool(unittest.TestCase):
+    def test_concurrent_simulations(self):
+        wrapper = RecordingSimWrapper(ConverterParams())
+        with EsminiEnginePool(wrapper, num_engines=2) as pool:
+            pool.max_time = 2.0
+            with ThreadPoolExecutor(4) as executor:
+                results = list(
+                    executor.map(
+                        lambda name: pool.simulate_scenario(name, 0.01),
+                        [f"scenario_{i}" for i in range(8)],
+                    )
+                )
+
+        engine_pids = set()
+        for i, result in enumerate(results):
+            trajectory = result.states[f"scenario_{i}"]
+            self.assertEqual(len(trajectory), 200)
+            self.assertEqual(result.ending_cause, ESimEndingCause.MAX_TIME_REACHED)
+            engine_pids.add(int(trajectory[0].id))
+        self.assertNotIn(os.getpid(), engine_pids)
+        self.assertLessEqual(len(engine_pids), 2)
+
+    def test_engine_is_returned_after_unexpected_error(self):
+        wrapper = RecordingSimWrapper(ConverterParams())
+        with EsminiEnginePool(wrapper, num_engines=1) as pool:
+            pool.max_time = 1.0
+            # the arguments cannot be sent to the engine
+            with self.assertRaises(Exception):
+                pool.simulate_scenario(lambda: None, 0.1)
+            with ThreadPoolExecutor(1) as executor:
+                result = executor.submit(
+                    pool.simulate_scenario, "scenario", 0.1
+                ).result(timeout=60)
+        self.assertEqual(len(result.states["scenario"]), 10)
+
+    def test_streaming_simulation(self):
+        wrapper = RecordingSimWrapper(ConverterParams())
+        with EsminiEnginePool(wrapper, num_engines=1) as pool:
+            pool.max_time = 1.0
+            stream = pool.simulate_scenario_stream("scenario", 0.1)
+            frames = []
+            while True:
+                try:
+                    frames.append(pool.frame_states(next(stream))["scenario"])
+                except StopIteration as e:
+                    result = e.value
+                    break
+            self.assertEqual(len(frames), 10)
+            engine_pid = int(frames[0][0].id)
+            self.assertNotEqual(engine_pid, os.getpid())
+            self.assertEqual(result.sim_time, 1.0)
+
+            # a stopped stream returns the engine, which is not replaced
+            stream = pool.simulate_scenario_stream("stopped", 0.1)
+            next(stream)
+            stream.close()
+            result = pool.simulate_scenario("scenario", 0.1)
+            self.assertEqual(int(result.states["scenario"][0].id), engine_pid)
+
+    def test_shared_engines_with_own_settings(self):
+        wrapper = RecordingSimWrapper(ConverterParams())
+        with EsminiEnginePool(wrapper, num_engines=1) as pool:
+            shared = pool.share()
+            pool.max_time = 1.0
+            shared.max_time = 0.5
+            result = pool.simulate_scenario("scenario", 0.1)
+            shared_result = shared.simulate_scenario("scenario", 0.1)
+        self.assertEqual(len(result.states["scenario"]), 10)
+        self.assertEqual(len(shared_result.states["scenario"]), 5)
+        # both simulated on the same engine
+        self.assertEqual(
+            int(result.states["scenario"][0].id),
+            int(shared_result.states["scenario"][0].id),
+        )
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from os import path
+from unittest import mock
+
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.esmini.esmini_binary_cache import EsminiBinaryCache
+from osc_cr_converter.wrapper.esmini.esmini_lib import esmini_lib_name
+from osc_cr_converter.wrapper.esmini.esmini_wrapper_provider import (
+    EsminiWrapperProvider,
+)
+
+
+def fake_download(version: str, target_dir: str) -> bool:
+    """Stands in for the download of an esmini release, counting the calls in the target's parent directory"""
+    with open(path.join(path.dirname(target_dir), "downloads.log"), "a") as log:
+        log.write(version + "\n")
+    bin_path = path.join(target_dir, "esmini", "bin")
+    os.makedirs(bin_path)
+    with open(path.join(bin_path, esmini_lib_name()), "wb") as lib:
+        lib.write(version.encode() * 1000)
+    return True
+
+
+def populate_worker(cache_dir: str):
+    EsminiBinaryCache(cache_dir).populate("v2.29.3", fake_download)
+
+
+class TestEsminiBinaryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = EsminiBinaryCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def downloads(self):
+        log_path = path.join(self.tmp_dir.name, "downloads.log")
+        if not path.exists(log_path):
+            return []
+        with open(log_path) as log:
+            return log.read().split()
+
+    def test_populate_and_lookup(self):
+        self.assertIsNone(self.cache.lookup("v2.29.3"))
+        bin_path = self.cache.populate("v2.29.3", fake_download)
+        self.assertEqual(bin_path, self.cache.bin_path("v2.29.3"))
+        self.assertTrue(path.exists(path.join(bin_path, esmini_lib_name())))
+        self.assertEqual(self.cache.lookup("v2.29.3"), bin_path)
+        self.assertEqual(self.cache.populate("v2.29.3", fake_download), bin_path)
+        self.cache.populate("v2.9.0", fake_download)
+        self.assertEqual(self.cache.versions(), ["v2.9.0", "v2.29.3"])
+        self.assertEqual(self.downloads(), ["v2.29.3", "v2.9.0"])
+
+    def test_failed_download(self):
+        self.assertIsNone(self.cache.populate("v2.29.3", lambda *_: False))
+        self.assertEqual(
+            os.listdir(self.tmp_dir.name),
+            [path.basename(self.cache.entry_path("v2.29.3")) + ".lock"],
+        )
+
+    def test_checksum_mismatch(self):
+        bin_path = self.cache.populate("v2.29.3", fake_download)
+        with open(path.join(bin_path, esmini_lib_name()), "ab") as lib:
+            lib.write(b"corrupted")
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(self.cache.lookup("v2.29.3"))
+        with self.assertWarns(UserWarning):
+            self.assertEqual(self.cache.versions(), [])
+        with self.assertWarns(UserWarning):
+            self.assertEqual(self.cache.populate("v2.29.3", fake_download), bin_path)
+        self.assertEqual(self.downloads(), ["v2.29.3", "v2.29.3"])
+
+    def test_concurrent_populate(self):
+        workers = [
+            multiprocessing.Process(target=populate_worker, args=(self.tmp_dir.name,))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.downloads(), ["v2.29.3"])
+        self.assertIsNotNone(self.cache.lookup("v2.29.3"))
+
+    def test_offline_provider(self):
+        config = ConverterParams()
+        config.esmini.cache_dir = self.tmp_dir.name
+        config.esmini.offline = True
+        provider = EsminiWrapperProvider(config)
+        provider.preferred_version = None
+        with mock.patch("requests.get") as get:
+            self.assertIsNone(provider.provide_esmini_wrapper())
+            self.assertIsNone(provider._provide_version("v2.29.3"))
+            self.cache.populate("v2.29.3", fake_download)
+            self.assertEqual(
+                provider._provide_version("v2.29.3"), self.cache.bin_path("v2.29.3")
+            )
+            get.assert_not_called()
+
+    def test_bin_path_resolved_once_per_process(self):
+        config = ConverterParams()
+        config.esmini.cache_dir = self.tmp_dir.name
+        config.esmini.offline = True
+        provider = EsminiWrapperProvider(config)
+        provider.preferred_version = None
+        self.cache.populate("v2.29.3", fake_download)
+        with mock.patch.object(
+            EsminiWrapperProvider,
+            "_resolve_esmini_bin_path",
+            wraps=provider._resolve_esmini_bin_path,
+        ) as resolve:
+            for _ in range(3):
+                self.assertEqual(
+                    EsminiWrapperProvider(config).provide_esmini_bin_path(),
+                    self.cache.bin_path("v2.29.3"),
+                )
+            resolve.assert_called_once()
@@ -0,0 +1,49 @@
+import ctypes as ct
+import unittest
+from types import SimpleNamespace
+
+from osc_cr_converter.wrapper.esmini.esmini_lib import EsminiLib, _PROTOTYPES
+
+
+def create_fake_lib(*missing: str) -> SimpleNamespace:
+    """Stands in for the loaded ctypes.CDLL, each function returning its call arguments"""
+
+    def create_function():
+        return lambda *args: args
+
+    return SimpleNamespace(
+        **{name: create_function() for name in _PROTOTYPES if name not in missing}
+    )
+
+
+class TestEsminiLib(unittest.TestCase):
+    def test_prototypes_are_declared(self):
+        fake_lib = create_fake_lib()
+        lib = EsminiLib(fake_lib)
+        self.assertEqual(fake_lib.SE_StepDT.argtypes, [ct.c_float])
+        self.assertEqual(fake_lib.SE_GetSimulationTime.restype, ct.c_float)
+        self.assertEqual(fake_lib.SE_GetObjectName.restype, ct.c_char_p)
+        self.assertIs(lib.SE_StepDT, fake_lib.SE_StepDT)
+        self.assertTrue(lib.has("SE_GetObjectStates"))
+        self.assertEqual(lib.call_statistics, {})
+
+    def test_missing_functions(self):
+        lib = EsminiLib(create_fake_lib("SE_GetObjectStates"))
+        self.assertFalse(lib.has("SE_GetObjectStates"))
+        with self.assertRaises(AttributeError):
+            EsminiLib(create_fake_lib("SE_StepDT"))
+
+    def test_instrumented_calls(self):
+        lib = EsminiLib(create_fake_lib(), instrumented=True)
+        for _ in range(3):
+            self.assertEqual(lib.SE_StepDT(0.1), (0.1,))
+        lib.SE_GetQuitFlag()
+
+        statistics = lib.call_statistics
+        self.assertEqual(set(statistics.keys()), {"SE_StepDT", "SE_GetQuitFlag"})
+        self.assertEqual(statistics["SE_StepDT"].calls, 3)
+        self.assertGreaterEqual(statistics["SE_StepDT"].time, 0.0)
+        self.assertIn("SE_GetQuitFlag", lib.format_call_statistics(1.0))
+
+        lib.reset_call_statistics()
+        self.assertEqual(lib.call_statistics, {})
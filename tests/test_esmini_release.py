@@ -0,0 +1,144 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.esmini.esmini_lib import esmini_lib_name
+from osc_cr_converter.wrapper.esmini.esmini_release import (
+    download_file,
+    extract_shared_libraries,
+    release_archive_name,
+)
+from osc_cr_converter.wrapper.esmini.esmini_wrapper_provider import (
+    EsminiWrapperProvider,
+)
+
+
+def create_fake_release() -> bytes:
+    """A release archive with the layout of the esmini releases"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("esmini/bin/", b"")
+        archive.writestr(f"esmini/bin/{esmini_lib_name()}", os.urandom(200_000))
+        archive.writestr("esmini/bin/libesminiRMLib.so", b"road manager")
+        archive.writestr("esmini/bin/esmini", b"executable")
+        archive.writestr("esmini/resources/models/car.osgb", os.urandom(100_000))
+        archive.writestr("esmini/resources/xodr/straight.xodr", b"<OpenDRIVE/>")
+    return buffer.getvalue()
+
+
+class FakeReleaseServer(ThreadingHTTPServer):
+    """Serves a file with range requests, optionally closing the first connection after drop_after bytes"""
+
+    def __init__(self, content: bytes, drop_after: int = 0):
+        super().__init__(("127.0.0.1", 0), FakeReleaseHandler)
+        self.content = content
+        self.drop_after = drop_after
+        self.requested_ranges = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeReleaseHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content = self.server.content
+        offset = 0
+        range_header = self.headers.get("Range")
+        self.server.requested_ranges.append(range_header)
+        if range_header is not None:
+            offset = int(range_header[len("bytes=") :].rstrip("-"))
+            if offset >= len(content):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {offset}-{len(content) - 1}/{len(content)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(content) - offset))
+        self.end_headers()
+        if self.server.drop_after > 0:
+            self.wfile.write(content[offset : offset + self.server.drop_after])
+            self.server.drop_after = 0
+            self.close_connection = True
+            return
+        self.wfile.write(content[offset:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEsminiRelease(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.release = create_fake_release()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def serve(self, drop_after: int = 0) -> FakeReleaseServer:
+        server = FakeReleaseServer(self.release, drop_after)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_resume_interrupted_download(self):
+        server = self.serve(drop_after=50_000)
+        file_path = path.join(self.tmp_dir.name, "release.zip")
+        download_file(server.url + "/release.zip", file_path, chunk_size=4096)
+        with open(file_path, "rb") as file:
+            self.assertEqual(file.read(), self.release)
+        # the second request resumes after the data written before the connection was closed
+        self.assertEqual(len(server.requested_ranges), 2)
+        self.assertIsNone(server.requested_ranges[0])
+        self.assertRegex(server.requested_ranges[1], r"bytes=[1-9]\d*-")
+        self.assertFalse(path.exists(file_path + ".part"))
+
+    def test_resume_part_file_of_previous_run(self):
+        server = self.serve()
+        file_path = path.join(self.tmp_dir.name, "release.zip")
+        with open(file_path + ".part", "wb") as file:
+            file.write(self.release[:1000])
+        download_file(server.url + "/release.zip", file_path)
+        with open(file_path, "rb") as file:
+            self.assertEqual(file.read(), self.release)
+        self.assertEqual(server.requested_ranges, ["bytes=1000-"])
+
+    def test_extract_shared_libraries(self):
+        archive_path = path.join(self.tmp_dir.name, "release.zip")
+        with open(archive_path, "wb") as file:
+            file.write(self.release)
+        bin_path = path.join(self.tmp_dir.name, "esmini", "bin")
+        extracted = extract_shared_libraries(archive_path, bin_path)
+        self.assertCountEqual(extracted, [esmini_lib_name(), "libesminiRMLib.so"])
+        self.assertCountEqual(os.listdir(bin_path), extracted)
+        self.assertFalse(
+            path.exists(path.join(self.tmp_dir.name, "esmini", "resources"))
+        )
+
+    def test_provider_populates_cache(self):
+        server = self.serve(drop_after=100_000)
+        config = ConverterParams()
+        config.esmini.cache_dir = self.tmp_dir.name
+        config.esmini.releases_url = server.url
+        provider = EsminiWrapperProvider(config)
+        bin_path = provider._provide_version("v2.29.3")
+        self.assertEqual(bin_path, provider.cache.bin_path("v2.29.3"))
+        self.assertTrue(path.exists(path.join(bin_path, esmini_lib_name())))
+        self.assertFalse(path.exists(path.join(bin_path, "esmini")))
+        self.assertEqual(len(server.requested_ranges), 2)
+        # the archive is removed once extracted
+        self.assertFalse(
+            any(name.endswith(".zip") for name in os.listdir(self.tmp_dir.name))
+        )
+        self.assertTrue(release_archive_name().endswith(".zip"))
@@ -0,0 +1,89 @@
+import copy
+import gc
+
+from commonroad.geometry.shape import Circle
+
+from osc_cr_converter.utility.general import remove_lanelets
+from osc_cr_converter.utility import lanelet_assignment
+from osc_cr_converter.utility.lanelet_assignment import (
+    assign_obstacles_to_lanelets,
+    share_assignments,
+)
+from tests.obstacles_on_map import (
+    ObstaclesOnMapTestCase,
+    create_obstacle,
+    lanelet_assignments,
+)
+
+
+class TestLaneletAssignment(ObstaclesOnMapTestCase):
+    def _reference(self):
+        reference = copy.deepcopy(self.scenario)
+        reference.assign_obstacles_to_lanelets()
+        return lanelet_assignments(reference)
+
+    def test_assignment_is_reused(self):
+        self.assertEqual(
+            assign_obstacles_to_lanelets(self.scenario),
+            {obstacle.obstacle_id for obstacle in self.obstacles},
+        )
+        self.assertEqual(lanelet_assignments(self.scenario), self._reference())
+        self.assertEqual(assign_obstacles_to_lanelets(self.scenario), set())
+
+        # also for a deep copy of the scenario sharing the assignments
+        scenario_copy = copy.deepcopy(self.scenario)
+        share_assignments(self.scenario, scenario_copy)
+        self.assertEqual(assign_obstacles_to_lanelets(scenario_copy), set())
+
+    def test_assignments_are_dropped_with_the_scenario(self):
+        assign_obstacles_to_lanelets(self.scenario)
+        # nothing is stored on the scenario itself
+        self.assertEqual(vars(self.scenario).keys(), vars(self.map).keys())
+        self.assertEqual(
+            assign_obstacles_to_lanelets(copy.deepcopy(self.scenario)),
+            {obstacle.obstacle_id for obstacle in self.obstacles},
+        )
+
+        gc.collect()
+        num_scenarios = len(lanelet_assignment._recorded_assignments)
+        del self.scenario
+        gc.collect()
+        self.assertEqual(
+            len(lanelet_assignment._recorded_assignments), num_scenarios - 1
+        )
+
+    def test_only_added_and_replaced_obstacles_are_assigned(self):
+        assign_obstacles_to_lanelets(self.scenario)
+        added = create_obstacle(
+            self.scenario.generate_object_id(),
+            Circle(1.0),
+            self.scenario.lanelet_network.lanelets[1],
+            2,
+        )
+        self.scenario.add_objects(added)
+        self.assertEqual(
+            assign_obstacles_to_lanelets(self.scenario), {added.obstacle_id}
+        )
+
+        replaced = self.obstacles[0]
+        self.scenario.remove_obstacle(replaced)
+        self.scenario.add_objects(copy.deepcopy(replaced))
+        self.assertEqual(
+            assign_obstacles_to_lanelets(self.scenario), {replaced.obstacle_id}
+        )
+        self.assertEqual(lanelet_assignments(self.scenario), self._reference())
+
+    def test_removed_lanelets_are_filtered(self):
+        assign_obstacles_to_lanelets(self.scenario)
+        occupied_ids = set().union(
+            *self.obstacles[0].prediction.shape_lanelet_assignment.values()
+        )
+        remove_lanelets(
+            self.scenario,
+            [
+                self.scenario.lanelet_network.find_lanelet_by_id(lanelet_id)
+                for lanelet_id in list(occupied_ids)[:1]
+            ],
+        )
+        self.assertEqual(assign_obstacles_to_lanelets(self.scenario), set())
+        self.assertEqual(lanelet_assignments(self.scenario), self._reference())
@@ -0,0 +1,36 @@
+import pickle
+import unittest
+from unittest import mock
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+
+
+class TestLazySimWrapper(unittest.TestCase):
+    def test_provided_on_first_use(self):
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.EsminiWrapperProvider"
+        ) as provider:
+            converter = Osc2CrConverter(ConverterParams())
+            provider.assert_not_called()
+
+            # a converter which never simulated is pickled without a wrapper
+            converter = pickle.loads(pickle.dumps(converter))
+            provider.assert_not_called()
+
+            sim_wrapper = converter.sim_wrapper
+            self.assertIs(converter.sim_wrapper, sim_wrapper)
+            provider.return_value.provide_esmini_wrapper.assert_called_once_with()
+            self.assertIsNone(pickle.loads(pickle.dumps(converter))._sim_wrapper)
+
+    def test_explicit_wrapper(self):
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.EsminiWrapperProvider"
+        ) as provider:
+            converter = Osc2CrConverter(ConverterParams())
+            converter.sim_wrapper = "wrapper"
+            self.assertEqual(converter.sim_wrapper, "wrapper")
+            self.assertEqual(
+                pickle.loads(pickle.dumps(converter)).sim_wrapper, "wrapper"
+            )
+            provider.assert_not_called()
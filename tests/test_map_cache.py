@@ -0,0 +1,217 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from commonroad.scenario.scenario import Scenario
+from crdesigner.map_conversion.map_conversion_interface import opendrive_to_commonroad
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.utility.map_cache import (
+    MapCache,
+    MapMemoryCache,
+    estimate_memory,
+    share_scenario,
+)
+
+_xodr_file = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "../scenarios/from_esmini/xodr/straight_500m.xodr",
+)
+
+
+def _load_or_convert(cache_dir: str, key_file: str) -> bool:
+    return MapCache(cache_dir, 1 << 30, key_file).load_or_convert(
+        _xodr_file, opendrive_to_commonroad
+    )[1]
+
+
+class TestMapCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.cache_dir = os.path.join(self.tmp_dir, "map_cache")
+        self.key_file = os.path.join(self.tmp_dir, "key", "map_cache.key")
+
+    def test_repeated_conversion_is_loaded(self):
+        cache = MapCache(self.cache_dir, 1 << 30, self.key_file)
+        convert = mock.Mock(side_effect=opendrive_to_commonroad)
+        converted, cached = cache.load_or_convert(_xodr_file, convert)
+        self.assertFalse(cached)
+        loaded, cached = cache.load_or_convert(_xodr_file, convert)
+        self.assertTrue(cached)
+        convert.assert_called_once()
+
+        self.assertIsNot(loaded, converted)
+        self.assertEqual(
+            {lanelet.lanelet_id for lanelet in loaded.lanelet_network.lanelets},
+            {lanelet.lanelet_id for lanelet in converted.lanelet_network.lanelets},
+        )
+        self.assertGreater(len(loaded.lanelet_network.lanelets), 0)
+
+    def test_key(self):
+        cache = MapCache(self.cache_dir, 1 << 30, self.key_file)
+        copied_file = os.path.join(self.tmp_dir, "copy.xodr")
+        shutil.copyfile(_xodr_file, copied_file)
+        # keyed by the content, not the path
+        self.assertEqual(cache.key(_xodr_file), cache.key(copied_file))
+        with open(copied_file, "a") as file:
+            file.write("\n")
+        self.assertNotEqual(cache.key(_xodr_file), cache.key(copied_file))
+
+        with mock.patch(
+            "osc_cr_converter.utility.map_cache.metadata.version",
+            return_value="0.0.0",
+        ):
+            self.assertNotEqual(cache.key(copied_file), cache.key(_xodr_file))
+
+    def test_eviction(self):
+        map_files = []
+        for i in range(3):
+            map_file = os.path.join(self.tmp_dir, f"map{i}.xodr")
+            with open(map_file, "w") as file:
+                file.write(str(i))
+            map_files.append(map_file)
+        cache = MapCache(self.cache_dir, 1 << 30, self.key_file)
+        cache.load_or_convert(map_files[0], lambda _: Scenario(0.1))
+        entry_size = cache.size()
+
+        # room for two maps
+        cache.max_size = 2 * entry_size
+        cache.load_or_convert(map_files[1], lambda _: Scenario(0.1))
+        os.utime(cache.entry_path(cache.key(map_files[0])), (0, 0))
+        cache.load_or_convert(map_files[2], lambda _: Scenario(0.1))
+
+        self.assertLessEqual(cache.size(), cache.max_size)
+        # the least recently used map was evicted
+        self.assertFalse(os.path.exists(cache.entry_path(cache.key(map_files[0]))))
+        self.assertTrue(os.path.exists(cache.entry_path(cache.key(map_files[2]))))
+
+    def test_unreadable_entry_is_converted_again(self):
+        cache = MapCache(self.cache_dir, 1 << 30, self.key_file)
+        os.makedirs(self.cache_dir)
+        with open(cache.entry_path(cache.key(_xodr_file)), "wb") as file:
+            file.write(b"truncated")
+        with self.assertWarns(UserWarning):
+            _, cached = cache.load_or_convert(_xodr_file, lambda _: Scenario(0.1))
+        self.assertFalse(cached)
+        self.assertTrue(cache.load_or_convert(_xodr_file, lambda _: Scenario(0.1))[1])
+
+    def test_entry_of_another_key_is_not_unpickled(self):
+        MapCache(
+            self.cache_dir, 1 << 30, os.path.join(self.tmp_dir, "other.key")
+        ).load_or_convert(_xodr_file, lambda _: Scenario(0.1))
+        cache = MapCache(self.cache_dir, 1 << 30, self.key_file)
+        with mock.patch(
+            "osc_cr_converter.utility.map_cache.pickle.loads"
+        ) as loads, self.assertWarns(UserWarning):
+            _, cached = cache.load_or_convert(_xodr_file, lambda _: Scenario(0.1))
+        loads.assert_not_called()
+        self.assertFalse(cached)
+        self.assertEqual(os.stat(self.key_file).st_mode & 0o777, 0o600)
+
+    def test_concurrent_conversion(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            cached = list(
+                executor.map(
+                    _load_or_convert, [self.cache_dir] * 4, [self.key_file] * 4
+                )
+            )
+        # the other processes waited for the single conversion
+        self.assertEqual(sorted(cached), [False, True, True, True])
+        # the lock of the map is removed, only the lock of the eviction is kept
+        self.assertEqual(
+            sorted(
+                file_name
+                for file_name in os.listdir(self.cache_dir)
+                if file_name.endswith(".lock")
+            ),
+            ["map_cache.lock"],
+        )
+
+    def test_converter_uses_the_cache(self):
+        config = ConverterParams()
+        config.scenario.use_map_cache = True
+        config.scenario.map_cache_dir = self.cache_dir
+        config.scenario.map_cache_key_file = self.key_file
+        config.scenario.map_memory_cache_size = 0
+        converter = Osc2CrConverter(config)
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            side_effect=opendrive_to_commonroad,
+        ) as map_conversion:
+            first, _, error, _ = converter._create_basic_scenario(_xodr_file)
+            second, _, _, _ = converter._create_basic_scenario(_xodr_file)
+            map_conversion.assert_called_once()
+        self.assertIsNone(error)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.dt, config.scenario.dt_cr)
+        self.assertEqual(second.author, config.scenario.author)
+
+
+class TestMapMemoryCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.map = opendrive_to_commonroad(_xodr_file)
+
+    def test_shared_copy_is_independent(self):
+        lanelet_network = self.map.lanelet_network
+        num_lanelets = len(lanelet_network.lanelets)
+        lanelet = lanelet_network.lanelets[0]
+
+        shared = share_scenario(self.map)
+        shared_lanelet = shared.lanelet_network.find_lanelet_by_id(lanelet.lanelet_id)
+        # the geometry is shared, not copied
+        self.assertIsNot(shared.lanelet_network, lanelet_network)
+        self.assertIsNot(shared_lanelet, lanelet)
+        self.assertIs(shared_lanelet.center_vertices, lanelet.center_vertices)
+
+        shared_lanelet.add_dynamic_obstacle_to_lanelet(obstacle_id=1000, time_step=0)
+        shared.remove_lanelet(shared_lanelet)
+        self.assertEqual(len(shared.lanelet_network.lanelets), num_lanelets - 1)
+        self.assertEqual(len(lanelet_network.lanelets), num_lanelets)
+        self.assertEqual(lanelet.dynamic_obstacles_on_lanelet, {})
+        self.assertIn(lanelet.lanelet_id, self.map._id_set)
+        self.assertEqual(
+            lanelet_network.find_lanelet_by_position([lanelet.center_vertices[1]]),
+            [[lanelet.lanelet_id]],
+        )
+
+    def test_lru(self):
+        memory = estimate_memory(self.map)
+        cache = MapMemoryCache(2 * memory)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", self.map)
+        cache.put("b", self.map)
+        # a is used more recently than b
+        self.assertIsNot(cache.get("a"), self.map)
+        cache.put("c", self.map)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.memory, 2 * memory)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        # a map exceeding the memory is not cached
+        cache.max_memory = memory - 1
+        cache.put("d", self.map)
+        self.assertIsNone(cache.get("d"))
+
+    def test_converter_reuses_the_map(self):
+        config = ConverterParams()
+        config.scenario.use_map_cache = False
+        converter = Osc2CrConverter(config)
+        MapMemoryCache.shared(config.scenario.map_memory_cache_size).clear()
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            side_effect=opendrive_to_commonroad,
+        ) as map_conversion:
+            first, _, _, first_hit = converter._create_basic_scenario(_xodr_file)
+            second, _, _, second_hit = converter._create_basic_scenario(_xodr_file)
+            map_conversion.assert_called_once()
+        self.assertEqual((first_hit, second_hit), (False, True))
+        self.assertIsNot(first.lanelet_network, second.lanelet_network)
@@ -0,0 +1,70 @@
+import glob
+import os
+import tempfile
+import unittest
+
+from osc_cr_converter.batch.map_prewarming import prewarm_maps
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.utility.map_cache import MapCache
+
+_xosc_dir = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "../scenarios/from_esmini/xosc/"
+)
+
+
+class TestMapPrewarming(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.config = ConverterParams()
+        self.config.scenario.use_map_cache = True
+        self.config.scenario.map_cache_dir = tmp_dir.name
+        self.config.scenario.map_cache_key_file = os.path.join(
+            tmp_dir.name, "key", "map_cache.key"
+        )
+        self.converter = Osc2CrConverter(self.config)
+
+    def test_distinct_maps_are_converted_once(self):
+        files = [
+            os.path.join(_xosc_dir, name)
+            for name in (
+                "acc-test.xosc",
+                "cut-in_simple.xosc",
+                "drop-bike.xosc",
+                "pedestrian.xosc",
+                "pedestrian_collision.xosc",
+            )
+        ]
+        report = prewarm_maps(self.converter, files, num_worker=2)
+        self.assertEqual(report.num_scenarios, 5)
+        self.assertEqual(report.num_maps, 2)
+        self.assertEqual(report.num_cached_maps, 0)
+        self.assertEqual(report.failed_maps, [])
+        self.assertGreater(report.conversion_time, 0.0)
+        # each map would have been converted by 3, respectively 2 scenarios
+        self.assertGreater(report.saved_time, 0.0)
+        self.assertLess(report.saved_time, 2 * report.conversion_time)
+
+        cache_dir = self.config.scenario.map_cache_dir
+        cache = MapCache(cache_dir, 1 << 30, self.config.scenario.map_cache_key_file)
+        self.assertEqual(len(glob.glob(os.path.join(cache_dir, "*.pickle"))), 2)
+        for map_name in ("straight_500m.xodr", "fabriksgatan.xodr"):
+            map_file = os.path.join(_xosc_dir, "../xodr", map_name)
+            self.assertTrue(os.path.exists(cache.entry_path(cache.key(map_file))))
+
+        # the maps are only looked up by a later run
+        report_again = prewarm_maps(self.converter, files, num_worker=1)
+        self.assertEqual(report_again.num_cached_maps, 2)
+        self.assertAlmostEqual(report_again.conversion_time, report.conversion_time)
+        self.assertAlmostEqual(
+            report_again.saved_time, report.saved_time + report.conversion_time
+        )
+
+    def test_disabled_map_cache(self):
+        self.config.scenario.use_map_cache = False
+        with self.assertWarns(UserWarning):
+            report = prewarm_maps(
+                self.converter, [os.path.join(_xosc_dir, "cut-in_simple.xosc")]
+            )
+        self.assertIsNone(report)
@@ -0,0 +1,230 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+from unittest import mock
+
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.converter.base import EFailureReason
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.converter.result import Osc2CrDistributionResult
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.utility.parameter_distribution import (
+    expand_parameter_value_distribution,
+)
+from tests.simulated_states import FakeSimWrapper
+
+_xosc_dir = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "../scenarios/from_esmini/xosc/"
+)
+
+_distribution_template = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+   <FileHeader revMajor="1" revMinor="1" date="2023-01-01T00:00:00" description="Distribution" author="Test"/>
+   <ParameterValueDistribution>
+      <ScenarioFile filepath="{scenario_file}"/>
+      {distribution}
+   </ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+_deterministic = """
+      <Deterministic>
+         <DeterministicSingleParameterDistribution parameterName="HostSpeed">
+            <DistributionSet>
+               <Element value="20"/>
+               <Element value="30"/>
+            </DistributionSet>
+         </DeterministicSingleParameterDistribution>
+         <DeterministicSingleParameterDistribution parameterName="Offset">
+            <DistributionRange stepWidth="0.1">
+               <Range lowerLimit="0.0" upperLimit="0.3"/>
+            </DistributionRange>
+         </DeterministicSingleParameterDistribution>
+         <DeterministicMultiParameterDistribution>
+            <ValueSetDistribution>
+               <ParameterValueSet>
+                  <ParameterAssignment parameterRef="Lane" value="-1"/>
+                  <ParameterAssignment parameterRef="Color" value="red"/>
+               </ParameterValueSet>
+               <ParameterValueSet>
+                  <ParameterAssignment parameterRef="Lane" value="1"/>
+                  <ParameterAssignment parameterRef="Color" value="blue"/>
+               </ParameterValueSet>
+            </ValueSetDistribution>
+         </DeterministicMultiParameterDistribution>
+      </Deterministic>"""
+
+_stochastic = """
+      <Stochastic numberOfTestRuns="50" randomSeed="7">
+         <StochasticDistribution parameterName="Speed">
+            <NormalDistribution expectedValue="25" variance="16">
+               <Range lowerLimit="20" upperLimit="30"/>
+            </NormalDistribution>
+         </StochasticDistribution>
+         <StochasticDistribution parameterName="Gap">
+            <UniformDistribution>
+               <Range lowerLimit="5" upperLimit="10"/>
+            </UniformDistribution>
+         </StochasticDistribution>
+         <StochasticDistribution parameterName="Vehicles">
+            <PoissonDistribution expectedValue="3"/>
+         </StochasticDistribution>
+         <StochasticDistribution parameterName="Width">
+            <Histogram>
+               <Bin weight="1"><Range lowerLimit="1.5" upperLimit="2"/></Bin>
+               <Bin weight="3"><Range lowerLimit="2" upperLimit="2.5"/></Bin>
+            </Histogram>
+         </StochasticDistribution>
+         <StochasticDistribution parameterName="Weather">
+            <ProbabilityDistributionSet>
+               <Element value="dry" weight="0.8"/>
+               <Element value="wet" weight="0.2"/>
+            </ProbabilityDistributionSet>
+         </StochasticDistribution>
+      </Stochastic>"""
+
+
+def distribution_root(distribution: str) -> ElementTree.Element:
+    return ElementTree.fromstring(
+        _distribution_template.format(
+            scenario_file="scenario.xosc", distribution=distribution
+        ).encode()
+    )
+
+
+class TestParameterDistribution(unittest.TestCase):
+    def test_deterministic(self):
+        parameter_sets = expand_parameter_value_distribution(
+            distribution_root(_deterministic)
+        )
+        # every combination of the distributions
+        self.assertEqual(len(parameter_sets), 2 * 4 * 2)
+        self.assertEqual(
+            {parameter_set["Offset"] for parameter_set in parameter_sets},
+            {"0", "0.1", "0.2", "0.3"},
+        )
+        self.assertEqual(
+            {
+                (parameter_set["Lane"], parameter_set["Color"])
+                for parameter_set in parameter_sets
+            },
+            {("-1", "red"), ("1", "blue")},
+        )
+        self.assertEqual(
+            len({tuple(sorted(p.items())) for p in parameter_sets}),
+            len(parameter_sets),
+        )
+
+    def test_stochastic(self):
+        root = distribution_root(_stochastic)
+        parameter_sets = expand_parameter_value_distribution(root)
+        self.assertEqual(len(parameter_sets), 50)
+        # seeded by the randomSeed of the distribution
+        self.assertEqual(
+            parameter_sets, expand_parameter_value_distribution(root, default_seed=1)
+        )
+        for parameter_set in parameter_sets:
+            self.assertTrue(20 <= float(parameter_set["Speed"]) <= 30)
+            self.assertTrue(5 <= float(parameter_set["Gap"]) <= 10)
+            self.assertGreaterEqual(int(parameter_set["Vehicles"]), 0)
+            self.assertTrue(1.5 <= float(parameter_set["Width"]) <= 2.5)
+            self.assertIn(parameter_set["Weather"], {"dry", "wet"})
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            expand_parameter_value_distribution(
+                distribution_root(
+                    """<Stochastic numberOfTestRuns="2">
+                         <StochasticDistribution parameterName="x">
+                            <UserDefinedDistribution type="custom">x</UserDefinedDistribution>
+                         </StochasticDistribution>
+                       </Stochastic>"""
+                )
+            )
+
+    def _write_distribution(self) -> str:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        distribution_file = os.path.join(tmp_dir.name, "cut-in_distribution.xosc")
+        with open(distribution_file, "w") as file:
+            file.write(
+                _distribution_template.format(
+                    scenario_file=os.path.join(_xosc_dir, "cut-in_simple.xosc"),
+                    distribution="""
+                    <Deterministic>
+                       <DeterministicSingleParameterDistribution parameterName="HostVehicle">
+                          <DistributionSet>
+                             <Element value="car_white"/>
+                             <Element value="car_red"/>
+                             <Element value="car_blue"/>
+                          </DistributionSet>
+                       </DeterministicSingleParameterDistribution>
+                    </Deterministic>""",
+                )
+            )
+        return distribution_file
+
+    def test_conversion_shares_the_scenario(self):
+        distribution_file = self._write_distribution()
+        config = ConverterParams()
+        config.debug.write_to_xml = False
+        config.scenario.expand_parameter_distributions = True
+        config.scenario.num_variant_workers = 2
+        config.scenario.use_map_cache = False
+        config.scenario.map_memory_cache_size = 0
+        converter = Osc2CrConverter(config)
+        sim_wrapper = FakeSimWrapper(config)
+        converter.sim_wrapper = sim_wrapper
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            return_value=Scenario(0.1),
+        ) as map_conversion, self.assertWarnsRegex(UserWarning, "HostVehicle"):
+            scenarios = converter.run_conversion(distribution_file)
+            # the map is converted once for all variants
+            map_conversion.assert_called_once()
+
+        self.assertEqual(len(scenarios), 3)
+        self.assertEqual(len({id(scenario) for scenario in scenarios}), 3)
+        self.assertCountEqual(
+            sim_wrapper.simulated_parameter_values,
+            [{"HostVehicle": v} for v in ("car_white", "car_red", "car_blue")],
+        )
+        result = converter.conversion_result
+        self.assertIsInstance(result, Osc2CrDistributionResult)
+        self.assertEqual(result.xosc_file, distribution_file)
+        for parameter_values, variant in zip(result.parameter_sets, result.variants):
+            self.assertEqual(variant.parameter_values, parameter_values)
+            self.assertEqual(len(variant.scenario.dynamic_obstacles), 2)
+
+        # by default, a distribution is not converted
+        config.scenario.expand_parameter_distributions = False
+        self.assertIs(
+            converter.run_conversion(distribution_file),
+            EFailureReason.SCENARIO_FILE_IS_PARAMETER_VALUE_DISTRIBUTION,
+        )
+
+    def test_variants_are_converted_sequentially_by_default(self):
+        distribution_file = self._write_distribution()
+        config = ConverterParams()
+        config.debug.write_to_xml = False
+        config.scenario.expand_parameter_distributions = True
+        config.scenario.use_map_cache = False
+        config.scenario.map_memory_cache_size = 0
+        converter = Osc2CrConverter(config)
+        # like the SimWrapper provided by the converter itself, e.g. in a BatchConverter worker
+        sim_wrapper = FakeSimWrapper(config)
+        converter._sim_wrapper = sim_wrapper
+        converter._sim_wrapper_provided = True
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            return_value=Scenario(0.1),
+        ), mock.patch(
+            "osc_cr_converter.converter.osc2cr.EsminiWrapperProvider"
+        ) as provider:
+            scenarios = converter.run_conversion(distribution_file)
+            provider.assert_not_called()
+
+        self.assertEqual(len(scenarios), 3)
+        self.assertEqual(len(sim_wrapper.simulated_parameter_values), 3)
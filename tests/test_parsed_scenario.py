@@ -0,0 +1,83 @@
+import os
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from osc_cr_converter.converter.base import EFailureReason
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.obstacle_info import ObstacleExtraInfoFinder
+from osc_cr_converter.utility.parsed_scenario import ParsedScenario
+from osc_cr_converter.utility.sim_time_budget import SimTimeBudget
+
+_xosc_dir = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "../scenarios/from_esmini/xosc/"
+)
+
+
+class TestParsedScenario(unittest.TestCase):
+    def test_scenario(self):
+        source_file = os.path.join(_xosc_dir, "cut-in_simple.xosc")
+        parsed_scenario = ParsedScenario.parse(source_file)
+        root = ElementTree.parse(source_file).getroot()
+
+        self.assertTrue(parsed_scenario.has_storyboard)
+        self.assertFalse(parsed_scenario.is_catalog)
+        self.assertEqual(
+            parsed_scenario.logic_file,
+            os.path.join(
+                os.path.dirname(os.path.abspath(source_file)),
+                root.find("RoadNetwork/LogicFile").attrib["filepath"],
+            ),
+        )
+        self.assertEqual(
+            set(parsed_scenario.scenario_objects.keys()),
+            {o.attrib["name"] for o in root.iterfind("Entities/ScenarioObject")},
+        )
+        self.assertIn("VehicleCatalog", parsed_scenario.catalog_locations)
+        self.assertEqual(
+            parsed_scenario.sim_time_budget, SimTimeBudget.from_xosc_root(root)
+        )
+        self.assertEqual(
+            Osc2CrConverter._pre_parse_scenario(parsed_scenario),
+            parsed_scenario.logic_file,
+        )
+        # the catalog references of the entities are read without resolving their parameters
+        self.assertEqual(
+            parsed_scenario.unresolved_parameters(["HostVehicle", "HeadwayTime_Brake"]),
+            {"HostVehicle"},
+        )
+
+    def test_obstacle_extra_info(self):
+        source_file = os.path.join(_xosc_dir, "drop-bike.xosc")
+        parsed_scenario = ParsedScenario.parse(source_file)
+        root = ElementTree.parse(source_file).getroot()
+        # the entities are kept completely, while the actions of the storyboard are discarded
+        for scenario_object in root.iterfind("Entities/ScenarioObject"):
+            self.assertEqual(
+                ElementTree.tostring(
+                    parsed_scenario.scenario_objects[scenario_object.attrib["name"]]
+                ),
+                ElementTree.tostring(scenario_object),
+            )
+        self.assertEqual(
+            parsed_scenario.sim_time_budget, SimTimeBudget.from_xosc_root(root)
+        )
+
+        extra_info = ObstacleExtraInfoFinder(
+            source_file, {"Ego", "bike", "Box"}, parsed_scenario
+        ).run()
+        self.assertEqual(extra_info["Ego"].name, "car_white")
+        self.assertEqual(extra_info["bike"].name, "bicycle")
+        # a MiscObject has no extra information
+        self.assertIsNone(extra_info["Box"])
+
+    def test_catalog(self):
+        parsed_scenario = ParsedScenario.parse(
+            os.path.join(_xosc_dir, "Catalogs/Vehicles/VehicleCatalog.xosc")
+        )
+        self.assertFalse(parsed_scenario.has_storyboard)
+        self.assertTrue(parsed_scenario.is_catalog)
+        self.assertEqual(parsed_scenario.scenario_objects, {})
+        self.assertIs(
+            Osc2CrConverter._pre_parse_scenario(parsed_scenario),
+            EFailureReason.SCENARIO_FILE_IS_CATALOG,
+        )
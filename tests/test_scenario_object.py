@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from osc_cr_converter.wrapper.base.scenario_object import ScenarioObjectState
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    EsminiScenarioObjectState,
+)
+from tests.simulated_states import create_recorded_states
+
+
+class TestStateResampling(unittest.TestCase):
+    """Checks that the vectorized resampling creates the same CommonRoad states as the per time step interpolation"""
+
+    def assert_same_states(self, states, timestamps, first_time_step):
+        expected = [
+            ScenarioObjectState.build_interpolated(states, t, None).to_cr_state(
+                first_time_step + i
+            )
+            for i, t in enumerate(timestamps)
+        ]
+        actual = EsminiScenarioObjectState.build_cr_states(
+            states, timestamps, first_time_step, None
+        )
+        self.assertEqual(len(expected), len(actual))
+        for exp, act in zip(expected, actual):
+            self.assertEqual(exp.time_step, act.time_step)
+            np.testing.assert_allclose(act.position, exp.position, rtol=1e-12)
+            for attr in ("orientation", "velocity", "steering_angle", "yaw_rate"):
+                self.assertAlmostEqual(getattr(exp, attr), getattr(act, attr), 12)
+            self.assertEqual(exp.slip_angle, act.slip_angle)
+
+    def test_fine_simulation_steps(self):
+        states = create_recorded_states(500, 0.01)
+        timestamps = [step * 0.1 for step in range(50)]
+        self.assert_same_states(states, timestamps, 0)
+
+    def test_coarse_simulation_steps(self):
+        states = create_recorded_states(40, 0.25)
+        timestamps = [step * 0.1 for step in range(3, 98)]
+        self.assert_same_states(states, timestamps, 3)
+
+    def test_generic_build_cr_states(self):
+        states = create_recorded_states(100, 0.03)
+        timestamps = [step * 0.1 for step in range(30)]
+        expected = EsminiScenarioObjectState.build_cr_states(
+            states, timestamps, 0, None
+        )
+        actual = ScenarioObjectState.build_cr_states.__func__(
+            EsminiScenarioObjectState, states, timestamps, 0, None
+        )
+        for exp, act in zip(expected, actual):
+            np.testing.assert_allclose(act.position, exp.position, rtol=1e-12)
+            self.assertAlmostEqual(exp.velocity, act.velocity, 12)
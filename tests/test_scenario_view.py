@@ -0,0 +1,110 @@
+import copy
+import pickle
+from unittest import mock
+
+from commonroad.geometry.shape import Rectangle
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+
+from osc_cr_converter.utility.general import trim_scenario
+from osc_cr_converter.utility.lanelet_assignment import assign_obstacles_to_lanelets
+from osc_cr_converter.utility.scenario_view import scenario_view
+from tests.obstacles_on_map import (
+    ObstaclesOnMapTestCase,
+    create_obstacle,
+    lanelet_assignments,
+    lanelet_ids,
+)
+
+
+class TestScenarioView(ObstaclesOnMapTestCase):
+    def setUp(self):
+        super().setUp()
+        assign_obstacles_to_lanelets(self.scenario)
+
+    def test_trimmed_view_equals_trimmed_copy(self):
+        reference = trim_scenario(self.scenario)
+        original_lanelet_ids = lanelet_ids(self.scenario)
+        assignments = copy.deepcopy(lanelet_assignments(self.scenario))
+        obstacles_on_lanelets = {
+            lanelet.lanelet_id: copy.deepcopy(lanelet.dynamic_obstacles_on_lanelet)
+            for lanelet in self.scenario.lanelet_network.lanelets
+        }
+
+        with mock.patch.object(
+            Scenario,
+            "assign_obstacles_to_lanelets",
+            autospec=True,
+            side_effect=Scenario.assign_obstacles_to_lanelets,
+        ) as assign:
+            trimmed = trim_scenario(scenario_view(self.scenario), deep_copy=False)
+            # the assignments of the original are reused
+            assign.assert_not_called()
+
+        self.assertEqual(lanelet_ids(trimmed), lanelet_ids(reference))
+        self.assertEqual(lanelet_assignments(trimmed), lanelet_assignments(reference))
+        # the original is untouched
+        self.assertEqual(lanelet_ids(self.scenario), original_lanelet_ids)
+        self.assertEqual(lanelet_assignments(self.scenario), assignments)
+        for lanelet in self.scenario.lanelet_network.lanelets:
+            self.assertEqual(
+                lanelet.dynamic_obstacles_on_lanelet,
+                obstacles_on_lanelets[lanelet.lanelet_id],
+            )
+            self.assertEqual(
+                lanelet,
+                self.map.lanelet_network.find_lanelet_by_id(lanelet.lanelet_id),
+            )
+
+    def test_view_shares_the_trajectories_and_lanelet_geometry(self):
+        view = scenario_view(self.scenario)
+        for obstacle in self.scenario.dynamic_obstacles:
+            shared = view.obstacle_by_id(obstacle.obstacle_id)
+            self.assertIsNot(shared, obstacle)
+            self.assertIs(shared.prediction.trajectory, obstacle.prediction.trajectory)
+            self.assertIs(shared.obstacle_shape, obstacle.obstacle_shape)
+        lanelet = self.scenario.lanelet_network.lanelets[0]
+        self.assertIs(
+            view.lanelet_network.find_lanelet_by_id(lanelet.lanelet_id).left_vertices,
+            lanelet.left_vertices,
+        )
+
+        # the view is passed to the analyzers in a separate process
+        unpickled = pickle.loads(pickle.dumps(view))
+        self.assertEqual(lanelet_ids(unpickled), lanelet_ids(self.scenario))
+
+    def test_analyzed_ego_vehicle_is_assigned_on_the_untrimmed_map(self):
+        lanelets = self.scenario.lanelet_network.lanelets
+        ego = create_obstacle(
+            self.scenario.generate_object_id(),
+            Rectangle(4.0, 2.0),
+            lanelets[len(lanelets) // 2],
+            4,
+        )
+        reference = copy.deepcopy(self.scenario)
+        reference.add_objects(copy.deepcopy(ego))
+        assign_obstacles_to_lanelets(reference)
+        expected_assignment = lanelet_assignments(reference)[ego.obstacle_id]
+
+        analyzer = mock.Mock()
+        converter = Osc2CrConverter(ConverterParams())
+        # EAnalyzer defines no analyzers, so any key stands in for one
+        converter.analyzers = {mock.sentinel.analyzer: analyzer}
+        converter.run_analysis(self.scenario, {"ego": ego}, "ego", False, {})
+        analyzed_scenario = analyzer.run.call_args.args[0]
+
+        self.assertEqual(
+            lanelet_assignments(analyzed_scenario)[ego.obstacle_id],
+            expected_assignment,
+        )
+        # the lanelets of the ego vehicle are kept by trimming
+        self.assertTrue(
+            set()
+            .union(*expected_assignment[2].values())
+            .issubset(lanelet_ids(analyzed_scenario))
+        )
+        # the ego vehicle of the conversion is neither assigned nor added to the scenario
+        self.assertIsNone(ego.prediction.shape_lanelet_assignment)
+        self.assertIsNone(self.scenario.obstacle_by_id(ego.obstacle_id))
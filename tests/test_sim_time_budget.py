@@ -0,0 +1,116 @@
+import os
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from osc_cr_converter.utility.sim_time_budget import SimTimeBudget
+
+_scenario_template = """<OpenSCENARIO>
+   <ParameterDeclarations>
+      <ParameterDeclaration name="StopTime" parameterType="double" value="12"/>
+      <ParameterDeclaration name="EventTime" parameterType="double" value="70"/>
+   </ParameterDeclarations>
+   <Storyboard>
+      <Story name="Story">
+         <Act name="Act">
+            <StartTrigger>
+               <ConditionGroup>
+                  <Condition name="EventStart" delay="1" conditionEdge="rising">
+                     <ByValueCondition>
+                        <SimulationTimeCondition value="$EventTime" rule="greaterThan"/>
+                     </ByValueCondition>
+                  </Condition>
+               </ConditionGroup>
+            </StartTrigger>
+         </Act>
+      </Story>
+      <StopTrigger>{condition_groups}</StopTrigger>
+   </Storyboard>
+</OpenSCENARIO>
+"""
+
+_time_condition = """
+<Condition name="Time" delay="{delay}" conditionEdge="{edge}">
+   <ByValueCondition>
+      <SimulationTimeCondition value="{value}" rule="{rule}"/>
+   </ByValueCondition>
+</Condition>
+"""
+
+_other_condition = """
+<Condition name="Other" delay="0" conditionEdge="rising">
+   <ByValueCondition>
+      <StoryboardElementStateCondition storyboardElementType="act" storyboardElementRef="Act" state="endTransition"/>
+   </ByValueCondition>
+</Condition>
+"""
+
+
+def time_condition(value, rule="greaterThan", delay=0, edge="none"):
+    return _time_condition.format(value=value, rule=rule, delay=delay, edge=edge)
+
+
+def budget_of(*condition_groups):
+    root = ElementTree.fromstring(
+        _scenario_template.format(
+            condition_groups="".join(
+                f"<ConditionGroup>{''.join(conditions)}</ConditionGroup>"
+                for conditions in condition_groups
+            )
+        )
+    )
+    return SimTimeBudget.from_xosc_root(root)
+
+
+class TestSimTimeBudget(unittest.TestCase):
+    def test_simulation_time_stop_trigger(self):
+        budget = budget_of([time_condition("$StopTime", delay=0.5)])
+        self.assertEqual(budget.stop_time, 12.5)
+        self.assertEqual(budget.max_time(60.0, 2.0), 14.5)
+
+    def test_earliest_condition_group(self):
+        budget = budget_of(
+            [time_condition(30)],
+            [time_condition(20), _other_condition, time_condition(25)],
+            [_other_condition],
+        )
+        # only the group of simulation time conditions surely fires at its time
+        self.assertEqual(budget.stop_time, 30.0)
+        self.assertEqual(budget.estimated_stop_time, 25.0)
+        self.assertEqual(budget.max_time(60.0, 2.0), 32.0)
+
+    def test_mixed_condition_group_is_no_time_bound(self):
+        budget = budget_of([time_condition(90), _other_condition])
+        self.assertIsNone(budget.stop_time)
+        self.assertEqual(budget.estimated_stop_time, 90.0)
+        # the simulation must not end before the group can fire
+        self.assertEqual(budget.max_time(60.0, 2.0), 92.0)
+        self.assertEqual(budget.max_time(100.0, 2.0), 100.0)
+
+    def test_no_time_bound(self):
+        for condition_groups in (
+            [],
+            [[_other_condition]],
+            [[time_condition(10, rule="lessThan")]],
+            [[time_condition(10, edge="falling")]],
+            [[time_condition("$Unknown")]],
+        ):
+            budget = budget_of(*condition_groups)
+            self.assertIsNone(budget.stop_time)
+            self.assertIsNone(budget.estimated_stop_time)
+            # the timed event of the act starting at 71 s must not be cut off
+            self.assertEqual(budget.required_time, 71.0)
+            self.assertEqual(budget.max_time(60.0, 2.0), 73.0)
+            self.assertEqual(budget.max_time(100.0, 2.0), 100.0)
+
+    def test_scenario_file(self):
+        scenario_path = (
+            os.path.dirname(os.path.realpath(__file__))
+            + "/../scenarios/from_esmini/xosc/drop-bike.xosc"
+        )
+        budget = SimTimeBudget.from_xosc_root(
+            ElementTree.parse(scenario_path).getroot()
+        )
+        self.assertEqual(
+            budget,
+            SimTimeBudget(stop_time=10.0, estimated_stop_time=10.0, required_time=5.0),
+        )
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+import unittest
+from typing import Dict, Optional
+from unittest import mock
+
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.utility.stage_graph import StageGraph
+from osc_cr_converter.wrapper.base.sim_wrapper import WrapperSimResult
+from tests.simulated_states import FakeSimWrapper
+
+_xosc_file = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "../scenarios/from_esmini/xosc/cut-in_simple.xosc",
+)
+
+_STAGE_TIME = 0.3
+
+
+class SlowSimWrapper(FakeSimWrapper):
+    def simulate_scenario(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ) -> WrapperSimResult:
+        time.sleep(_STAGE_TIME)
+        return super().simulate_scenario(scenario_path, sim_dt, parameter_values)
+
+
+def slow_map_conversion(_: str) -> Scenario:
+    time.sleep(_STAGE_TIME)
+    return Scenario(0.1)
+
+
+class TestStageGraph(unittest.TestCase):
+    def test_dependencies(self):
+        stages = StageGraph()
+        stages.add("a", lambda: 1)
+        stages.add("b", lambda: 2)
+        stages.add("sum", lambda a, b: a + b, depends_on=("a", "b"))
+        stages.add("double", lambda sum: 2 * sum, depends_on=("sum",))
+        for concurrent in (True, False):
+            self.assertEqual(
+                stages.run(concurrent), {"a": 1, "b": 2, "sum": 3, "double": 6}
+            )
+        self.assertEqual(set(stages.runtimes.keys()), {"a", "b", "sum", "double"})
+
+        with self.assertRaises(ValueError):
+            stages.add("a", lambda: 0)
+        with self.assertRaises(ValueError):
+            stages.add("c", lambda unknown: 0, depends_on=("unknown",))
+
+    def test_independent_stages_overlap(self):
+        barrier = threading.Barrier(2, timeout=5)
+        stages = StageGraph()
+        # each stage only finishes once both run at the same time
+        stages.add("a", barrier.wait)
+        stages.add("b", barrier.wait)
+        stages.run()
+
+    def test_failure(self):
+        def fail():
+            raise RuntimeError("failed")
+
+        dependent = mock.Mock()
+        stages = StageGraph()
+        stages.add("a", fail)
+        stages.add("b", dependent, depends_on=("a",))
+        with self.assertRaises(RuntimeError):
+            stages.run()
+        dependent.assert_not_called()
+
+    def test_conversion_overlaps_map_and_simulation(self):
+        config = ConverterParams()
+        config.debug.write_to_xml = False
+        config.esmini.stream_simulation = False
+        config.scenario.concurrent_stages = True
+        config.scenario.use_map_cache = False
+        config.scenario.map_memory_cache_size = 0
+        converter = Osc2CrConverter(config)
+        converter.sim_wrapper = SlowSimWrapper(config)
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            side_effect=slow_map_conversion,
+        ):
+            start_time = time.time()
+            scenario = converter.run_conversion(_xosc_file)
+            runtime = time.time() - start_time
+
+        self.assertIsInstance(scenario, Scenario)
+        self.assertEqual(len(scenario.dynamic_obstacles), 2)
+        self.assertLess(runtime, 2 * _STAGE_TIME)
+        # the runtime of both stages is reported, as if they ran one after another
+        self.assertGreaterEqual(
+            converter.conversion_result.statistics.runtime, 2 * _STAGE_TIME
+        )
@@ -0,0 +1,254 @@
+import math
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+from commonroad.scenario.scenario import Scenario
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.utility.configuration import ConverterParams
+
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SEStruct,
+    EsminiScenarioObjectState,
+    SE_STRUCT_DTYPE,
+    EsminiTrajectory,
+    se_structs_to_array,
+)
+from osc_cr_converter.wrapper.esmini.esmini_wrapper import EsminiWrapper
+from osc_cr_converter.wrapper.esmini.state_recorder import EsminiStateRecorder
+from tests.simulated_states import FakeSimWrapper, create_recorded_states
+
+
+class TestEsminiStateRecorder(unittest.TestCase):
+    """Records synthetic frames of object states like the EsminiWrapper does"""
+
+    @staticmethod
+    def record(recorder: EsminiStateRecorder, object_id: int, timestamp: float):
+        state = SEStruct(id=object_id, timestamp=timestamp, x=timestamp * 2)
+        recorder.record(se_structs_to_array([state]))
+
+    def test_growing_and_trimming(self):
+        recorder = EsminiStateRecorder(initial_capacity=4)
+        for step in range(1000):
+            self.record(recorder, 0, step * 0.01)
+            if step >= 500:
+                self.record(recorder, 7, step * 0.01)
+
+        trajectories = recorder.trajectories()
+        self.assertEqual(set(trajectories.keys()), {0, 7})
+        self.assertEqual(len(trajectories[0]), 1000)
+        self.assertEqual(len(trajectories[7]), 500)
+        self.assertEqual(trajectories[0].array.nbytes, 1000 * SE_STRUCT_DTYPE.itemsize)
+        self.assertIsInstance(trajectories[7][0], SEStruct)
+        self.assertAlmostEqual(trajectories[7][0].get_timestamp(), 5.0, 5)
+        self.assertAlmostEqual(trajectories[0][-1].x, 19.98, 4)
+
+    def test_objects_allocate_only_their_own_states(self):
+        recorder = EsminiStateRecorder(initial_capacity=4)
+        for step in range(1000):
+            self.record(recorder, 0, step * 0.01)
+        # an object spawned late does not reserve the capacity of the others
+        self.record(recorder, 7, 10.0)
+        self.assertEqual(recorder.nbytes, (1024 + 4) * SE_STRUCT_DTYPE.itemsize)
+
+    def test_same_timestamp_replaces_state(self):
+        recorder = EsminiStateRecorder()
+        self.record(recorder, 1, 0.0)
+        self.record(recorder, 1, 0.1)
+        self.record(recorder, 1, 0.1)
+        trajectory = recorder.trajectories()[1]
+        self.assertIsInstance(trajectory, EsminiTrajectory)
+        self.assertEqual(len(trajectory), 2)
+        self.assertEqual(
+            list(trajectory.get_timestamps()), [0.0, SEStruct(timestamp=0.1).timestamp]
+        )
+
+    def test_multiple_objects_per_frame(self):
+        recorder = EsminiStateRecorder(initial_capacity=1)
+        for step in range(10):
+            recorder.record(
+                se_structs_to_array(
+                    [SEStruct(id=object_id, timestamp=step) for object_id in (3, 5, 8)]
+                )
+            )
+        trajectories = recorder.trajectories()
+        self.assertEqual(list(trajectories.keys()), [3, 5, 8])
+        for object_id, trajectory in trajectories.items():
+            self.assertEqual(list(trajectory.get_timestamps()), list(range(10)))
+            self.assertTrue(all(trajectory.array["id"] == object_id))
+
+    def test_steps_are_recorded_like_single_objects(self):
+        for record_dt in (None, 0.1):
+            recorder = EsminiStateRecorder(initial_capacity=4, record_dt=record_dt)
+            single_objects = {}
+            for step in range(300):
+                object_ids = [2, 4, 6] if step < 200 else [4, 6]
+                if step >= 50:
+                    # an object added during the simulation
+                    object_ids.append(9)
+                states = se_structs_to_array(
+                    [
+                        SEStruct(
+                            id=object_id,
+                            # the objects of a step usually share their timestamp
+                            timestamp=step * 0.03
+                            + (object_id * 0.001 if step % 40 == 0 else 0),
+                            x=step + object_id,
+                        )
+                        for object_id in object_ids
+                    ]
+                )
+                recorder.record(states)
+                if step % 25 == 0:
+                    # repeated timestamps replace the previous states
+                    recorder.record(states)
+                for state in states:
+                    single = single_objects.setdefault(
+                        int(state["id"]),
+                        EsminiStateRecorder(initial_capacity=4, record_dt=record_dt),
+                    )
+                    single.record(state[np.newaxis])
+                    if step % 25 == 0:
+                        single.record(state[np.newaxis])
+
+            trajectories = recorder.trajectories()
+            self.assertEqual(list(trajectories.keys()), [2, 4, 6, 9])
+            for object_id, single in single_objects.items():
+                np.testing.assert_array_equal(
+                    trajectories[object_id].array,
+                    single.trajectories()[object_id].array,
+                )
+
+    def test_aligned_recording_resamples_identically(self):
+        for sim_dt, record_dt, first_state in (
+            (0.01, 0.1, 0),
+            (0.03, 0.1, 7),
+            (0.25, 0.1, 0),
+            (0.07, 0.04, 3),
+        ):
+            states = create_recorded_states(400, sim_dt)[first_state:]
+            dense = EsminiStateRecorder()
+            aligned = EsminiStateRecorder(initial_capacity=4, record_dt=record_dt)
+            for state in states:
+                dense.record(se_structs_to_array([state]))
+                aligned.record(se_structs_to_array([state]))
+            dense_trajectory = dense.trajectories()[0]
+            aligned_trajectory = aligned.trajectories()[0]
+            if sim_dt == 0.01:
+                self.assertLess(len(aligned_trajectory), len(dense_trajectory) / 2)
+
+            timestamps = [
+                step * record_dt
+                for step in range(
+                    math.ceil(states[0].timestamp / record_dt),
+                    math.floor(states[-1].timestamp / record_dt) + 1,
+                )
+            ]
+            expected = EsminiScenarioObjectState.build_cr_states(
+                dense_trajectory, timestamps, 0, None
+            )
+            actual = EsminiScenarioObjectState.build_cr_states(
+                aligned_trajectory, timestamps, 0, None
+            )
+            for exp, act in zip(expected, actual):
+                np.testing.assert_array_equal(exp.position, act.position)
+                self.assertEqual(exp.orientation, act.orientation)
+                self.assertEqual(exp.velocity, act.velocity)
+                self.assertEqual(exp.yaw_rate, act.yaw_rate)
+
+    def test_popping_settled_states(self):
+        for record_dt in (None, 0.1):
+            recorder = EsminiStateRecorder(initial_capacity=4, record_dt=record_dt)
+            streamed = EsminiStateRecorder(initial_capacity=4, record_dt=record_dt)
+            popped = []
+            for step in range(300):
+                for object_id in (0, 7) if step >= 100 else (0,):
+                    self.record(recorder, object_id, step * 0.03)
+                    self.record(streamed, object_id, step * 0.03)
+                    # repeated timestamps replace the previous state
+                    if step % 50 == 0:
+                        self.record(recorder, object_id, step * 0.03)
+                        self.record(streamed, object_id, step * 0.03)
+                if step % 7 == 0:
+                    popped.append(streamed.pop_settled())
+            popped.append(streamed.pop_settled(final=True))
+            popped = np.concatenate(popped)
+
+            for object_id, trajectory in recorder.trajectories().items():
+                np.testing.assert_array_equal(
+                    popped[popped["id"] == object_id], trajectory.array
+                )
+            self.assertEqual(len(streamed.pop_settled(final=True)), 0)
+
+
+class TestConverterRecordDt(unittest.TestCase):
+    def test_sim_wrapper_records_at_the_converter_time_step(self):
+        config = ConverterParams()
+        config.debug.write_to_xml = False
+        config.scenario.use_map_cache = False
+        config.scenario.map_memory_cache_size = 0
+        converter = Osc2CrConverter(config)
+        converter.dt_cr = 0.2
+        # built from a config with a different time step
+        other_config = ConverterParams()
+        other_config.scenario.dt_cr = 0.5
+        converter.sim_wrapper = FakeSimWrapper(other_config)
+        self.assertEqual(converter.sim_wrapper.record_dt, 0.5)
+
+        with mock.patch(
+            "osc_cr_converter.converter.osc2cr.opendrive_to_commonroad",
+            return_value=Scenario(0.1),
+        ):
+            scenario = converter.run_conversion(
+                os.path.join(
+                    os.path.dirname(os.path.realpath(__file__)),
+                    "../scenarios/from_esmini/xosc/cut-in_simple.xosc",
+                )
+            )
+        self.assertIsInstance(scenario, Scenario)
+        self.assertEqual(converter.sim_wrapper.record_dt, 0.2)
+
+
+class FakeEsminiLib:
+    """
+    The object state functions of esmini for a changing set of objects
+    """
+
+    def __init__(self, object_ids):
+        self.object_ids = list(object_ids)
+        self.num_id_calls = 0
+
+    def SE_GetNumberOfObjects(self):
+        return len(self.object_ids)
+
+    def SE_GetId(self, index):
+        self.num_id_calls += 1
+        return self.object_ids[index]
+
+    def SE_GetObjectState(self, object_id, pointer):
+        if object_id not in self.object_ids:
+            return -1
+        pointer._obj.id = object_id
+        pointer._obj.x = 10.0 * object_id
+        return 0
+
+
+class TestEsminiStateFetch(unittest.TestCase):
+    def test_deleted_and_added_object_in_the_same_step(self):
+        esmini_lib = FakeEsminiLib([1, 2])
+        wrapper = EsminiWrapper("", ConverterParams())
+        wrapper._esmini_lib = esmini_lib
+        wrapper._bulk_state_fetch = False
+        wrapper._scenario_engine_initialized = True
+
+        self.assertEqual(wrapper._get_scenario_object_states()["id"].tolist(), [1, 2])
+        wrapper._get_scenario_object_states()
+        # the ids are cached while the objects do not change
+        self.assertEqual(esmini_lib.num_id_calls, 2)
+
+        esmini_lib.object_ids = [1, 3]
+        states = wrapper._get_scenario_object_states()
+        self.assertEqual(states["id"].tolist(), [1, 3])
+        self.assertEqual(states["x"].tolist(), [10.0, 30.0])
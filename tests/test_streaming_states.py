@@ -0,0 +1,155 @@
+import math
+import unittest
+from typing import Dict, Optional
+from unittest import mock
+
+import numpy as np
+
+from osc_cr_converter.converter.osc2cr import Osc2CrConverter
+from osc_cr_converter.converter.streaming_states import StreamingStateBuilder
+from osc_cr_converter.utility.configuration import ConverterParams
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.base.sim_wrapper import SimWrapper, WrapperSimResult
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    EsminiScenarioObjectState,
+    EsminiTrajectory,
+    se_structs_to_array,
+)
+from osc_cr_converter.wrapper.esmini.esmini_wrapper import (
+    EsminiStreamFrame,
+    EsminiWrapper,
+)
+from tests.simulated_states import create_recorded_states
+
+
+def converted_at_once(states, sim_time: float, dt_cr: float):
+    """CommonRoad states like Osc2CrConverter creates them from the complete trajectory"""
+    timestamps = [step * dt_cr for step in range(math.floor(sim_time / dt_cr) + 1)]
+    first = min(timestamps, key=lambda t: math.fabs(states[0].timestamp - t))
+    last = min(timestamps, key=lambda t: math.fabs(states[-1].timestamp - t))
+    return EsminiScenarioObjectState.build_cr_states(
+        states,
+        [t for t in timestamps if first <= t <= last],
+        round(first / dt_cr),
+        None,
+    )
+
+
+class EndlessStreamSimWrapper(SimWrapper):
+    """
+    Streams many frames of a single vehicle, counting the yielded frames
+    """
+
+    num_frames = 1000
+
+    def __init__(self, config: ConverterParams):
+        super().__init__(config)
+        self.num_yielded = 0
+
+    def simulate_scenario_stream(
+        self,
+        scenario_path: str,
+        sim_dt: float,
+        parameter_values: Optional[Dict[str, str]] = None,
+    ):
+        for state in create_recorded_states(self.num_frames, sim_dt):
+            self.num_yielded += 1
+            yield {"ego": EsminiTrajectory(se_structs_to_array([state]))}
+        return WrapperSimResult(
+            states={},
+            sim_time=(self.num_frames - 1) * sim_dt,
+            runtime=0.0,
+            ending_cause=ESimEndingCause.END_DETECTED,
+        )
+
+
+class TestStreamingStateBuilder(unittest.TestCase):
+    def assert_same_states(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for exp, act in zip(expected, actual):
+            self.assertEqual(exp.time_step, act.time_step)
+            np.testing.assert_array_equal(exp.position, act.position)
+            self.assertEqual(exp.orientation, act.orientation)
+            self.assertEqual(exp.velocity, act.velocity)
+            self.assertEqual(exp.yaw_rate, act.yaw_rate)
+
+    def test_streamed_frames(self):
+        for sim_dt, dt_cr, frames_per_build in (
+            (0.01, 0.1, 10),
+            (0.03, 0.1, 1),
+            (0.25, 0.1, 3),
+            (0.01, 0.04, 7),
+        ):
+            ego = create_recorded_states(600, sim_dt, seed=1)
+            # appears later and is deleted before the simulation ends
+            other = create_recorded_states(600, sim_dt, seed=2)[137:411]
+            builder = StreamingStateBuilder(dt_cr, {})
+            for step, state in enumerate(ego):
+                frame = {"ego": EsminiTrajectory(se_structs_to_array([state]))}
+                if other[0].timestamp <= state.timestamp <= other[-1].timestamp:
+                    frame["other"] = EsminiTrajectory(
+                        se_structs_to_array([other[step - 137]])
+                    )
+                builder.add(frame)
+                if step % frames_per_build == 0:
+                    builder.build_completed()
+
+            sim_time = 599 * sim_dt
+            results = builder.finish(sim_time)
+            self.assertEqual(builder.object_names, ["ego", "other"])
+            for name, states in (("ego", ego), ("other", other)):
+                cr_states, first_state = results[name]
+                self.assertEqual(first_state.timestamp, states[0].timestamp)
+                self.assert_same_states(
+                    converted_at_once(states, sim_time, dt_cr), cr_states
+                )
+
+    def test_repeated_timestamp_replaces_state(self):
+        states = create_recorded_states(50, 0.05)
+        builder = StreamingStateBuilder(0.1, {})
+        builder.add({"ego": EsminiTrajectory(se_structs_to_array(states[:10]))})
+        # the first state of the next part repeats the timestamp of the last state
+        repeated = create_recorded_states(50, 0.05, seed=3)[9]
+        builder.add({"ego": EsminiTrajectory(se_structs_to_array([repeated]))})
+        builder.build_completed()
+        builder.add({"ego": EsminiTrajectory(se_structs_to_array(states[10:]))})
+        cr_states, _ = builder.finish(49 * 0.05)["ego"]
+        self.assert_same_states(
+            converted_at_once(states[:9] + [repeated] + states[10:], 49 * 0.05, 0.1),
+            cr_states,
+        )
+
+    def test_esmini_frame_states(self):
+        ego = create_recorded_states(5, 0.1, seed=1)
+        other = create_recorded_states(5, 0.1, seed=2)
+        for state in other:
+            state.id = 3
+        frame = EsminiStreamFrame(
+            se_structs_to_array(ego[:2] + other + ego[2:]), {0: "ego", 3: "other"}
+        )
+        states = EsminiWrapper("", ConverterParams()).frame_states(frame)
+        self.assertEqual(set(states.keys()), {"ego", "other"})
+        np.testing.assert_array_equal(states["ego"].array, se_structs_to_array(ego))
+        np.testing.assert_array_equal(states["other"].array, se_structs_to_array(other))
+
+    def test_converter_streams_all_frames(self):
+        config = ConverterParams()
+        sim_wrapper = EndlessStreamSimWrapper(config)
+        res, states = Osc2CrConverter(config)._simulate_streaming(
+            sim_wrapper, "scenario.xosc", 0.01, {}
+        )
+        self.assertEqual(sim_wrapper.num_yielded, sim_wrapper.num_frames)
+        self.assertEqual(len(states["ego"][0]), 100)
+
+    def test_failed_state_builder_stops_the_simulation(self):
+        config = ConverterParams()
+        sim_wrapper = EndlessStreamSimWrapper(config)
+        with mock.patch.object(
+            StreamingStateBuilder, "add", side_effect=RuntimeError("failed")
+        ):
+            with self.assertRaises(RuntimeError):
+                Osc2CrConverter(config)._simulate_streaming(
+                    sim_wrapper, "scenario.xosc", 0.01, {}
+                )
+        # the bounded queue of frames stopped the simulation
+        self.assertLess(sim_wrapper.num_yielded, sim_wrapper.num_frames)
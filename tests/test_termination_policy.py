@@ -0,0 +1,83 @@
+import unittest
+
+from osc_cr_converter.utility.configuration import EsminiParams
+from osc_cr_converter.wrapper.base.ending_cause import ESimEndingCause
+from osc_cr_converter.wrapper.esmini.esmini_scenario_object import (
+    SEStruct,
+    se_structs_to_array,
+)
+from osc_cr_converter.wrapper.esmini.storyboard_element import (
+    EStoryBoardElementLevel,
+    EStoryBoardElementState,
+    StoryBoardElement,
+)
+from osc_cr_converter.wrapper.esmini.termination_policy import (
+    AllStoriesCompletePolicy,
+    OffRoadPolicy,
+    StandstillPolicy,
+    termination_policies_from_config,
+)
+
+
+def create_states(speeds, road_id: int = 0):
+    return se_structs_to_array(
+        [SEStruct(id=i, speed=speed, roadId=road_id) for i, speed in enumerate(speeds)]
+    )
+
+
+class TestTerminationPolicies(unittest.TestCase):
+    def test_all_stories_complete(self):
+        policy = AllStoriesCompletePolicy(hold_time=1.0)
+        story_1 = StoryBoardElement(b"story_1", EStoryBoardElementLevel.STORY)
+        story_2 = StoryBoardElement(b"story_2", EStoryBoardElementLevel.STORY)
+        act = StoryBoardElement(b"act", EStoryBoardElementLevel.ACT)
+        states = create_states([10.0])
+
+        self.assertIsNone(policy.check(0.0, {}, states))
+        sim_elements = {
+            story_1: EStoryBoardElementState.COMPLETE,
+            story_2: EStoryBoardElementState.RUNNING,
+            act: EStoryBoardElementState.RUNNING,
+        }
+        self.assertIsNone(policy.check(1.0, sim_elements, states))
+        sim_elements[story_2] = EStoryBoardElementState.COMPLETE
+        self.assertIsNone(policy.check(2.0, sim_elements, states))
+        self.assertIsNone(policy.check(2.5, sim_elements, states))
+        self.assertEqual(
+            policy.check(3.0, sim_elements, states),
+            ESimEndingCause.ALL_STORIES_COMPLETE,
+        )
+
+    def test_standstill_interrupted_by_movement(self):
+        policy = StandstillPolicy(hold_time=2.0)
+        self.assertIsNone(policy.check(0.0, {}, create_states([0.0, 0.0])))
+        self.assertIsNone(policy.check(1.5, {}, create_states([0.0, 0.5])))
+        self.assertIsNone(policy.check(2.0, {}, create_states([0.0, 0.0])))
+        self.assertIsNone(policy.check(3.5, {}, create_states([0.0, -0.001])))
+        self.assertEqual(
+            policy.check(4.0, {}, create_states([0.0, 0.0])),
+            ESimEndingCause.ALL_ENTITIES_STANDSTILL,
+        )
+        policy.reset()
+        self.assertIsNone(policy.check(4.0, {}, create_states([0.0, 0.0])))
+
+    def test_off_road(self):
+        policy = OffRoadPolicy()
+        self.assertIsNone(policy.check(0.0, {}, create_states([1.0], road_id=3)))
+        self.assertIsNone(policy.check(0.0, {}, create_states([])))
+        self.assertEqual(
+            policy.check(0.1, {}, create_states([1.0, 2.0], road_id=-1)),
+            ESimEndingCause.ALL_ENTITIES_OFF_ROAD,
+        )
+
+    def test_policies_from_config(self):
+        self.assertEqual(termination_policies_from_config(EsminiParams()), [])
+        policies = termination_policies_from_config(
+            EsminiParams(stories_complete_hold_time=0.0, standstill_hold_time=3.0)
+        )
+        self.assertEqual(
+            [type(policy) for policy in policies],
+            [AllStoriesCompletePolicy, StandstillPolicy],
+        )
+        self.assertEqual(policies[1].hold_time, 3.0)
+        self.assertTrue(policies[0].ending_cause.is_early_termination)
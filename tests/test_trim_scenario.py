@@ -0,0 +1,133 @@
+import copy
+from unittest import mock
+
+from commonroad.geometry.shape import Circle
+
+from osc_cr_converter.utility.general import (
+    remove_lanelets,
+    remove_unoccupied_lanelets,
+    trim_scenario,
+)
+from tests.obstacles_on_map import ObstaclesOnMapTestCase, create_obstacle, lanelet_ids
+
+
+class TestTrimScenario(ObstaclesOnMapTestCase):
+    def test_prefilter_keeps_the_trimmed_lanelets(self):
+        with mock.patch(
+            "osc_cr_converter.utility.general.remove_unoccupied_lanelets",
+            return_value=False,
+        ):
+            reference = trim_scenario(self.scenario)
+        trimmed = trim_scenario(self.scenario)
+
+        self.assertGreater(len(lanelet_ids(reference)), 0)
+        self.assertLess(len(lanelet_ids(reference)), len(lanelet_ids(self.scenario)))
+        self.assertEqual(lanelet_ids(trimmed), lanelet_ids(reference))
+        for obstacle in self.scenario.dynamic_obstacles:
+            self.assertEqual(
+                trimmed.obstacle_by_id(
+                    obstacle.obstacle_id
+                ).prediction.shape_lanelet_assignment,
+                reference.obstacle_by_id(
+                    obstacle.obstacle_id
+                ).prediction.shape_lanelet_assignment,
+            )
+        self.assertEqual(
+            {sign.traffic_sign_id for sign in trimmed.lanelet_network.traffic_signs},
+            {sign.traffic_sign_id for sign in reference.lanelet_network.traffic_signs},
+        )
+
+    def test_prefilter_removes_distant_lanelets(self):
+        num_lanelets = len(self.scenario.lanelet_network.lanelets)
+        self.assertTrue(remove_unoccupied_lanelets(self.scenario))
+        remaining_lanelets = self.scenario.lanelet_network.lanelets
+        self.assertLess(len(remaining_lanelets), num_lanelets)
+        for lanelet in remaining_lanelets:
+            self.assertIn(lanelet.lanelet_id, self.scenario._id_set)
+            for successor in lanelet.successor:
+                self.assertIsNotNone(
+                    self.scenario.lanelet_network.find_lanelet_by_id(successor)
+                )
+        # the spatial index only contains the remaining lanelets
+        remaining_ids = {lanelet.lanelet_id for lanelet in remaining_lanelets}
+        positions = [
+            lanelet.center_vertices[0] for lanelet in self.map.lanelet_network.lanelets
+        ]
+        found_ids = self.scenario.lanelet_network.find_lanelet_by_position(positions)
+        self.assertTrue(set().union(*found_ids).issubset(remaining_ids))
+        self.assertGreater(len(found_ids[0]), 0)
+
+    def test_obstacle_without_trajectory_is_not_filtered(self):
+        lanelet = self.scenario.lanelet_network.lanelets[0]
+        self.scenario.add_objects(
+            create_obstacle(self.scenario.generate_object_id(), Circle(1.0), lanelet, 0)
+        )
+        num_lanelets = len(self.scenario.lanelet_network.lanelets)
+        self.assertFalse(remove_unoccupied_lanelets(self.scenario))
+        self.assertEqual(len(self.scenario.lanelet_network.lanelets), num_lanelets)
+
+    def test_remove_lanelets_like_commonroad_io(self):
+        # remove_lanelets modifies internal attributes of commonroad-io, which have to behave like its own removal
+        removed_ids = sorted(lanelet_ids(self.scenario))[::2]
+        expected = copy.deepcopy(self.scenario)
+        expected.remove_lanelet(
+            [
+                expected.lanelet_network.find_lanelet_by_id(lanelet_id)
+                for lanelet_id in removed_ids
+            ]
+        )
+        remove_lanelets(
+            self.scenario,
+            [
+                self.scenario.lanelet_network.find_lanelet_by_id(lanelet_id)
+                for lanelet_id in removed_ids
+            ],
+        )
+
+        self.assertEqual(lanelet_ids(self.scenario), lanelet_ids(expected))
+        for lanelet in self.scenario.lanelet_network.lanelets:
+            expected_lanelet = expected.lanelet_network.find_lanelet_by_id(
+                lanelet.lanelet_id
+            )
+            self.assertEqual(
+                set(lanelet.predecessor), set(expected_lanelet.predecessor)
+            )
+            self.assertEqual(set(lanelet.successor), set(expected_lanelet.successor))
+            self.assertEqual(lanelet.adj_left, expected_lanelet.adj_left)
+            self.assertEqual(lanelet.adj_right, expected_lanelet.adj_right)
+        self.assertEqual(
+            {
+                sign.traffic_sign_id
+                for sign in self.scenario.lanelet_network.traffic_signs
+            },
+            {sign.traffic_sign_id for sign in expected.lanelet_network.traffic_signs},
+        )
+        self.assertEqual(
+            {
+                light.traffic_light_id
+                for light in self.scenario.lanelet_network.traffic_lights
+            },
+            {
+                light.traffic_light_id
+                for light in expected.lanelet_network.traffic_lights
+            },
+        )
+        positions = [
+            lanelet.center_vertices[0] for lanelet in self.map.lanelet_network.lanelets
+        ]
+        self.assertEqual(
+            [
+                set(ids)
+                for ids in self.scenario.lanelet_network.find_lanelet_by_position(
+                    positions
+                )
+            ],
+            [
+                set(ids)
+                for ids in expected.lanelet_network.find_lanelet_by_position(positions)
+            ],
+        )
+        # the ids of the removed lanelets are free again
+        removed_lanelet = self.map.lanelet_network.find_lanelet_by_id(removed_ids[0])
+        self.scenario.add_objects(copy.deepcopy(removed_lanelet))
+        expected.add_objects(copy.deepcopy(removed_lanelet))